@@ -1,15 +1,92 @@
+import json
+import threading
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Per-endpoint (connect, read) timeouts in seconds
+TIMEOUTS = {
+    "default": (3.05, 10),
+    "auth": (3.05, 15),
+    "quote": (3.05, 10),
+    "history": (3.05, 20),
+    "news": (3.05, 30),
+    "trade": (3.05, 15),
+    "ai": (3.05, 120),
+}
+
+
+def _build_session():
+    """One pooled keep-alive session with bounded retries and gzip."""
+    session = requests.Session()
+
+    # Retry connection errors for every method (nothing was sent yet), but only
+    # retry read errors / 502-504 for idempotent GETs - never re-send a trade.
+    retry = Retry(
+        total=3,
+        connect=3,
+        read=2,
+        status=2,
+        backoff_factor=0.3,
+        status_forcelist=(502, 503, 504),
+        allowed_methods=frozenset({"GET"}),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=retry)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update({"Accept-Encoding": "gzip, deflate"})
+    return session
+
+
+def _iter_sse(response):
+    """Parse a text/event-stream body into the JSON payload of each event."""
+    data_lines = []
+    for line in response.iter_lines(decode_unicode=True):
+        if line is None:
+            continue
+        if line == "":
+            if data_lines:
+                yield json.loads("\n".join(data_lines))
+                data_lines = []
+        elif line.startswith("data:"):
+            data_lines.append(line[5:].lstrip())
+    if data_lines:
+        yield json.loads("\n".join(data_lines))
 
 
 class APIClient:
+    # Shared by every APIClient instance so all modules reuse the same pool
+    _session = None
+    _session_lock = threading.Lock()
+
     def __init__(self, base_url="http://127.0.0.1:8000"):
         self.base_url = base_url
+        self.session = APIClient._shared_session()
+
+    @classmethod
+    def _shared_session(cls):
+        with cls._session_lock:
+            if cls._session is None:
+                cls._session = _build_session()
+            return cls._session
+
+    def _get(self, path, timeout="default", **kwargs):
+        return self.session.get(
+            f"{self.base_url}{path}", timeout=TIMEOUTS[timeout], **kwargs
+        )
+
+    def _post(self, path, timeout="default", **kwargs):
+        return self.session.post(
+            f"{self.base_url}{path}", timeout=TIMEOUTS[timeout], **kwargs
+        )
 
     # --- Auth ---
     def login(self, email, password):
         try:
-            response = requests.post(
-                f"{self.base_url}/auth/login",
+            response = self._post(
+                "/auth/login",
+                timeout="auth",
                 json={"email": email, "password": password},
             )
             return (
@@ -22,8 +99,9 @@ class APIClient:
 
     def register(self, email, password, full_name):
         try:
-            response = requests.post(
-                f"{self.base_url}/auth/register",
+            response = self._post(
+                "/auth/register",
+                timeout="auth",
                 json={"email": email, "password": password, "full_name": full_name},
             )
             return (
@@ -38,7 +116,7 @@ class APIClient:
     def get_watchlist(self, user_id):
         """Fetch the user's watchlist/portfolio."""
         try:
-            response = requests.get(f"{self.base_url}/stocks/watchlist/{user_id}")
+            response = self._get(f"/stocks/watchlist/{user_id}")
             if response.status_code == 200:
                 return response.json()
             return {"status": "error", "data": []}
@@ -46,26 +124,74 @@ class APIClient:
             print(f"API Error (Watchlist): {e}")
             return {"status": "error", "data": []}
 
+    def get_portfolio_valuation(self, user_id):
+        """Positions valued on the server (live price, P&L, totals, sectors)."""
+        try:
+            response = self._get(
+                f"/stocks/portfolio/{user_id}/valuation", timeout="quote"
+            )
+            if response.status_code == 200:
+                return response.json()
+            return {"status": "error", "positions": []}
+        except Exception as e:
+            print(f"API Error (Valuation): {e}")
+            return {"status": "error", "positions": []}
+
     # --- Stocks Data ---
-    def get_stock_history(self, symbol):
+    def get_stock_history(self, symbol, **params):
+        """
+        params: optional period / start / end / interval query parameters, plus
+        max_points / downsample to have the server reduce the series.
+        """
         try:
-            response = requests.get(f"{self.base_url}/stocks/history/{symbol}")
+            response = self._get(
+                f"/stocks/history/{symbol}", timeout="history", params=params or None
+            )
             return response.json() if response.status_code == 200 else None
         except Exception as e:
             print(f"API Error (History): {e}")
             return None
 
+    def search_symbols(self, query, limit=8):
+        """Ticker / company-name autocomplete."""
+        try:
+            response = self._get(
+                "/stocks/search", timeout="quote", params={"q": query, "limit": limit}
+            )
+            return response.json().get("results", []) if response.status_code == 200 else []
+        except Exception as e:
+            print(f"API Error (Search): {e}")
+            return []
+
     def get_live_quote(self, symbol):
         try:
-            response = requests.get(f"{self.base_url}/stocks/quote/{symbol}")
+            response = self._get(f"/stocks/quote/{symbol}", timeout="quote")
             return response.json() if response.status_code == 200 else None
         except Exception as e:
             print(f"API Error (Quote): {e}")
             return None
 
+    def get_live_quotes(self, symbols):
+        """Batched quotes -> {"quotes": {SYMBOL: quote}, "missing": [...]}."""
+        symbols = [s for s in symbols if s]
+        if not symbols:
+            return {"quotes": {}, "missing": []}
+        try:
+            response = self._get(
+                "/stocks/quotes",
+                timeout="quote",
+                params={"symbols": ",".join(symbols)},
+            )
+            if response.status_code == 200:
+                return response.json()
+            return {"quotes": {}, "missing": symbols}
+        except Exception as e:
+            print(f"API Error (Quotes): {e}")
+            return {"quotes": {}, "missing": symbols}
+
     def get_popular_stocks(self):
         try:
-            response = requests.get(f"{self.base_url}/stocks/popular")
+            response = self._get("/stocks/popular", timeout="quote")
             return response.json() if response.status_code == 200 else {"stocks": []}
         except Exception as e:
             print(f"API Error (Popular): {e}")
@@ -77,9 +203,8 @@ class APIClient:
         lang: 'en' (default) or 'he' to translate to Hebrew on the server side.
         """
         try:
-            url = f"{self.base_url}/stocks/news/{symbol}"
             params = {"lang": lang} if lang else None
-            response = requests.get(url, params=params)
+            response = self._get(f"/stocks/news/{symbol}", timeout="news", params=params)
             if response.status_code == 200:
                 return response.json()
             return {"symbol": symbol.upper(), "news": []}
@@ -87,10 +212,25 @@ class APIClient:
             print(f"API Error (News): {e}")
             return {"symbol": symbol.upper(), "news": []}
 
+    def get_news_feed(self, symbols, limit=30):
+        """One importance-ranked news feed for several symbols (e.g. the portfolio)."""
+        try:
+            response = self._get(
+                "/stocks/news",
+                timeout="news",
+                params={"symbols": ",".join(symbols), "limit": limit},
+            )
+            if response.status_code == 200:
+                return response.json().get("news", [])
+            return []
+        except Exception as e:
+            print(f"API Error (News feed): {e}")
+            return []
+
     # --- AI Features ---
     def get_ai_analysis(self, symbol):
         try:
-            response = requests.get(f"{self.base_url}/stocks/analyze/{symbol}")
+            response = self._get(f"/stocks/analyze/{symbol}", timeout="ai")
             return (
                 response.json()
                 if response.status_code == 200
@@ -99,12 +239,58 @@ class APIClient:
         except Exception as e:
             return {"analysis": f"Connection error: {e}"}
 
+    def stream_investment_plan(self, data):
+        """
+        Streaming investment plan (Server-Sent Events). Yields plan_chunk
+        events with the plan text as it is written, then extracting / final.
+        """
+        response = self._post(
+            "/stocks/ai-investment-plan/stream",
+            timeout="ai",
+            json=data,
+            headers={"Accept": "text/event-stream", "Accept-Encoding": "identity"},
+            stream=True,
+        )
+        with response:
+            if response.status_code != 200:
+                raise Exception(f"Server returned {response.status_code}")
+            yield from _iter_sse(response)
+
+    def agent_chat(self, message, user_id):
+        """Send a chat message to the agent; raises on server/connection errors."""
+        response = self._post(
+            "/stocks/agent/chat",
+            timeout="ai",
+            json={"message": message, "user_id": user_id},
+        )
+        if response.status_code == 200:
+            return response.json()
+        raise Exception(f"Server returned {response.status_code}")
+
+    def stream_agent_chat(self, message, user_id):
+        """
+        Streaming agent chat (Server-Sent Events). Yields event dicts as they
+        arrive: tool_start / tool_end / token, then final (or error).
+        """
+        response = self._post(
+            "/stocks/agent/chat/stream",
+            timeout="ai",
+            json={"message": message, "user_id": user_id},
+            # Uncompressed so each event can be read as soon as it is sent
+            headers={"Accept": "text/event-stream", "Accept-Encoding": "identity"},
+            stream=True,
+        )
+        with response:
+            if response.status_code != 200:
+                raise Exception(f"Server returned {response.status_code}")
+            yield from _iter_sse(response)
+
     # --- Trade & Payments ---
     def get_saved_cards(self, user_id):
         """Fetch saved cards (updated endpoint)."""
         try:
             # Updated to /trade/cards/
-            response = requests.get(f"{self.base_url}/trade/cards/{user_id}")
+            response = self._get(f"/trade/cards/{user_id}")
             if response.status_code == 200:
                 return response.json()
             return {"status": "error", "data": None}
@@ -116,10 +302,16 @@ class APIClient:
         """Generic function to execute a buy/sell trade."""
         try:
             # mode = 'buy' or 'sell'
-            response = requests.post(
-                f"{self.base_url}/trade/{mode}", json=data, timeout=10
-            )
+            response = self._post(f"/trade/{mode}", timeout="trade", json=data)
             return response
         except Exception as e:
             print(f"API Error (Trade): {e}")
             raise e
+
+    def post_trade_batch(self, data):
+        """Execute a basket of buys (orders + one payment context) in one request."""
+        try:
+            return self._post("/trade/batch", timeout="trade", json=data)
+        except Exception as e:
+            print(f"API Error (Batch Trade): {e}")
+            raise e
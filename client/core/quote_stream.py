@@ -0,0 +1,99 @@
+import json
+
+from PySide6.QtCore import QObject, QTimer, QUrl, Signal
+from PySide6.QtNetwork import QAbstractSocket
+from PySide6.QtWebSockets import QWebSocket
+
+RECONNECT_MS = 3000
+
+
+class QuoteStream(QObject):
+    """
+    Live prices pushed from the server's /ws/quotes endpoint.
+
+    One WebSocket is shared by the whole app (see `instance()`); each screen
+    adds/removes the symbols it shows and listens to `quote_received`.
+    Reconnects automatically and re-subscribes after a drop.
+    """
+
+    quote_received = Signal(dict)
+
+    _instance = None
+
+    def __init__(self, base_url="ws://127.0.0.1:8000"):
+        super().__init__()
+        self.url = QUrl(f"{base_url}/ws/quotes")
+        self.symbols = set()
+        self._stopped = False
+
+        self.socket = QWebSocket()
+        self.socket.connected.connect(self._on_connected)
+        self.socket.disconnected.connect(self._on_disconnected)
+        self.socket.textMessageReceived.connect(self._on_message)
+
+        self._reconnect_timer = QTimer(self)
+        self._reconnect_timer.setSingleShot(True)
+        self._reconnect_timer.timeout.connect(self._open)
+
+    @classmethod
+    def instance(cls):
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    # --- Subscriptions ---
+
+    def subscribe(self, symbols):
+        new = {s.upper() for s in symbols if s} - self.symbols
+        if not new:
+            return
+        self.symbols |= new
+        if self._is_open():
+            self._send("subscribe", sorted(new))
+        else:
+            self._open()
+
+    def unsubscribe(self, symbols):
+        gone = {s.upper() for s in symbols if s} & self.symbols
+        if not gone:
+            return
+        self.symbols -= gone
+        if self._is_open():
+            self._send("unsubscribe", sorted(gone))
+
+    def close(self):
+        self._stopped = True
+        self._reconnect_timer.stop()
+        self.socket.close()
+
+    # --- Socket handling ---
+
+    def _is_open(self):
+        return self.socket.isValid()
+
+    def _open(self):
+        self._stopped = False
+        if self.socket.state() == QAbstractSocket.SocketState.UnconnectedState:
+            self.socket.open(self.url)
+
+    def _send(self, action, symbols):
+        self.socket.sendTextMessage(json.dumps({"action": action, "symbols": symbols}))
+
+    def _on_connected(self):
+        print("📡 Quote stream connected")
+        if self.symbols:
+            self._send("subscribe", sorted(self.symbols))
+
+    def _on_disconnected(self):
+        if not self._stopped and self.symbols:
+            self._reconnect_timer.start(RECONNECT_MS)
+
+    def _on_message(self, text):
+        try:
+            message = json.loads(text)
+        except ValueError:
+            return
+        if message.get("type") == "quote":
+            self.quote_received.emit(message)
+        elif message.get("type") == "error":
+            print(f"⚠️ Quote stream: {message.get('detail')}")
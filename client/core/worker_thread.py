@@ -22,3 +22,28 @@ class WorkerThread(QThread):
             self.finished.emit(result)
         except Exception as e:
             self.error.emit(str(e))
+
+
+class StreamWorkerThread(QThread):
+    """
+    Runs a generator function in the background and emits each item it
+    yields (e.g. streamed server events) as soon as it arrives.
+    """
+
+    item = Signal(object)
+    finished = Signal()
+    error = Signal(str)
+
+    def __init__(self, func, *args, **kwargs):
+        super().__init__()
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+
+    def run(self):
+        try:
+            for item in self.func(*self.args, **self.kwargs):
+                self.item.emit(item)
+            self.finished.emit()
+        except Exception as e:
+            self.error.emit(str(e))
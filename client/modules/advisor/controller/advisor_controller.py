@@ -5,7 +5,7 @@ from PySide6.QtCore import Qt
 from client.modules.advisor.view.advisor_view import AdvisorView
 from client.modules.advisor.models.advisor_module import AdvisorModel
 from client.core.api_client import APIClient
-from client.core.worker_thread import WorkerThread
+from client.core.worker_thread import StreamWorkerThread
 
 
 class AdvisorController:
@@ -14,6 +14,7 @@ class AdvisorController:
         self.view = AdvisorView()
         self.api = APIClient()
         self.worker = None
+        self._stream_done = True
 
         self.setup_connections()
 
@@ -30,40 +31,54 @@ class AdvisorController:
 
         user_id = self.app.current_user.id
 
-        # Run the worker in the background
-        self.worker = WorkerThread(self._chat_task, text, user_id)
-        self.worker.finished.connect(self.on_ai_response)
+        # Stream the reply: progress and tokens are shown as they arrive
+        self.view.begin_stream_message("AI")
+        self._stream_done = False
+        self.worker = StreamWorkerThread(self._chat_task, text, user_id)
+        self.worker.item.connect(self.on_stream_event)
+        self.worker.finished.connect(self.on_stream_finished)
         self.worker.error.connect(self.on_error)
         self.worker.start()
 
     # --- Background function (Worker) ---
     def _chat_task(self, text, user_id):
-        """Send the message to the server and return an AdvisorModel object."""
-        # Agent API endpoint
-        url = "http://127.0.0.1:8000/stocks/agent/chat"
-
+        """Yield streamed server events for the message."""
         try:
-            # Send request to server
-            response = requests.post(
-                url, json={"message": text, "user_id": user_id}, timeout=120
-            )
-
-            if response.status_code == 200:
-                return AdvisorModel.from_json(response.json())
-            else:
-                raise Exception(f"Server returned {response.status_code}")
+            yield from self.api.stream_agent_chat(text, user_id)
 
         except requests.exceptions.Timeout:
             raise Exception("The AI is taking too long to think. Please try again.")
         except Exception as e:
             raise Exception(f"Communication Error: {str(e)}")
 
+    def on_stream_event(self, event):
+        event_type = event.get("type")
+        if event_type == "tool_start":
+            self.view.set_stream_status(f"🔧 Using {event.get('tool')}...")
+        elif event_type == "tool_end":
+            self.view.set_stream_status("🤔 Thinking...")
+        elif event_type == "token":
+            self.view.append_stream_text(event.get("text", ""))
+        elif event_type == "final":
+            self.on_ai_response(AdvisorModel.from_json(event.get("response", {})))
+        elif event_type == "error":
+            self.on_error(event.get("detail", "Unknown server error"))
+
+    def on_stream_finished(self):
+        """The stream closed; close the draft if no final/error event came."""
+        if self._stream_done:
+            return
+        self._stream_done = True
+        # Keep whatever text was streamed
+        self.view.end_stream_message(fallback="⚠️ No answer.")
+
     # --- Response handler (the controller's brain) ---
     def on_ai_response(self, advisor_model: AdvisorModel):
         """Receive the processed model and decide what to do in the GUI."""
+        self._stream_done = True
 
-        # 1. Always display the AI message text
-        self.view.add_message("AI", advisor_model.message, Qt.AlignLeft)
+        # 1. Always display the AI message text (replaces the streamed draft)
+        self.view.end_stream_message(advisor_model.message)
 
         # 2. Check: did the agent request opening a form?
         if advisor_model.is_form():
@@ -147,6 +162,8 @@ class AdvisorController:
                 )
 
     def on_error(self, error_msg):
+        self._stream_done = True
+        self.view.end_stream_message("⚠️ No answer.")
         self.view.add_message("System", f"Error: {error_msg}", Qt.AlignLeft)
 
     def setup_connections(self):
@@ -131,3 +131,36 @@ class AdvisorView(QWidget):
 
         self.chat_history.addItem(item)
         self.chat_history.scrollToBottom()
+
+    # --- Streaming replies ---
+
+    def begin_stream_message(self, sender="AI"):
+        """Add an empty message that is filled in as tokens arrive."""
+        self._stream_sender = sender
+        self._stream_text = ""
+        self._stream_item = QListWidgetItem(f"{sender}: ⏳ Thinking...")
+        self._stream_item.setTextAlignment(Qt.AlignLeft)
+        self._stream_item.setForeground(Qt.cyan)
+        self.chat_history.addItem(self._stream_item)
+        self.chat_history.scrollToBottom()
+
+    def set_stream_status(self, status):
+        """Progress line (e.g. tool calls) shown until the first token."""
+        if getattr(self, "_stream_item", None) and not self._stream_text:
+            self._stream_item.setText(f"{self._stream_sender}: {status}")
+
+    def append_stream_text(self, text):
+        if not getattr(self, "_stream_item", None):
+            self.begin_stream_message()
+        self._stream_text += text
+        self._stream_item.setText(f"{self._stream_sender}: {self._stream_text}")
+        self.chat_history.scrollToBottom()
+
+    def end_stream_message(self, final_text=None, fallback=""):
+        """Replace the streamed text with the final message and close it."""
+        if getattr(self, "_stream_item", None):
+            text = final_text if final_text is not None else (self._stream_text or fallback)
+            self._stream_item.setText(f"{self._stream_sender}: {text}")
+            self.chat_history.scrollToBottom()
+        self._stream_item = None
+        self._stream_text = ""
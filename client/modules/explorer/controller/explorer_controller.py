@@ -3,8 +3,13 @@ from PySide6.QtWidgets import QMessageBox
 from client.modules.explorer.view.explorer_view import ExplorerView
 from client.core.api_client import APIClient
 from client.core.worker_thread import WorkerThread
-from PySide6.QtCore import Qt
-import requests
+from client.core.quote_stream import QuoteStream
+from PySide6.QtCore import Qt, QTimer
+
+# Points requested for the price chart; the server downsamples longer series
+CHART_MAX_POINTS = 500
+# Wait for a pause in typing before asking the server for suggestions
+SUGGEST_DEBOUNCE_MS = 250
 
 
 class ExplorerController:
@@ -17,12 +22,25 @@ class ExplorerController:
         self.search_worker = None
         self.ai_worker = None
         self.browse_worker = None
+        self.suggest_worker = None
+
+        self.suggest_timer = QTimer()
+        self.suggest_timer.setSingleShot(True)
+        self.suggest_timer.setInterval(SUGGEST_DEBOUNCE_MS)
+        self.suggest_timer.timeout.connect(self.request_suggestions)
+
+        # Live price for the stock on screen (shared WebSocket)
+        self.quote_stream = QuoteStream.instance()
+        self.quote_stream.quote_received.connect(self.on_live_quote)
+        self.streamed_symbol = None
 
         self.setup_connections()
 
     def setup_connections(self):
         # Wire up the remaining buttons
         self.view.search_btn.clicked.connect(self.handle_search)
+        self.view.symbol_input.textEdited.connect(self.on_symbol_edited)
+        self.view.symbol_completer.activated.connect(self.on_suggestion_chosen)
         self.view.back_btn.clicked.connect(self.handle_back)
         self.view.trade_btn.clicked.connect(self.open_trade_window)
         self.view.browse_btn.clicked.connect(self.show_popular_stocks)
@@ -32,7 +50,13 @@ class ExplorerController:
 
     def _search_task(self, symbol):
         quote = self.api.get_live_quote(symbol)
-        history = self.api.get_stock_history(symbol)
+        if not quote:
+            # Maybe a company name ("tesla"): use the best index match
+            matches = self.api.search_symbols(symbol, limit=1)
+            if matches:
+                symbol = matches[0]["symbol"]
+                quote = self.api.get_live_quote(symbol)
+        history = self.api.get_stock_history(symbol, max_points=CHART_MAX_POINTS)
         # Fetch standard news (ranked on the server) without a language parameter
         news_data = self.api.get_stock_news(symbol)
         # Bonus: automatic AI analysis (if you want it later) - currently not enabled
@@ -44,9 +68,44 @@ class ExplorerController:
             "analysis": ai_analysis,
         }
 
+    def _suggest_task(self, query):
+        return {"query": query, "results": self.api.search_symbols(query)}
+
     def _browse_task(self):
         return self.api.get_popular_stocks()
 
+    # --- Autocomplete ---
+
+    def on_symbol_edited(self, text):
+        if len(text.strip()) >= 1:
+            self.suggest_timer.start()  # Restarts the debounce window
+        else:
+            self.suggest_timer.stop()
+
+    def request_suggestions(self):
+        query = self.view.symbol_input.text().strip()
+        if not query:
+            return
+        if self.suggest_worker is not None and self.suggest_worker.isRunning():
+            # Try again once the in-flight request is done
+            self.suggest_timer.start()
+            return
+        self.suggest_worker = WorkerThread(self._suggest_task, query)
+        self.suggest_worker.finished.connect(self.on_suggestions_ready)
+        self.suggest_worker.start()
+
+    def on_suggestions_ready(self, data):
+        # Ignore answers for text the user has already changed
+        if data["query"] != self.view.symbol_input.text().strip():
+            return
+        self.view.show_suggestions(data["results"])
+
+    def on_suggestion_chosen(self, text):
+        symbol = text.split(" — ")[0].strip()
+        self.suggest_timer.stop()
+        self.view.symbol_input.setText(symbol)
+        self.handle_search()
+
     def handle_search(self):
         symbol = self.view.symbol_input.text().upper().strip()
         if not symbol:
@@ -71,11 +130,17 @@ class ExplorerController:
                 f"Stock: {quote['symbol']} | Price: ${quote['price']}"
             )
             self.view.trade_btn.setEnabled(True)
+            self.watch_live_price(quote["symbol"])
 
             history = data.get("history")
             if history:
                 prices = history.get("prices", [])
-                formatted_data = [{"price": p} for p in prices]
+                # x keeps the original bar position so a downsampled series
+                # spans the same range as the full one
+                indices = history.get("indices") or range(len(prices))
+                formatted_data = [
+                    {"x": x, "price": p} for x, p in zip(indices, prices)
+                ]
                 self.view.plot_chart(quote["symbol"], formatted_data)
 
             news_res = data.get("news", {})
@@ -92,6 +157,22 @@ class ExplorerController:
             self.view.info_label.setText("Stock not found.")
             self.view.trade_btn.setEnabled(False)
 
+    def watch_live_price(self, symbol):
+        """Stream only the symbol currently shown."""
+        if symbol == self.streamed_symbol:
+            return
+        if self.streamed_symbol:
+            self.quote_stream.unsubscribe([self.streamed_symbol])
+        self.streamed_symbol = symbol
+        self.quote_stream.subscribe([symbol])
+
+    def on_live_quote(self, quote):
+        if quote.get("symbol") != self.streamed_symbol:
+            return
+        self.view.info_label.setText(
+            f"Stock: {quote['symbol']} | Price: ${quote['price']} 🔴 Live"
+        )
+
     def show_popular_stocks(self):
         self.view.info_label.setText("⏳ Loading popular stocks...")
         self.view.browse_btn.setEnabled(False)
@@ -170,6 +251,9 @@ class ExplorerController:
         self.handle_search()
 
     def handle_back(self):
+        if self.streamed_symbol:
+            self.quote_stream.unsubscribe([self.streamed_symbol])
+            self.streamed_symbol = None
         if hasattr(self.app, "navigate_to_portfolio"):
             self.app.navigate_to_portfolio()
 
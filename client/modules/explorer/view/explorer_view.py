@@ -8,9 +8,10 @@ from PySide6.QtWidgets import (
     QListWidget,
     QListWidgetItem,
     QAbstractItemView,
+    QCompleter,
 )
 from PySide6.QtCharts import QChart, QChartView, QLineSeries
-from PySide6.QtCore import Qt
+from PySide6.QtCore import Qt, QPointF, QStringListModel
 from PySide6.QtGui import QPainter
 
 
@@ -33,11 +34,17 @@ class ExplorerView(QWidget):
         # --- Search Bar (search field + search button only) ---
         search_layout = QHBoxLayout()
         self.symbol_input = QLineEdit()
-        self.symbol_input.setPlaceholderText("Enter Symbol (e.g. NVDA, TSLA)")
+        self.symbol_input.setPlaceholderText("Enter Symbol or company (e.g. NVDA, Tesla)")
         self.symbol_input.setStyleSheet(
             "padding: 8px; border-radius: 5px; color: white; background: #313244;"
         )
 
+        # Autocomplete suggestions come from the server (already ranked)
+        self.completer_model = QStringListModel()
+        self.symbol_completer = QCompleter(self.completer_model, self)
+        self.symbol_completer.setCompletionMode(QCompleter.UnfilteredPopupCompletion)
+        self.symbol_input.setCompleter(self.symbol_completer)
+
         self.search_btn = QPushButton("Search & Analyze 🔍")
         self.search_btn.setStyleSheet(
             "background-color: #89b4fa; color: #1e1e2e; padding: 8px; font-weight: bold;"
@@ -172,14 +179,24 @@ class ExplorerView(QWidget):
             list_item.setToolTip(item.get("url", ""))
             self.news_list.addItem(list_item)
 
+    def show_suggestions(self, results: list[dict]):
+        """Fill the autocomplete popup with "SYMBOL — Company" entries."""
+        self.completer_model.setStringList(
+            [f"{item['symbol']} — {item.get('name', '')}" for item in results]
+        )
+        if results and self.symbol_input.hasFocus():
+            self.symbol_completer.complete()
+
     def plot_chart(self, symbol, data):
         if not data:
             return
 
         series = QLineSeries()
         series.setName(f"{symbol} Trend")
-        for i, point in enumerate(data):
-            series.append(i, point["price"])
+        # One bulk replace instead of a repaint-triggering append per point
+        series.replace(
+            [QPointF(point.get("x", i), point["price"]) for i, point in enumerate(data)]
+        )
 
         chart = QChart()
         chart.addSeries(series)
@@ -1,3 +1,5 @@
+import webbrowser
+
 from PySide6.QtWidgets import (
     QWidget,
     QVBoxLayout,
@@ -7,16 +9,16 @@ from PySide6.QtWidgets import (
     QPushButton,
     QHBoxLayout,
 )
-from PySide6.QtGui import QColor
+from PySide6.QtGui import QColor, QTextCursor
 from PySide6.QtCore import Qt
-import requests
 
 # Import views
 from client.modules.portfolio.view.dashboard_view import DashboardView
 from client.modules.portfolio.view.investment_view import InvestmentView
 from client.modules.trade.controller.trade_controller import TradeController
 from client.core.api_client import APIClient
-from client.core.worker_thread import WorkerThread  # <--- added the worker engine!
+from client.core.worker_thread import StreamWorkerThread, WorkerThread  # <--- added the worker engine!
+from client.core.quote_stream import QuoteStream
 from client.modules.trade.view.basket_view import BasketView
 from client.modules.trade.controller.basket_controller import BasketController
 
@@ -30,9 +32,15 @@ class PortfolioController(QWidget):
         self.app = app_controller
         self.api = APIClient()
         self.stocks_data = {}  # Store stock data
+        self.symbol_rows = {}  # symbol -> [(row, event_id)] for live updates
+
+        # Live prices pushed by the server (shared WebSocket)
+        self.quote_stream = QuoteStream.instance()
+        self.quote_stream.quote_received.connect(self.on_live_quote)
 
         # Worker thread references
         self.watchlist_worker = None
+        self.news_worker = None
         self.ai_worker = None
 
         # Main layout
@@ -73,6 +81,9 @@ class PortfolioController(QWidget):
         if hasattr(self.dashboard_view, "explorer_btn"):
             self.dashboard_view.explorer_btn.clicked.connect(self.open_explorer)
 
+        # Double-click a portfolio news item to open it
+        self.dashboard_view.news_list.itemDoubleClicked.connect(self.open_news_link)
+
     def open_advisor_chat(self):
         """Ask the main application to navigate to the chat screen."""
         print("🔀 Switching to AI Chat Module...")
@@ -90,69 +101,29 @@ class PortfolioController(QWidget):
     # --- Background tasks ---
 
     def _ai_task(self, data):
-        """Send the recommendation request to the server in the background."""
-        # You can use requests directly or via api_client if you extend it
-        response = requests.post(
-            f"http://127.0.0.1:8000/stocks/ai-investment-plan",
-            json=data,
-            timeout=120,
-        )
-        if response.status_code == 200:
-            return response.json().get("recommendation", "No recommendation available")
-        else:
-            raise Exception(response.json().get("detail", "Unknown server error"))
+        """Stream the recommendation from the server in the background."""
+        yield from self.api.stream_investment_plan(data)
 
     def _watchlist_task(self, user_id):
-        """Load the portfolio and compute data in the background (the heavy part)."""
-        url = f"http://127.0.0.1:8000/stocks/watchlist/{user_id}"
-        response = requests.get(url, timeout=10)
+        """Load the portfolio, valued on the server in a single request."""
+        valuation = self.api.get_portfolio_valuation(user_id)
 
-        if response.status_code != 200:
-            return []
-
-        data = response.json().get("data", [])
         stocks_processed = []
-
-        for item in data:
-            symbol = item.get("symbol")
-            avg_buy_price = item.get("price", 0)
-
-            # Fetch live price (takes time, so it must run in the background)
-            current_market_price = self._get_current_price_sync(symbol)
-            if current_market_price == 0:
-                current_market_price = avg_buy_price
-
-            # Compute percentage change
-            change_percent = 0
-            if avg_buy_price > 0:
-                change_percent = (
-                    (current_market_price - avg_buy_price) / avg_buy_price
-                ) * 100
-
+        for position in valuation.get("positions", []):
             stocks_processed.append(
                 {
-                    "event_id": item.get("id"),
-                    "symbol": symbol,
-                    "price": current_market_price,
-                    "buy_price": avg_buy_price,
-                    "sector": item.get("sector", "Unknown"),
-                    "change_percent": round(change_percent, 2),
-                    "amount": item.get("amount", 0),
+                    "event_id": position.get("event_id"),
+                    "symbol": position.get("symbol"),
+                    "price": position.get("price", 0),
+                    "buy_price": position.get("buy_price", 0),
+                    "sector": position.get("sector", "Unknown"),
+                    "change_percent": position.get("change_percent", 0),
+                    "amount": position.get("amount", 0),
                 }
             )
 
         return stocks_processed
 
-    def _get_current_price_sync(self, symbol):
-        """Synchronous helper function for use inside the worker thread."""
-        try:
-            quote = self.api.get_live_quote(symbol)
-            if quote and "price" in quote:
-                return quote.get("price")
-            return 0
-        except:
-            return 0
-
     # --- UI handlers ---
 
     def handle_ai_recommendation(self):
@@ -180,13 +151,49 @@ class PortfolioController(QWidget):
             "🔄 Processing your plan... (You can move the window!)"
         )
 
-        # Start worker
-        self.ai_worker = WorkerThread(self._ai_task, data)
-        self.ai_worker.finished.connect(self.on_ai_success)
+        # Start worker (the plan text is shown while it is being written)
+        self._plan_started = False
+        self._plan_done = False
+        self.investment_view.execute_btn.hide()
+        self.ai_worker = StreamWorkerThread(self._ai_task, data)
+        self.ai_worker.item.connect(self.on_ai_event)
+        self.ai_worker.finished.connect(self.on_ai_finished)
         self.ai_worker.error.connect(self.on_ai_error)
         self.ai_worker.start()
 
+    def on_ai_event(self, event):
+        event_type = event.get("type")
+        box = self.investment_view.ai_response_box
+        if event_type == "plan_chunk":
+            if not self._plan_started:
+                self._plan_started = True
+                box.clear()
+            cursor = box.textCursor()
+            cursor.movePosition(QTextCursor.End)
+            cursor.insertText(event.get("text", ""))
+            box.setTextCursor(cursor)
+            box.ensureCursorVisible()
+        elif event_type == "extracting":
+            self.investment_view.submit_btn.setText("🧺 Building your basket...")
+        elif event_type == "final":
+            self.on_ai_success(event.get("recommendation", {}))
+        elif event_type == "error":
+            self.on_ai_error(event.get("detail", "Unknown server error"))
+
+    def on_ai_finished(self):
+        """The stream closed; give the form back if no final/error event came."""
+        if self._plan_done:
+            return
+        if self._plan_started:
+            # Keep the streamed plan text, just end the busy state
+            self._plan_done = True
+            self.investment_view.submit_btn.setEnabled(True)
+            self.investment_view.submit_btn.setText("Generate AI Recommendation 🚀")
+        else:
+            self.on_ai_error("The server closed the connection before the plan was ready.")
+
     def on_ai_success(self, recommendation):
+        self._plan_done = True
         # Safe check: hide the loading indicator only if it exists in the UI
         if hasattr(self.investment_view, "loading_label"):
             self.investment_view.loading_label.hide()
@@ -211,6 +218,7 @@ class PortfolioController(QWidget):
         self.investment_view.submit_btn.setText("Generate AI Recommendation 🚀")
 
     def on_ai_error(self, error_msg):
+        self._plan_done = True
         self.investment_view.submit_btn.setEnabled(True)
         self.investment_view.submit_btn.setText("Generate AI Recommendation 🚀")
         self.investment_view.ai_response_box.setText(f"❌ Error: {error_msg}")
@@ -246,6 +254,8 @@ class PortfolioController(QWidget):
         """Display data in the table (runs in the main thread after computation completes)."""
         self.dashboard_view.stock_table.setRowCount(len(stocks))
         self.stocks_data = {}
+        previous_symbols = set(self.symbol_rows)
+        self.symbol_rows = {}
 
         for row, stock in enumerate(stocks):
             # ... (your excellent display code) ...
@@ -254,6 +264,8 @@ class PortfolioController(QWidget):
             current_price = stock["price"]
             change_percent = stock["change_percent"]
 
+            self.symbol_rows.setdefault(symbol.upper(), []).append((row, event_id))
+
             # Save data for selling
             self.stocks_data[event_id] = {
                 "symbol": symbol,
@@ -321,6 +333,59 @@ class PortfolioController(QWidget):
             action_layout.addWidget(sell_btn)
             self.dashboard_view.stock_table.setCellWidget(row, 6, action_widget)
 
+        # Keep the live price subscription in sync with the table
+        self.quote_stream.unsubscribe(previous_symbols - set(self.symbol_rows))
+        self.quote_stream.subscribe(self.symbol_rows.keys())
+
+        self.load_news_feed()
+
+    def load_news_feed(self):
+        """Fetch one ranked news feed for every symbol in the portfolio."""
+        symbols = sorted(self.symbol_rows)
+        if not symbols:
+            self.dashboard_view.show_news_feed([])
+            return
+        self.news_worker = WorkerThread(self.api.get_news_feed, symbols)
+        self.news_worker.finished.connect(self.dashboard_view.show_news_feed)
+        self.news_worker.start()
+
+    def open_news_link(self, item):
+        url = item.toolTip()
+        if url:
+            webbrowser.open(url)
+
+    def on_live_quote(self, quote):
+        """Update price / change cells in place when the server pushes a price."""
+        rows = self.symbol_rows.get(quote.get("symbol"), [])
+        price = quote.get("price")
+        if not rows or price is None:
+            return
+
+        table = self.dashboard_view.stock_table
+        for row, event_id in rows:
+            stock = self.stocks_data.get(event_id)
+            if stock is None:
+                continue
+            stock["current_price"] = price
+
+            buy_price = stock["buy_price"]
+            change_percent = (price - buy_price) / buy_price * 100 if buy_price > 0 else 0.0
+            if change_percent > 0:
+                color = QColor("#a6e3a1")
+            elif change_percent < 0:
+                color = QColor("#f38ba8")
+            else:
+                color = QColor("#cdd6f4")
+
+            price_item = QTableWidgetItem(f"${price:.2f}")
+            price_item.setForeground(color)
+            table.setItem(row, 2, price_item)
+
+            change_text = f"{change_percent:+.2f}%" if change_percent != 0 else "0.00%"
+            change_item = QTableWidgetItem(change_text)
+            change_item.setForeground(color)
+            table.setItem(row, 5, change_item)
+
     def handle_logout(self):
         if hasattr(self.app, "logout"):
             self.app.logout()
@@ -7,6 +7,8 @@ from PySide6.QtWidgets import (
     QPushButton,
     QLabel,
     QHeaderView,
+    QListWidget,
+    QListWidgetItem,
 )
 from PySide6.QtCore import Qt
 
@@ -74,7 +76,32 @@ class DashboardView(QWidget):
             "background-color: #313244; gridline-color: #45475a;"
         )
         self.stock_table.setEditTriggers(QTableWidget.NoEditTriggers)
-        main_content.addWidget(self.stock_table)
+        main_content.addWidget(self.stock_table, 3)
+
+        # Portfolio news feed (all holdings, ranked by importance)
+        self.news_header = QLabel("Portfolio News 📰")
+        self.news_header.setStyleSheet("font-size: 16px; font-weight: bold; margin-top: 8px;")
+        main_content.addWidget(self.news_header)
+
+        self.news_list = QListWidget()
+        self.news_list.setWordWrap(True)
+        self.news_list.setStyleSheet("background-color: #313244;")
+        main_content.addWidget(self.news_list, 2)
 
         layout.addLayout(main_content, 3)
         self.setLayout(layout)
+
+    def show_news_feed(self, news_items: list[dict]):
+        self.news_list.clear()
+        if not news_items:
+            self.news_header.setText("Portfolio News 📰 – No recent news")
+            return
+
+        self.news_header.setText(f"Portfolio News 📰 ({len(news_items)} items)")
+        for item in news_items:
+            score = item.get("importance_score", 0)
+            marker = "🔥" if score >= 0.7 else "•"
+            text = f"{marker} [{item.get('symbol', '')}] {item.get('title', '')}"
+            list_item = QListWidgetItem(text)
+            list_item.setToolTip(item.get("url") or "")
+            self.news_list.addItem(list_item)
@@ -1,4 +1,3 @@
-import requests
 from PySide6.QtCore import QObject
 from PySide6.QtWidgets import (
     QTableWidgetItem,
@@ -9,6 +8,7 @@ from PySide6.QtWidgets import (
 )
 from client.modules.trade.view.trade_view import TradeView
 from client.modules.trade.models.trade_model import TradeModel
+from client.core.api_client import APIClient
 
 
 class BasketCheckoutDialog(QDialog):
@@ -52,6 +52,7 @@ class BasketController(QObject):
         super().__init__()
         self.app = app
         self.view = view
+        self.api = APIClient()
         self.basket_data = basket_data
         self.total_budget = float(total_budget)
         self.rows_data = []  # Store row data for real-time calculations
@@ -68,6 +69,9 @@ class BasketController(QObject):
         self.view.table.setRowCount(0)
         self.rows_data.clear()
 
+        # Fetch real-time prices for the whole basket in one request
+        prices = self.fetch_prices([item.get("symbol") for item in self.basket_data])
+
         for item in self.basket_data:
             symbol = item.get("symbol")
             percentage = item.get("percentage", 0)
@@ -75,8 +79,7 @@ class BasketController(QObject):
             if not symbol or percentage <= 0:
                 continue
 
-            # Fetch real-time price from our server
-            price = self.fetch_price(symbol)
+            price = prices.get(symbol.upper(), 0.0)
             if price <= 0:
                 continue
 
@@ -118,15 +121,10 @@ class BasketController(QObject):
         # Initial totals calculation
         self.update_totals()
 
-    def fetch_price(self, symbol):
-        """Quick call to the server to fetch the latest price."""
-        try:
-            response = requests.get(f"http://127.0.0.1:8000/stocks/quote/{symbol}")
-            if response.status_code == 200:
-                return response.json().get("price", 0.0)
-        except Exception as e:
-            print(f"Error fetching price for {symbol}: {e}")
-        return 0.0
+    def fetch_prices(self, symbols):
+        """Batched call to the server: {SYMBOL: price} for every symbol found."""
+        quotes = self.api.get_live_quotes(symbols).get("quotes", {})
+        return {sym: q.get("price", 0.0) for sym, q in quotes.items()}
 
     def update_totals(self):
         """Recalculate all row totals and the final total."""
@@ -192,41 +190,36 @@ class BasketController(QObject):
             print("❌ Checkout cancelled by user.")
             return
 
-        # --- Step 3: execute buys against the server with the real data ---
-        success_count = 0
-        for trade in trades_to_execute:
-            print(
-                f"🚀 Sending Buy Order via Model: {trade['amount']} of {trade['symbol']}..."
-            )
-            real_sector = trade_model.get_stock_sector(trade["symbol"])
-
-            payload = {
-                "symbol": trade["symbol"],
-                "amount": trade["amount"],
-                "price": trade["price"],
-                "user_id": user_id,
-                "sector": real_sector,
-                "save_card": save_card_flag,
-                "card_holder": card_to_use.get("card_holder", ""),
-                "card_number": card_to_use.get("card_number", ""),
-                "expiration": card_to_use.get("expiration", ""),
-                "cvv": card_to_use.get("cvv", ""),
-            }
+        # --- Step 3: execute the whole basket in one request ---
+        # (the server resolves sectors and saves the card once)
+        print(f"🚀 Sending basket of {len(trades_to_execute)} orders via Model...")
+        payload = {
+            "orders": trades_to_execute,
+            "user_id": user_id,
+            "save_card": save_card_flag,
+            "card_holder": card_to_use.get("card_holder", ""),
+            "card_number": card_to_use.get("card_number", ""),
+            "expiration": card_to_use.get("expiration", ""),
+            "cvv": card_to_use.get("cvv", ""),
+        }
 
-            try:
-                # Correct routing in the architecture
-                response = trade_model.send_trade_request("buy", payload)
-
-                if response.status_code in [200, 201]:
-                    print(f"✅ Successfully bought {trade['symbol']}")
-                    success_count += 1
-                    save_card_flag = False
-                else:
-                    err = response.json().get("detail", "Unknown error")
-                    print(f"❌ Server Error for {trade['symbol']}: {err}")
+        success_count = 0
+        try:
+            response = trade_model.send_batch_order(payload)
+
+            if response.status_code in [200, 201]:
+                for result in response.json().get("results", []):
+                    if result.get("status") == "filled":
+                        print(f"✅ Successfully bought {result['symbol']}")
+                        success_count += 1
+                    else:
+                        print(f"❌ Order rejected for {result['symbol']}: {result.get('error')}")
+            else:
+                err = response.json().get("detail", "Unknown error")
+                print(f"❌ Server Error for basket: {err}")
 
-            except Exception as e:
-                print(f"❌ Execution error: {e}")
+        except Exception as e:
+            print(f"❌ Execution error: {e}")
 
             # --- Step 4: finish and refresh dashboard ---
         if success_count > 0:
@@ -33,6 +33,10 @@ class TradeModel:
         # mode = 'buy' or 'sell'
         return self.api.post_trade(mode, data)
 
+    def send_batch_order(self, data):
+        """Send a whole basket (orders + payment) via the batch endpoint."""
+        return self.api.post_trade_batch(data)
+
     def get_saved_cards(self, user_id):
         """Fetch and normalize saved cards."""
         response = self.api.get_saved_cards(user_id)
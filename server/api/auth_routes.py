@@ -1,6 +1,7 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from server.repositories.auth_repository import AuthRepository
+from server.core.executors import run_blocking
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
@@ -19,7 +20,9 @@ async def register(user: UserAuth):
     try:
         print(f"📡 Auth Routes: Register request for {user.email}")
         # Use Supabase Authentication
-        response = auth_repo.register_user(user.email, user.password, user.full_name)
+        response = await run_blocking(
+            "db", auth_repo.register_user, user.email, user.password, user.full_name
+        )
 
         if response.user:
             return {
@@ -34,6 +37,8 @@ async def register(user: UserAuth):
         else:
             raise HTTPException(status_code=400, detail="Registration failed")
 
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"❌ Register error: {str(e)}")
         raise HTTPException(status_code=400, detail=str(e))
@@ -44,7 +49,9 @@ async def login(user: UserAuth):
     try:
         print(f"📡 Auth Routes: Login request for {user.email}")
         # Use Supabase Authentication
-        response = auth_repo.login_user(user.email, user.password)
+        response = await run_blocking(
+            "db", auth_repo.login_user, user.email, user.password
+        )
 
         if response.user:
             return {
@@ -58,6 +65,8 @@ async def login(user: UserAuth):
         else:
             raise HTTPException(status_code=401, detail="Invalid credentials")
 
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"❌ Login error: {str(e)}")
         raise HTTPException(status_code=401, detail=str(e))
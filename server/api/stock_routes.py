@@ -1,4 +1,8 @@
+import asyncio
+import json
+
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from server.models.agent_dto import AgentResponse
 from server.services.stock_service import StockService
@@ -7,14 +11,31 @@ from server.services.news_service import NewsService
 from server.repositories.stock_repository import StockRepository
 from server.dal.supabase_client import SupabaseDAL
 from server.services.agent_service import AgentService
+from server.services.popular_service import PopularStocksService
+from server.services.portfolio_service import PortfolioService
+from server.services.downsampling import downsample_history
+from server.services.indicator_service import IndicatorService
+from server.services.symbol_index import get_symbol_index
+from server.core.executors import run_blocking, stream_blocking
 
 router = APIRouter(prefix="/stocks", tags=["Stocks"])
 
+# Upper bound for a single batched quote request
+MAX_BATCH_SYMBOLS = 100
+# Smallest useful downsampled chart (first + last + one bucket)
+MIN_CHART_POINTS = 3
+MAX_SEARCH_RESULTS = 25
+# Portfolio news feed bounds (symbols per request / items returned)
+MAX_FEED_SYMBOLS = 20
+MAX_FEED_ITEMS = 100
+
 # Service initialization
 stock_service = StockService()
 ai_service = AIService()
 news_service = NewsService()
 agent_service = AgentService()
+popular_service = PopularStocksService(stock_service)
+indicator_service = IndicatorService(stock_service)
 stock_repo = StockRepository()
 dal = SupabaseDAL.get_instance()
 
@@ -25,6 +46,8 @@ class StockEventRequest(BaseModel):
     symbol: str
     event_type: str
     payload: dict = {}
+    # Wait until the event is stored (otherwise it is queued and written in bulk)
+    sync: bool = False
 
 
 class InvestmentPlanRequest(BaseModel):
@@ -54,7 +77,43 @@ class ChatRequest(BaseModel):
 
 @router.post("/agent/chat", response_model=AgentResponse)
 async def chat_with_agent(request: ChatRequest):
-    return agent_service.process_request(request.message, request.user_id)
+    return await run_blocking(
+        "llm", agent_service.process_request, request.message, request.user_id
+    )
+
+
+def _sse(event: dict) -> str:
+    """One Server-Sent Events frame (event name = the event's type)."""
+    return f"event: {event.get('type', 'message')}\ndata: {json.dumps(event)}\n\n"
+
+
+async def _sse_stream(events):
+    """Frame stream events as SSE; failures become a final `error` event."""
+    try:
+        async for event in events:
+            yield _sse(event)
+    except HTTPException as e:
+        yield _sse({"type": "error", "detail": e.detail, "status": e.status_code})
+    except Exception as e:
+        print(f"❌ Stream Error: {e}")
+        yield _sse({"type": "error", "detail": str(e), "status": 500})
+
+
+@router.post("/agent/chat/stream")
+async def chat_with_agent_stream(request: ChatRequest):
+    """
+    Server-Sent Events variant of /agent/chat: `tool_start` / `tool_end`
+    progress, `token` events for the answer text, then a `final` event
+    carrying the AgentResponse.
+    """
+    events = stream_blocking(
+        "llm", agent_service.process_request_stream, request.message, request.user_id
+    )
+    return StreamingResponse(
+        _sse_stream(events),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 # --- 1. Dashboard watchlist endpoint ---
@@ -63,11 +122,37 @@ async def get_watchlist(user_id: str):
     print(f"📊 API Layer: Requesting watchlist for user {user_id}")
     try:
         # Instead of using `dal` directly, go through the Repository
-        response = stock_repo.get_watchlist(user_id)
+        response = await run_blocking("db", stock_repo.get_watchlist, user_id)
 
         # The Repository returns a Supabase response object; we extract `.data`
         return {"status": "success", "data": response.data if response.data else []}
 
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"❌ API Layer Error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# --- 2. Dashboard valuation endpoint (positions joined with live quotes) ---
+@router.get("/portfolio/{user_id}/valuation")
+async def get_portfolio_valuation(user_id: str):
+    print(f"📊 API Layer: Valuing portfolio for user {user_id}")
+    try:
+        response = await run_blocking("db", stock_repo.get_watchlist, user_id)
+        rows = response.data if response.data else []
+
+        # One batched quote request for every holding
+        symbols = [row.get("symbol") for row in rows if row.get("symbol")]
+        quotes = {}
+        if symbols:
+            batch = await run_blocking("quotes", stock_service.get_live_quotes, symbols)
+            quotes = batch["quotes"]
+
+        return {"status": "success", **PortfolioService.build_valuation(rows, quotes)}
+
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"❌ API Layer Error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -78,55 +163,33 @@ async def get_watchlist(user_id: str):
 
 @router.get("/quote/{symbol}")
 async def get_stock_price(symbol: str):
-    data = stock_service.get_live_quote(symbol)
+    data = await run_blocking("quotes", stock_service.get_live_quote, symbol)
     if not data:
         raise HTTPException(status_code=404, detail="Stock symbol not found")
     return data
 
 
+@router.get("/quotes")
+async def get_stock_prices(symbols: str):
+    """Batched quotes: /stocks/quotes?symbols=AAPL,MSFT,NVDA"""
+    symbol_list = [s for s in symbols.split(",") if s.strip()]
+    if not symbol_list:
+        raise HTTPException(status_code=400, detail="No symbols provided")
+    if len(symbol_list) > MAX_BATCH_SYMBOLS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many symbols (max {MAX_BATCH_SYMBOLS})",
+        )
+    return await run_blocking("quotes", stock_service.get_live_quotes, symbol_list)
+
+
 @router.get("/popular")
 async def get_popular_stocks():
+    """Served from the background-refreshed snapshot (see PopularStocksService)."""
     try:
-        popular = [
-            {"symbol": "AAPL", "name": "Apple Inc."},
-            {"symbol": "MSFT", "name": "Microsoft Corporation"},
-            {"symbol": "NVDA", "name": "NVIDIA Corporation"},
-            {"symbol": "AMZN", "name": "Amazon.com, Inc."},
-            {"symbol": "GOOGL", "name": "Alphabet Inc. Class A"},
-            {"symbol": "META", "name": "Meta Platforms, Inc."},
-            {"symbol": "TSLA", "name": "Tesla, Inc."},
-            {"symbol": "AVGO", "name": "Broadcom Inc."},
-            {"symbol": "NFLX", "name": "Netflix, Inc."},
-            {"symbol": "AMD", "name": "Advanced Micro Devices, Inc."},
-            {"symbol": "CRM", "name": "Salesforce, Inc."},
-            {"symbol": "ORCL", "name": "Oracle Corporation"},
-            {"symbol": "ADBE", "name": "Adobe Inc."},
-            {"symbol": "INTC", "name": "Intel Corporation"},
-            {"symbol": "QCOM", "name": "Qualcomm Incorporated"},
-            {"symbol": "CSCO", "name": "Cisco Systems, Inc."},
-            {"symbol": "PEP", "name": "PepsiCo, Inc."},
-            {"symbol": "COST", "name": "Costco Wholesale Corporation"},
-            {"symbol": "JPM", "name": "JPMorgan Chase & Co."},
-            {"symbol": "KO", "name": "The Coca-Cola Company"},
-        ]
-
-        enriched = []
-        for stock in popular:
-            quote = stock_service.get_live_quote(stock["symbol"])
-            if quote:
-                enriched.append(
-                    {
-                        "symbol": stock["symbol"],
-                        "name": stock["name"],
-                        "price": quote.get("price"),
-                    }
-                )
-            else:
-                enriched.append(
-                    {"symbol": stock["symbol"], "name": stock["name"], "price": None}
-                )
-
-        return {"stocks": enriched}
+        return await popular_service.get_snapshot()
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -135,50 +198,164 @@ async def get_popular_stocks():
 async def record_stock_event(event: StockEventRequest):
     print(f"✅ API Layer: Recording event {event.event_type} for {event.symbol}")
     try:
-        # Instead of the old dal.table(...).insert call, use the Repo:
-        response = stock_repo.record_event(
+        # Queued for the buffered event log (see core/event_writer.py):
+        row, persisted = await run_blocking(
+            "db",
+            stock_repo.record_event,
             symbol=event.symbol,
             event_type=event.event_type,
             payload=event.payload,
             user_id=event.user_id,
+            sync=event.sync,
         )
 
-        if response.data:
-            return {"success": True, "data": response.data[0]}
-        else:
+        if event.sync and not persisted:
             raise HTTPException(status_code=500, detail="Failed to save event")
+        # `data` is the submitted row: it has no DB-assigned `id` (the insert is batched)
+        return {"success": True, "data": row, "persisted": persisted}
 
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"❌ API Layer Error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _search_symbols(query: str, limit: int) -> list[dict]:
+    return get_symbol_index().search(query, limit)
+
+
+@router.get("/search")
+async def search_symbols(q: str, limit: int = 10):
+    """Ticker / company-name autocomplete from the local symbol index."""
+    limit = max(1, min(limit, MAX_SEARCH_RESULTS))
+    # Off the event loop: fuzzy matching scales with the listing
+    results = await run_blocking("search", _search_symbols, q, limit)
+    return {"query": q, "results": results}
+
+
 @router.get("/history/{symbol}")
-async def get_stock_history(symbol: str):
-    history = stock_service.get_history(symbol)
+async def get_stock_history(
+    symbol: str,
+    period: str = "1mo",
+    start: str | None = None,
+    end: str | None = None,
+    interval: str = "1d",
+    max_points: int | None = None,
+    downsample: str = "lttb",
+):
+    """
+    max_points: reduce the series server-side (LTTB or min/max per bucket);
+    the response then carries the kept original `indices`.
+    """
+    if max_points is not None and max_points < MIN_CHART_POINTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"max_points must be at least {MIN_CHART_POINTS}",
+        )
+    try:
+        history = await run_blocking(
+            "quotes", stock_service.get_history, symbol, period, start, end, interval
+        )
+        if history and max_points:
+            history = downsample_history(history, max_points, downsample)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     if not history:
         raise HTTPException(status_code=404, detail="History not found")
     return history
 
 
+@router.get("/indicators/{symbol}")
+async def get_stock_indicators(
+    symbol: str,
+    indicators: str | None = None,
+    period: str = "1y",
+    start: str | None = None,
+    end: str | None = None,
+    interval: str = "1d",
+):
+    """
+    indicators: comma separated spec, e.g. "sma:20,ema:50,rsi:14,macd:12-26-9,
+    bbands:20-2,atr:14,volatility:20" (the default when omitted).
+    """
+    try:
+        result = await run_blocking(
+            "quotes",
+            indicator_service.get_indicators,
+            symbol,
+            indicators,
+            period,
+            start,
+            end,
+            interval,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not result:
+        raise HTTPException(status_code=404, detail="History not found")
+    return result
+
+
 @router.get("/analyze/{symbol}")
 async def analyze_stock(symbol: str):
-    data = stock_service.get_live_quote(symbol)
+    data = await run_blocking("quotes", stock_service.get_live_quote, symbol)
     if not data:
         return {"analysis": "Could not fetch data for analysis."}
-    analysis = ai_service.analyze_stock(data["symbol"], data["price"])
+    analysis = await run_blocking(
+        "llm", ai_service.analyze_stock, data["symbol"], data["price"]
+    )
     return {"analysis": analysis}
 
 
+@router.get("/news")
+async def get_news_feed(symbols: str, limit: int = 50, days_back: int = 10):
+    """
+    One ranked feed for several symbols (e.g. the whole portfolio):
+    `/stocks/news?symbols=AAPL,MSFT,NVDA`. News is fetched concurrently,
+    deduplicated across symbols and sorted by importance.
+    """
+    requested = list(dict.fromkeys(s.strip().upper() for s in symbols.split(",") if s.strip()))
+    if not requested:
+        raise HTTPException(status_code=400, detail="No symbols given")
+    if len(requested) > MAX_FEED_SYMBOLS:
+        raise HTTPException(
+            status_code=400, detail=f"At most {MAX_FEED_SYMBOLS} symbols per feed"
+        )
+    limit = max(1, min(limit, MAX_FEED_ITEMS))
+    days_back = max(1, min(days_back, 30))
+
+    feed = await news_service.get_news_feed(requested, days_back)
+
+    # Rank per symbol (the ticker is part of the scored text), groups in parallel
+    groups = {}
+    for article in feed:
+        groups.setdefault(article["symbol"], []).append(article)
+    ranked_groups = await asyncio.gather(
+        *(
+            run_blocking("llm", ai_service.rank_news_for_stock, symbol, articles)
+            for symbol, articles in groups.items()
+        )
+    )
+    ranked = sorted(
+        (article for group in ranked_groups for article in group),
+        key=lambda a: a["importance_score"],
+        reverse=True,
+    )
+    return {"symbols": requested, "news": ranked[:limit]}
+
+
 @router.get("/news/{symbol}")
 async def get_ranked_news_for_symbol(symbol: str):
     print(f"\n📡 DEBUG ROUTE: Fetching & Ranking news for {symbol}")
     try:
         # 1. Fetch news
-        raw_news = news_service.get_company_news(symbol)
+        raw_news = await news_service.get_company_news_async(symbol)
 
-        # 2. Send for ranking (the AI Service is already limited to 10 items for speed)
-        ranked_news = ai_service.rank_news_for_stock(symbol, raw_news)
+        # 2. Send for ranking (batched, with cached scores for known headlines)
+        ranked_news = await run_blocking(
+            "llm", ai_service.rank_news_for_stock, symbol, raw_news
+        )
 
         print("📡 DEBUG ROUTE: Finished Ranking")
         return {"symbol": symbol.upper(), "news": ranked_news}
@@ -198,8 +375,12 @@ async def rank_news(request: NewsRankingRequest):
     """
     try:
         raw_items = [item.model_dump() for item in request.news]
-        ranked = ai_service.rank_news_for_stock(request.symbol, raw_items)
+        ranked = await run_blocking(
+            "llm", ai_service.rank_news_for_stock, request.symbol, raw_items
+        )
         return {"symbol": request.symbol.upper(), "news": ranked}
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"❌ Error ranking news: {e}")
         raise HTTPException(status_code=500, detail="Failed to rank news items")
@@ -210,11 +391,8 @@ async def get_user_purchases(user_id: str):
     return {"status": "deprecated", "data": []}
 
 
-@router.post("/ai-investment-plan")
-async def generate_investment_plan(request: InvestmentPlanRequest):
-    print(f"📊 Stock Routes: Generating investment plan...")
-    try:
-        prompt = f"""
+def _investment_plan_prompt(request: InvestmentPlanRequest) -> str:
+    return f"""
         Client Profile:
         - Investment Amount: ${request.amount}
         - Preferred Sector: {request.sector}
@@ -227,15 +405,43 @@ async def generate_investment_plan(request: InvestmentPlanRequest):
         2. Risk assessment
         3. Implementation timeline
         """
-        recommendation = ai_service.generate_investment_plan(prompt)
+
+
+@router.post("/ai-investment-plan")
+async def generate_investment_plan(request: InvestmentPlanRequest):
+    print(f"📊 Stock Routes: Generating investment plan...")
+    try:
+        recommendation = await run_blocking(
+            "llm", ai_service.generate_investment_plan, _investment_plan_prompt(request)
+        )
         print(f"✅ Investment plan generated")
         return {"recommendation": recommendation}
 
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"❌ Error generating investment plan: {str(e)}")
         raise HTTPException(status_code=500, detail=f"AI service error: {str(e)}")
 
 
+@router.post("/ai-investment-plan/stream")
+async def generate_investment_plan_stream(request: InvestmentPlanRequest):
+    """
+    Server-Sent Events variant of /ai-investment-plan: `plan_chunk` events
+    with the markdown as it is written, `extracting` while the basket is
+    parsed, then a `final` event carrying the same recommendation dict.
+    """
+    print(f"📊 Stock Routes: Streaming investment plan...")
+    events = stream_blocking(
+        "llm", ai_service.generate_investment_plan_stream, _investment_plan_prompt(request)
+    )
+    return StreamingResponse(
+        _sse_stream(events),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.get("/info/{symbol}")
-def get_stock_info(symbol: str):
-    return stock_service.get_company_info(symbol)
+async def get_stock_info(symbol: str):
+    return await run_blocking("quotes", stock_service.get_company_info, symbol)
@@ -0,0 +1,65 @@
+import asyncio
+import json
+
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from server.services.stock_service import StockService
+from server.services.quote_stream import QuoteStreamHub, QuoteSubscriber
+
+router = APIRouter(tags=["Streaming"])
+
+# One hub for the whole server: a single poller per symbol for all clients
+quote_hub = QuoteStreamHub(StockService())
+
+
+@router.websocket("/ws/quotes")
+async def quotes_socket(websocket: WebSocket):
+    """
+    Client -> server: {"action": "subscribe" | "unsubscribe", "symbols": [...]}
+    Server -> client: {"type": "quote", "symbol", "price", "previous_price", ...}
+    """
+    await websocket.accept()
+    subscriber = QuoteSubscriber()
+
+    async def reader():
+        while True:
+            try:
+                message = json.loads(await websocket.receive_text())
+            except json.JSONDecodeError:
+                await subscriber.queue.put({"type": "error", "detail": "Invalid JSON"})
+                continue
+
+            action = message.get("action") if isinstance(message, dict) else None
+            symbols = (message.get("symbols") or []) if action else []
+            if isinstance(symbols, str):
+                symbols = symbols.split(",")
+
+            if action == "subscribe":
+                quote_hub.subscribe(subscriber, symbols)
+            elif action == "unsubscribe":
+                quote_hub.unsubscribe(subscriber, symbols)
+            else:
+                await subscriber.queue.put(
+                    {"type": "error", "detail": f"Unknown action: {action}"}
+                )
+                continue
+
+            await subscriber.queue.put(
+                {"type": "subscribed", "symbols": sorted(subscriber.symbols)}
+            )
+
+    async def writer():
+        while True:
+            message = await subscriber.queue.get()
+            await websocket.send_json(message)
+
+    tasks = [asyncio.create_task(reader()), asyncio.create_task(writer())]
+    try:
+        done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            error = task.exception()
+            if error is not None and not isinstance(error, WebSocketDisconnect):
+                print(f"⚠️ Quote socket closed with error: {error}")
+    finally:
+        for task in tasks:
+            task.cancel()
+        quote_hub.disconnect(subscriber)
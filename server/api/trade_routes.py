@@ -1,11 +1,19 @@
+import asyncio
+
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from server.repositories.stock_repository import StockRepository
 from server.dal.supabase_client import SupabaseDAL
+from server.services.stock_service import StockService
+from server.core.executors import run_blocking
 
 router = APIRouter(prefix="/trade", tags=["Trading"])
 
+# Upper bound for a single basket order
+MAX_BATCH_ORDERS = 50
+
 stock_repo = StockRepository()
+stock_service = StockService()
 dal = SupabaseDAL.get_instance()  # Keep this only for Saved Cards for now
 
 
@@ -23,6 +31,25 @@ class PurchaseRequest(BaseModel):
     sector: str = "Unknown"
 
 
+class BatchOrder(BaseModel):
+    symbol: str
+    price: float
+    amount: int
+    sector: str = "Unknown"
+
+
+class BatchPurchaseRequest(BaseModel):
+    """Several buy orders sharing one payment context (AI basket checkout)."""
+
+    orders: list[BatchOrder]
+    card_number: str
+    card_holder: str
+    expiration: str
+    cvv: str
+    save_card: bool
+    user_id: str = None
+
+
 class SaleRequest(BaseModel):
     symbol: str
     current_price: float
@@ -33,39 +60,41 @@ class SaleRequest(BaseModel):
 # --- Routes ---
 
 
+def _save_card(req: PurchaseRequest):
+    """Securely save card (without ON CONFLICT)."""
+    # Check whether the user already has a saved card
+    existing_card = (
+        dal.table("saved_cards").select("*").eq("user_id", req.user_id).execute()
+    )
+
+    card_data = {
+        "user_id": req.user_id,
+        "card_holder": req.card_holder,
+        "card_number": req.card_number,
+        "expiration": req.expiration,
+        "cvv": req.cvv,
+    }
+
+    if existing_card.data and len(existing_card.data) > 0:
+        # Update existing card
+        dal.table("saved_cards").update(card_data).eq("user_id", req.user_id).execute()
+    else:
+        # Insert new card
+        dal.table("saved_cards").insert(card_data).execute()
+
+
 @router.post("/buy")
 async def buy_stock(req: PurchaseRequest):
     print(f"💰 API: Processing buy request for {req.symbol}...")
     try:
-        # 1. Securely save card (without ON CONFLICT)
+        # 1. Securely save card
         if req.save_card:
-            # Check whether the user already has a saved card
-            existing_card = (
-                dal.table("saved_cards")
-                .select("*")
-                .eq("user_id", req.user_id)
-                .execute()
-            )
-
-            card_data = {
-                "user_id": req.user_id,
-                "card_holder": req.card_holder,
-                "card_number": req.card_number,
-                "expiration": req.expiration,
-                "cvv": req.cvv,
-            }
+            await run_blocking("db", _save_card, req)
 
-            if existing_card.data and len(existing_card.data) > 0:
-                # Update existing card
-                dal.table("saved_cards").update(card_data).eq(
-                    "user_id", req.user_id
-                ).execute()
-            else:
-                # Insert new card
-                dal.table("saved_cards").insert(card_data).execute()
-
-        # 2. Execute the buy via the Repository
-        stock_repo.buy_stock(
+        # 2. Execute the buy via the Repository (one atomic DB call)
+        position = await run_blocking(
+            "db",
+            stock_repo.buy_stock,
             symbol=req.symbol,
             price=req.price,
             amount_to_buy=req.amount,
@@ -76,19 +105,127 @@ async def buy_stock(req: PurchaseRequest):
         return {
             "status": "success",
             "message": f"Purchased {req.amount} of {req.symbol}",
+            "position": position,
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"❌ API Buy Error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _order_error(order: BatchOrder):
+    if not order.symbol.strip():
+        return "Missing symbol"
+    if order.amount <= 0:
+        return "Quantity must be greater than 0"
+    if order.price <= 0:
+        return "Price must be greater than 0"
+    return None
+
+
+async def _resolve_sectors(symbols: set) -> dict:
+    """Sectors for all symbols at once (shared sector cache, misses fetched concurrently)."""
+    symbols = sorted(symbols)
+    sectors = await asyncio.gather(
+        *(run_blocking("quotes", stock_service.get_sector, symbol) for symbol in symbols)
+    )
+    return dict(zip(symbols, sectors))
+
+
+@router.post("/batch")
+async def buy_batch(req: BatchPurchaseRequest):
+    """
+    Execute a basket of buys in one request: sectors are resolved in bulk,
+    the card is saved once, and every valid order is applied by a single
+    atomic DB call. Returns one result per order, in request order.
+    """
+    print(f"🧺 API: Processing basket of {len(req.orders)} orders...")
+    if not req.orders:
+        raise HTTPException(status_code=400, detail="No orders in basket")
+    if len(req.orders) > MAX_BATCH_ORDERS:
+        raise HTTPException(
+            status_code=400, detail=f"At most {MAX_BATCH_ORDERS} orders per basket"
+        )
+
+    results = []
+    valid = []
+    for order in req.orders:
+        result = {
+            "symbol": order.symbol.strip().upper(),
+            "amount": order.amount,
+            "price": order.price,
+        }
+        error = _order_error(order)
+        if error:
+            result.update(status="rejected", error=error)
+        else:
+            valid.append((result, order))
+        results.append(result)
+
+    if valid:
+        try:
+            unresolved = {
+                result["symbol"]
+                for result, order in valid
+                if not order.sector or order.sector == "Unknown"
+            }
+            sectors = await _resolve_sectors(unresolved) if unresolved else {}
+            for result, order in valid:
+                result["sector"] = sectors.get(result["symbol"], order.sector)
+
+            if req.save_card:
+                await run_blocking("db", _save_card, req)
+
+            positions = await run_blocking(
+                "db",
+                stock_repo.buy_batch,
+                orders=[
+                    {
+                        "symbol": result["symbol"],
+                        "price": result["price"],
+                        "amount": result["amount"],
+                        "sector": result["sector"],
+                    }
+                    for result, _ in valid
+                ],
+                card_details={"card_number": req.card_number},
+                user_id=req.user_id,
+            )
+        except HTTPException:
+            raise
+        except Exception as e:
+            print(f"❌ API Batch Buy Error: {e}")
+            raise HTTPException(status_code=500, detail=str(e))
+
+        by_symbol = {position["symbol"]: position for position in positions or []}
+        for result, _ in valid:
+            result.update(status="filled", position=by_symbol.get(result["symbol"]))
+
+    filled = len(valid)
+    if filled == len(results):
+        status = "success"
+    elif filled:
+        status = "partial"
+    else:
+        status = "rejected"
+    return {
+        "status": status,
+        "message": f"Purchased {filled} of {len(results)} orders",
+        "filled": filled,
+        "results": results,
+    }
+
+
 @router.post("/sell")
 async def sell_stock(req: SaleRequest):
     print(f"📉 API: Requesting sale for {req.symbol}")
     try:
         # --- Cleanup: a single call into the Repo ---
-        result = stock_repo.sell_stock(
+        result = await run_blocking(
+            "db",
+            stock_repo.sell_stock,
             symbol=req.symbol,
             amount_to_sell=req.amount,
             current_price=req.current_price,
@@ -97,18 +234,25 @@ async def sell_stock(req: SaleRequest):
         return {
             "status": "success",
             "message": f"Sold {req.amount} shares of {req.symbol}",
+            "position": result["position"],
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"❌ API: Sale failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _get_saved_card(user_id: str):
+    return (
+        dal.table("saved_cards").select("*").eq("user_id", user_id).limit(1).execute()
+    )
+
+
 @router.get("/cards/{user_id}")
 async def get_saved_card(user_id: str):
     # We can keep using `dal` here or move this into the Repo.
     # For the current cleanup, we focused on moving buy/sell into the Repo.
-    response = (
-        dal.table("saved_cards").select("*").eq("user_id", user_id).limit(1).execute()
-    )
+    response = await run_blocking("db", _get_saved_card, user_id)
     return {"status": "success", "data": response.data[0] if response.data else None}
@@ -0,0 +1,396 @@
+import json
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime, timezone
+
+from fastapi import HTTPException
+from postgrest.exceptions import APIError
+
+DEFAULT_DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
+EVENT_SPOOL_PATH = os.getenv(
+    "EVENT_SPOOL_PATH", os.path.join(DEFAULT_DATA_DIR, "event_spool.jsonl")
+)
+# A batch is written when it reaches EVENT_BATCH_SIZE or after EVENT_FLUSH_SECONDS
+EVENT_BATCH_SIZE = int(os.getenv("EVENT_BATCH_SIZE", "100"))
+EVENT_FLUSH_SECONDS = float(os.getenv("EVENT_FLUSH_SECONDS", "1"))
+# Backpressure: submitters wait this long for room in a full queue, then get 503
+EVENT_QUEUE_SIZE = int(os.getenv("EVENT_QUEUE_SIZE", "10000"))
+EVENT_QUEUE_TIMEOUT = float(os.getenv("EVENT_QUEUE_TIMEOUT", "2"))
+# How long a synchronous (wait=True) submit waits for its insert
+EVENT_ACK_TIMEOUT = float(os.getenv("EVENT_ACK_TIMEOUT", "10"))
+# fsync every spool write (survives power loss, not just a process crash)
+EVENT_SPOOL_FSYNC = os.getenv("EVENT_SPOOL_FSYNC", "0") == "1"
+# Rewrite the spool with just the unacknowledged events once it grows past this
+EVENT_SPOOL_COMPACT_BYTES = int(os.getenv("EVENT_SPOOL_COMPACT_BYTES", str(4 * 1024 * 1024)))
+EVENT_MAX_BACKOFF = 30.0
+
+
+class EventQueueFullError(HTTPException):
+    """Raised when the event queue stays full for EVENT_QUEUE_TIMEOUT seconds."""
+
+    def __init__(self):
+        super().__init__(status_code=503, detail="Server busy (event log): queue is full")
+
+
+class _Ack:
+    __slots__ = ("done", "persisted")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.persisted = False
+
+
+def _insert_into_supabase(rows: list[dict]):
+    from server.dal.supabase_client import SupabaseDAL
+
+    SupabaseDAL.get_instance().table("stock_events").insert(rows).execute()
+
+
+class EventWriter:
+    """
+    Buffered, batched writer for the `stock_events` log.
+
+    `submit()` appends the event to a local spool file and a bounded
+    in-memory queue and returns at once; a background thread bulk-inserts
+    the queue in batches of `batch_size` (or whatever is queued after
+    `flush_interval`). Inserted events are acknowledged in the spool, and
+    anything not acknowledged is replayed on the next `start()`, so queued
+    events survive a crash. When the queue is full, submitters block for up
+    to `queue_timeout` and then get EventQueueFullError (503).
+
+    `submit(event, wait=True)` flushes immediately and returns once the
+    event is in the database (for callers that need a synchronous ack).
+    """
+
+    def __init__(
+        self,
+        sink=_insert_into_supabase,
+        spool_path: str = EVENT_SPOOL_PATH,
+        batch_size: int = EVENT_BATCH_SIZE,
+        flush_interval: float = EVENT_FLUSH_SECONDS,
+        max_queue: int = EVENT_QUEUE_SIZE,
+        queue_timeout: float = EVENT_QUEUE_TIMEOUT,
+    ):
+        self.sink = sink
+        self.spool_path = spool_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+
+        self._cond = threading.Condition()
+        self._start_lock = threading.Lock()
+        self._queue = deque()  # (event_id, row)
+        self._waiters = {}  # event_id -> _Ack (synchronous submits)
+        self._in_flight = 0
+        self._urgent = False
+        self._stopping = False
+        self._thread = None
+        self._spool = None
+
+        # Metrics (guarded by _cond)
+        self.submitted = 0
+        self.written = 0
+        self.batches = 0
+        self.retries = 0
+        self.dropped = 0
+        self.rejected = 0
+        self.blocked = 0
+        self.replayed = 0
+        self.compactions = 0
+        self.max_queue_seen = 0
+
+    # --- Lifecycle ---
+
+    def start(self):
+        """Replay the spool and start the flusher (idempotent)."""
+        with self._start_lock:
+            if self._thread is not None:
+                return
+            pending = self._replay_spool()
+            with self._cond:
+                self._stopping = False
+                self._queue.extendleft(reversed(pending))
+                self.replayed += len(pending)
+            if pending:
+                print(f"📼 Event log: replaying {len(pending)} spooled events")
+            self._thread = threading.Thread(
+                target=self._run, name="event-writer", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        """Flush what is queued (up to `timeout`) and stop; leftovers stay spooled."""
+        with self._start_lock:
+            if self._thread is None:
+                return
+            with self._cond:
+                self._stopping = True
+                self._cond.notify_all()
+            self._thread.join(timeout)
+            if self._thread.is_alive():
+                print("⚠️ Event log: writer did not drain in time; events stay in the spool")
+                return
+            self._thread = None
+            with self._cond:
+                left = len(self._queue)
+                if self._spool is not None:
+                    self._spool.close()
+                    self._spool = None
+            if left:
+                print(f"⚠️ Event log: {left} events left in the spool for the next start")
+
+    # --- Producers ---
+
+    def submit(self, row: dict, wait: bool = False, timeout: float = EVENT_ACK_TIMEOUT) -> bool:
+        """
+        Queue one stock_events row. Returns True once queued, or with
+        `wait=True` once inserted (False if `timeout` passed first; the
+        event then stays queued and is still written later).
+        """
+        self.start()
+        event_id = uuid.uuid4().hex
+        ack = _Ack() if wait else None
+
+        with self._cond:
+            if len(self._queue) >= self.max_queue:
+                self.blocked += 1
+                give_up_at = time.monotonic() + self.queue_timeout
+                while len(self._queue) >= self.max_queue:
+                    remaining = give_up_at - time.monotonic()
+                    if remaining <= 0:
+                        self.rejected += 1
+                        raise EventQueueFullError()
+                    self._cond.wait(remaining)
+
+            self._spool_write({"id": event_id, "event": row})
+            self._queue.append((event_id, row))
+            self.submitted += 1
+            self.max_queue_seen = max(self.max_queue_seen, len(self._queue))
+            if ack is not None:
+                self._waiters[event_id] = ack
+                self._urgent = True
+            if self._urgent or len(self._queue) >= self.batch_size:
+                self._cond.notify_all()
+
+        if ack is None:
+            return True
+        if not ack.done.wait(timeout):
+            with self._cond:
+                self._waiters.pop(event_id, None)
+        return ack.persisted
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Write everything queued now; True if the queue drained within `timeout`."""
+        give_up_at = time.monotonic() + timeout
+        with self._cond:
+            self._urgent = True
+            self._cond.notify_all()
+            while self._queue or self._in_flight:
+                remaining = give_up_at - time.monotonic()
+                if remaining <= 0 or self._thread is None:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "queue_depth": len(self._queue),
+                "in_flight": self._in_flight,
+                "max_queue": self.max_queue,
+                "max_queue_depth_seen": self.max_queue_seen,
+                "batch_size": self.batch_size,
+                "flush_interval": self.flush_interval,
+                "submitted": self.submitted,
+                "written": self.written,
+                "batches": self.batches,
+                "avg_batch": round(self.written / self.batches, 2) if self.batches else 0.0,
+                "retries": self.retries,
+                "dropped": self.dropped,
+                "rejected": self.rejected,
+                "blocked": self.blocked,
+                "replayed": self.replayed,
+                "spool_compactions": self.compactions,
+            }
+
+    # --- Flusher ---
+
+    def _run(self):
+        failures = 0
+        retry_at = 0.0
+        while True:
+            with self._cond:
+                flush_at = time.monotonic() + self.flush_interval
+                while not self._stopping:
+                    now = time.monotonic()
+                    ready = (
+                        self._urgent
+                        or len(self._queue) >= self.batch_size
+                        or now >= flush_at
+                    )
+                    if ready and now >= retry_at:
+                        break
+                    # After a failure, hold off until retry_at even if more arrives
+                    self._cond.wait((retry_at if ready else max(retry_at, flush_at)) - now)
+
+                if not self._queue:
+                    self._urgent = False
+                    if self._stopping:
+                        return
+                    continue
+
+                size = min(self.batch_size, len(self._queue))
+                batch = [self._queue.popleft() for _ in range(size)]
+                self._in_flight = size
+                if not self._queue:
+                    self._urgent = False
+                # Room in the queue again for blocked submitters
+                self._cond.notify_all()
+
+            written, dropped, unsent = self._write(batch)
+
+            with self._cond:
+                self._in_flight = 0
+                if unsent:
+                    # Database unreachable: keep what was not sent (in order); requeued
+                    # before acking so the spool is never truncated under it
+                    self._queue.extendleft(reversed(unsent))
+                    self.retries += 1
+
+                done = written + dropped
+                if done:
+                    self.batches += 1
+                    self.written += len(written)
+                    self.dropped += len(dropped)
+                    self._ack_locked([event_id for event_id, _ in done])
+                    for persisted, items in ((True, written), (False, dropped)):
+                        for event_id, _ in items:
+                            ack = self._waiters.pop(event_id, None)
+                            if ack is not None:
+                                ack.persisted = persisted
+                                ack.done.set()
+                    self._cond.notify_all()
+
+                if not unsent:
+                    failures = 0
+                    continue
+                if self._stopping:
+                    return
+                failures += 1
+                retry_at = time.monotonic() + min(EVENT_MAX_BACKOFF, 0.5 * 2**failures)
+
+    def _write(self, batch: list):
+        """
+        Insert a batch: (written, dropped, unsent). `unsent` is non-empty when
+        the database could not be reached; those rows are retried later.
+        """
+        try:
+            self.sink([row for _, row in batch])
+            return batch, [], []
+        except APIError as e:
+            # The database rejected the data: find the bad rows one by one
+            print(f"⚠️ Event log: batch of {len(batch)} rejected ({e.message}); trying rows singly")
+        except Exception as e:
+            print(f"❌ Event log: insert failed, will retry: {e}")
+            return [], [], batch
+
+        written, dropped = [], []
+        for index, item in enumerate(batch):
+            try:
+                self.sink([item[1]])
+                written.append(item)
+            except APIError as e:
+                print(f"❌ Event log: dropping rejected {item[1].get('event_type')}: {e.message}")
+                dropped.append(item)
+            except Exception as e:
+                # Keep what already went through; only the rest is retried
+                print(f"❌ Event log: insert failed, will retry: {e}")
+                return written, dropped, batch[index:]
+        return written, dropped, []
+
+    # --- Spool ---
+
+    def _replay_spool(self) -> list:
+        """Unacknowledged events from the spool, which is rewritten to hold only them."""
+        os.makedirs(os.path.dirname(os.path.abspath(self.spool_path)), exist_ok=True)
+        pending = {}
+        if os.path.exists(self.spool_path):
+            with open(self.spool_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # Torn last line from a crash
+                    if "ack" in record:
+                        for event_id in record["ack"]:
+                            pending.pop(event_id, None)
+                    else:
+                        pending[record["id"]] = record["event"]
+
+        pending = list(pending.items())
+        with self._cond:
+            self._rewrite_spool_locked(pending)
+        return pending
+
+    def _rewrite_spool_locked(self, pending: list):
+        """Atomically replace the spool with just `pending` and reopen it for appends."""
+        tmp_path = self.spool_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for event_id, row in pending:
+                f.write(json.dumps({"id": event_id, "event": row}) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        if self._spool is not None:
+            self._spool.close()
+        os.replace(tmp_path, self.spool_path)
+        self._spool = open(self.spool_path, "a", encoding="utf-8")
+
+    def _spool_write(self, record: dict):
+        if self._spool is None:
+            return
+        try:
+            self._spool.write(json.dumps(record) + "\n")
+            self._spool.flush()
+            if EVENT_SPOOL_FSYNC:
+                os.fsync(self._spool.fileno())
+        except (OSError, TypeError, ValueError) as e:
+            print(f"⚠️ Event log: spool write failed (event kept in memory only): {e}")
+
+    def _ack_locked(self, event_ids: list):
+        if self._spool is None:
+            return
+        if not self._queue and not self._in_flight:
+            # Nothing outstanding: start the spool over
+            try:
+                self._spool.truncate(0)
+            except OSError as e:
+                print(f"⚠️ Event log: spool truncate failed: {e}")
+            else:
+                return
+        self._spool_write({"ack": event_ids})
+
+        # Under steady traffic the queue never empties: compact instead
+        try:
+            if self._spool.tell() > EVENT_SPOOL_COMPACT_BYTES:
+                self._rewrite_spool_locked(list(self._queue))
+                self.compactions += 1
+        except OSError as e:
+            print(f"⚠️ Event log: spool compaction failed: {e}")
+
+
+def new_event_row(symbol: str, event_type: str, payload: dict, user_id: str) -> dict:
+    """A stock_events row, timestamped now (it may be inserted a little later)."""
+    return {
+        "user_id": user_id,
+        "symbol": symbol.upper(),
+        "event_type": event_type,
+        "payload": payload,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+    }
+
+
+event_writer = EventWriter()
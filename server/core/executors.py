@@ -0,0 +1,270 @@
+import asyncio
+import contextvars
+import functools
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import HTTPException
+
+
+class ExecutorSaturatedError(HTTPException):
+    """Raised when a pool's queue is full or a call waited too long for a slot."""
+
+    def __init__(self, pool: str, reason: str):
+        super().__init__(
+            status_code=503, detail=f"Server busy ({pool} pool): {reason}"
+        )
+        self.pool = pool
+
+
+class StreamCancelled(Exception):
+    """Raised inside a streaming worker when its consumer went away."""
+
+
+class CallTicket:
+    """
+    Per-call deadline / cancellation flag, visible to the worker through
+    `current_ticket` so long waits inside it (e.g. for a model slot) can give
+    up once nobody is waiting for the answer.
+    """
+
+    def __init__(self, timeout: float = None):
+        self.deadline = time.monotonic() + timeout if timeout else None
+        self.cancelled = threading.Event()
+
+    def remaining(self):
+        """Seconds left before the deadline (None = no deadline)."""
+        if self.deadline is None:
+            return None
+        return self.deadline - time.monotonic()
+
+    def expired(self) -> bool:
+        remaining = self.remaining()
+        return self.cancelled.is_set() or (remaining is not None and remaining <= 0)
+
+    def cancel(self):
+        self.cancelled.set()
+
+
+current_ticket = contextvars.ContextVar("current_ticket", default=None)
+
+
+class BoundedExecutor:
+    """
+    A named thread pool for one kind of blocking dependency (quotes, DB, LLM...).
+
+    - `max_workers` caps how many calls run at once.
+    - `max_queue` caps how many calls may wait for a worker; more are rejected.
+    - `queue_timeout` is how long a call may wait for a worker before giving up.
+    - `deadline` (optional) is how long the caller will wait for the result at
+      all; it is handed to the worker as a CallTicket.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_workers: int,
+        max_queue: int,
+        queue_timeout: float,
+        deadline: float = None,
+    ):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.deadline = deadline
+
+        self._pool = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix=f"{name}-pool"
+        )
+        # Created lazily so it binds to the server's running event loop
+        self._slots = None
+
+        # Metrics (only touched from the event loop thread)
+        self.queued = 0
+        self.active = 0
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.max_queue_seen = 0
+        self.total_wait_seconds = 0.0
+
+    async def run(self, func, *args, **kwargs):
+        """Run a blocking call on this pool without blocking the event loop."""
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_workers)
+
+        ticket = CallTicket(self.deadline)
+        enqueued_at = time.monotonic()
+        if self._slots.locked():
+            # All workers are busy: wait in the (bounded) queue
+            if self.queued >= self.max_queue:
+                self.rejected += 1
+                raise ExecutorSaturatedError(self.name, "queue is full")
+
+            self.queued += 1
+            self.max_queue_seen = max(self.max_queue_seen, self.queued)
+            try:
+                await asyncio.wait_for(
+                    self._slots.acquire(), timeout=self.queue_timeout
+                )
+            except asyncio.TimeoutError:
+                self.timed_out += 1
+                raise ExecutorSaturatedError(
+                    self.name, "timed out waiting for a worker"
+                )
+            finally:
+                self.queued -= 1
+        else:
+            await self._slots.acquire()
+
+        self.active += 1
+        self.total_wait_seconds += time.monotonic() - enqueued_at
+
+        # Carry request-scoped context (contextvars + this call's ticket) into the worker
+        token = current_ticket.set(ticket)
+        try:
+            ctx = contextvars.copy_context()
+        finally:
+            current_ticket.reset(token)
+        call = functools.partial(ctx.run, func, *args, **kwargs)
+        future = asyncio.get_running_loop().run_in_executor(self._pool, call)
+        # The slot is held until the worker really finishes, even if the caller
+        # stops waiting, so no more than max_workers calls ever reach the pool
+        future.add_done_callback(functools.partial(self._finished, ticket))
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            # The caller went away (e.g. a stream's client disconnected)
+            ticket.cancel()
+            raise
+
+    def _finished(self, ticket: CallTicket, future):
+        self.active -= 1
+        self._slots.release()
+        if ticket.cancelled.is_set():
+            self.cancelled += 1  # Nobody was waiting for the result any more
+        elif future.cancelled() or future.exception() is not None:
+            self.failed += 1
+        else:
+            self.completed += 1
+
+    def metrics(self) -> dict:
+        started = self.completed + self.failed + self.cancelled + self.active
+        return {
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "queue_timeout": self.queue_timeout,
+            "deadline": self.deadline,
+            "queue_depth": self.queued,
+            "max_queue_depth_seen": self.max_queue_seen,
+            "active": self.active,
+            "completed": self.completed,
+            "failed": self.failed,
+            "cancelled": self.cancelled,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "avg_wait_ms": (
+                round(self.total_wait_seconds / started * 1000, 2) if started else 0.0
+            ),
+        }
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+# --- Pool registry ---
+# Each pool is configurable via env, e.g. EXECUTOR_LLM_WORKERS=4,
+# EXECUTOR_LLM_QUEUE=32, EXECUTOR_LLM_TIMEOUT=60, EXECUTOR_LLM_DEADLINE=120
+_DEFAULTS = {
+    "quotes": {"workers": 16, "queue": 256, "timeout": 10},
+    "db": {"workers": 16, "queue": 256, "timeout": 10},
+    # LLM calls outlive the desktop client's 120 s "ai" read timeout otherwise
+    "llm": {"workers": 8, "queue": 64, "timeout": 60, "deadline": 120},
+    "news": {"workers": 8, "queue": 64, "timeout": 15},
+    # In-memory symbol index lookups: kept off the DB pool's slots
+    "search": {"workers": 4, "queue": 128, "timeout": 5},
+}
+
+_executors = {}
+_registry_lock = threading.Lock()
+
+
+def _env_number(name: str, default, cast):
+    value = os.getenv(name)
+    return cast(value) if value else default
+
+
+def get_executor(name: str) -> BoundedExecutor:
+    with _registry_lock:
+        executor = _executors.get(name)
+        if executor is None:
+            defaults = _DEFAULTS.get(name, {"workers": 8, "queue": 64, "timeout": 15})
+            prefix = f"EXECUTOR_{name.upper()}"
+            executor = BoundedExecutor(
+                name=name,
+                max_workers=_env_number(f"{prefix}_WORKERS", defaults["workers"], int),
+                max_queue=_env_number(f"{prefix}_QUEUE", defaults["queue"], int),
+                queue_timeout=_env_number(f"{prefix}_TIMEOUT", defaults["timeout"], float),
+                deadline=_env_number(f"{prefix}_DEADLINE", defaults.get("deadline"), float),
+            )
+            _executors[name] = executor
+        return executor
+
+
+async def run_blocking(pool: str, func, *args, **kwargs):
+    """Shortcut: `await run_blocking("quotes", stock_service.get_live_quote, "AAPL")`."""
+    return await get_executor(pool).run(func, *args, **kwargs)
+
+
+async def stream_blocking(pool: str, func, *args, **kwargs):
+    """
+    Run `func(emit, *args, **kwargs)` on a pool and yield whatever it emits.
+
+    `emit(item)` is safe to call from the worker thread; items are handed to
+    the event loop in order. If `func` raises, the error is re-raised after
+    the items emitted before it. When the consumer stops early (e.g. the
+    client disconnected) the next `emit` raises StreamCancelled in the worker
+    so it can stop doing work nobody will read.
+    """
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+    cancelled = threading.Event()
+    done = object()
+
+    def emit(item):
+        if cancelled.is_set():
+            raise StreamCancelled()
+        loop.call_soon_threadsafe(queue.put_nowait, item)
+
+    task = asyncio.ensure_future(run_blocking(pool, func, emit, *args, **kwargs))
+    task.add_done_callback(lambda _: queue.put_nowait(done))
+    try:
+        while True:
+            item = await queue.get()
+            if item is done:
+                break
+            yield item
+        await task  # Re-raise the worker's exception, if any
+    finally:
+        if not task.done():
+            cancelled.set()
+            task.cancel()
+
+
+def executor_metrics() -> dict:
+    with _registry_lock:
+        executors = dict(_executors)
+    return {name: executor.metrics() for name, executor in executors.items()}
+
+
+def shutdown_executors():
+    with _registry_lock:
+        executors = list(_executors.values())
+        _executors.clear()
+    for executor in executors:
+        executor.shutdown()
@@ -0,0 +1,232 @@
+import heapq
+import itertools
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from fastapi import HTTPException
+from server.core.executors import current_ticket
+
+# Lower runs first
+PRIORITY_INTERACTIVE = 0  # Agent chat: a user is watching the reply
+PRIORITY_NORMAL = 1  # Investment plans (user waiting on the form)
+PRIORITY_BACKGROUND = 2  # Stock analysis and other fire-and-forget work
+
+PRIORITY_NAMES = {
+    PRIORITY_INTERACTIVE: "interactive",
+    PRIORITY_NORMAL: "normal",
+    PRIORITY_BACKGROUND: "background",
+}
+
+# Per-model limits, configurable via env, e.g. INFERENCE_OLLAMA_CONCURRENCY=1,
+# INFERENCE_OLLAMA_QUEUE=16. A single local Ollama serves only a few
+# generations at once; the cloud API takes more.
+_DEFAULTS = {
+    "ollama": {"concurrency": 2, "queue": 32},
+    "groq": {"concurrency": 8, "queue": 64},
+    # Hugging Face inference API (news ranking batches)
+    "hf": {"concurrency": 4, "queue": 64},
+}
+
+# How often queued callers re-check their deadline / cancellation
+_POLL_SECONDS = 0.5
+
+
+class InferenceUnavailableError(HTTPException):
+    """Raised when a model's queue is full or a queued call is dropped."""
+
+    def __init__(self, model: str, reason: str):
+        super().__init__(status_code=503, detail=f"AI busy ({model}): {reason}")
+        self.model = model
+
+
+class _Waiter:
+    __slots__ = ("priority", "ticket", "granted", "abandoned")
+
+    def __init__(self, priority, ticket):
+        self.priority = priority
+        self.ticket = ticket
+        self.granted = False
+        self.abandoned = False
+
+
+class _ModelQueue:
+    """In-flight limit + priority queue (FIFO within a priority) for one model."""
+
+    def __init__(self, name: str, concurrency: int, max_queue: int):
+        self.name = name
+        self.concurrency = concurrency
+        self.max_queue = max_queue
+        self.cond = threading.Condition()
+        self.heap = []
+        self.in_flight = 0
+        self.waiting = 0
+
+        # Metrics (guarded by cond)
+        self.granted = 0
+        self.rejected = 0
+        self.dropped_deadline = 0
+        self.dropped_cancelled = 0
+        self.max_queue_seen = 0
+        self.wait_totals = {p: [0, 0.0, 0.0] for p in PRIORITY_NAMES}  # count, sum, max
+
+    def acquire(self, priority: int, ticket):
+        waiter = _Waiter(priority, ticket)
+        enqueued_at = time.monotonic()
+        with self.cond:
+            if self.in_flight < self.concurrency and not self.waiting:
+                self.in_flight += 1
+                self._granted_locked(priority, 0.0)
+                return
+
+            if self.waiting >= self.max_queue:
+                self.rejected += 1
+                raise InferenceUnavailableError(self.name, "queue is full")
+
+            heapq.heappush(self.heap, (priority, next(_sequence), waiter))
+            self.waiting += 1
+            self.max_queue_seen = max(self.max_queue_seen, self.waiting)
+
+            while not waiter.granted:
+                if ticket is not None and ticket.expired():
+                    waiter.abandoned = True
+                    self.waiting -= 1
+                    self._count_drop_locked(ticket)
+                    raise InferenceUnavailableError(self.name, self._drop_reason(ticket))
+                timeout = _POLL_SECONDS
+                remaining = ticket.remaining() if ticket is not None else None
+                if remaining is not None:
+                    timeout = max(0.0, min(timeout, remaining))
+                self.cond.wait(timeout)
+
+            self._granted_locked(priority, time.monotonic() - enqueued_at)
+
+    def release(self):
+        with self.cond:
+            self.in_flight -= 1
+            self._dispatch_locked()
+
+    def _dispatch_locked(self):
+        while self.in_flight < self.concurrency and self.heap:
+            _, _, waiter = heapq.heappop(self.heap)
+            if waiter.abandoned:
+                continue
+            if waiter.ticket is not None and waiter.ticket.expired():
+                # Nobody is waiting for this answer any more: skip it
+                waiter.abandoned = True
+                self.waiting -= 1
+                self._count_drop_locked(waiter.ticket)
+                continue
+            waiter.granted = True
+            self.waiting -= 1
+            self.in_flight += 1
+        self.cond.notify_all()
+
+    def _granted_locked(self, priority: int, waited: float):
+        self.granted += 1
+        totals = self.wait_totals.setdefault(priority, [0, 0.0, 0.0])
+        totals[0] += 1
+        totals[1] += waited
+        totals[2] = max(totals[2], waited)
+
+    def _count_drop_locked(self, ticket):
+        if ticket.cancelled.is_set():
+            self.dropped_cancelled += 1
+        else:
+            self.dropped_deadline += 1
+
+    @staticmethod
+    def _drop_reason(ticket) -> str:
+        if ticket.cancelled.is_set():
+            return "request was cancelled while queued"
+        return "deadline passed while queued"
+
+    def metrics(self) -> dict:
+        with self.cond:
+            return {
+                "concurrency": self.concurrency,
+                "max_queue": self.max_queue,
+                "in_flight": self.in_flight,
+                "queue_depth": self.waiting,
+                "max_queue_depth_seen": self.max_queue_seen,
+                "granted": self.granted,
+                "rejected": self.rejected,
+                "dropped_deadline": self.dropped_deadline,
+                "dropped_cancelled": self.dropped_cancelled,
+                "wait_ms": {
+                    PRIORITY_NAMES.get(p, str(p)): {
+                        "count": count,
+                        "avg": round(total / count * 1000, 2) if count else 0.0,
+                        "max": round(worst * 1000, 2),
+                    }
+                    for p, (count, total, worst) in self.wait_totals.items()
+                },
+            }
+
+
+_sequence = itertools.count()
+
+
+class InferenceScheduler:
+    """
+    Governs how many LLM generations run at once per model.
+
+    Callers wrap each model call in `with inference_scheduler.slot(model, priority)`.
+    When the model is at its in-flight limit, callers queue by priority (chat
+    before plans before background analysis). A queued call is dropped once
+    its CallTicket (see executors.run_blocking) has expired or been cancelled,
+    so work whose client has gone away never reaches the model, and a full
+    queue is rejected up front with 503 instead of timing everyone out.
+    Slots are re-entrant per thread (an agent run that summarizes its memory
+    with the same model does not wait on itself).
+    """
+
+    def __init__(self):
+        self._models = {}
+        self._lock = threading.Lock()
+        self._held = threading.local()
+
+    def _queue(self, model: str) -> _ModelQueue:
+        with self._lock:
+            queue = self._models.get(model)
+            if queue is None:
+                defaults = _DEFAULTS.get(model, {"concurrency": 4, "queue": 32})
+                prefix = f"INFERENCE_{model.upper()}"
+                queue = _ModelQueue(
+                    model,
+                    concurrency=int(os.getenv(f"{prefix}_CONCURRENCY", defaults["concurrency"])),
+                    max_queue=int(os.getenv(f"{prefix}_QUEUE", defaults["queue"])),
+                )
+                self._models[model] = queue
+            return queue
+
+    @contextmanager
+    def slot(self, model: str, priority: int = PRIORITY_NORMAL):
+        held = getattr(self._held, "models", None)
+        if held is None:
+            held = self._held.models = {}
+        if held.get(model):
+            held[model] += 1
+            try:
+                yield
+            finally:
+                held[model] -= 1
+            return
+
+        queue = self._queue(model)
+        queue.acquire(priority, current_ticket.get())
+        held[model] = 1
+        try:
+            yield
+        finally:
+            held[model] = 0
+            queue.release()
+
+    def metrics(self) -> dict:
+        with self._lock:
+            models = dict(self._models)
+        return {name: queue.metrics() for name, queue in models.items()}
+
+
+inference_scheduler = InferenceScheduler()
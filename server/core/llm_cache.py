@@ -0,0 +1,246 @@
+import hashlib
+import json
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", os.path.join(DEFAULT_DATA_DIR, "llm_cache.db"))
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "1") == "1"
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "2000"))
+# Prices and amounts in a prompt are bucketed to this relative width (0.05 = 5%),
+# so "AAPL at 187.10 USD" and "AAPL at 187.90 USD" share one cached answer
+LLM_CACHE_BUCKET = float(os.getenv("LLM_CACHE_BUCKET", "0.05"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key        TEXT PRIMARY KEY,
+    namespace  TEXT NOT NULL,
+    prompt     TEXT NOT NULL,
+    response   TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    last_hit   REAL NOT NULL,
+    hits       INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS responses_last_hit ON responses (last_hit);
+"""
+
+_NUMBER = r"\d[\d,]*(?:\.\d+)?"
+# Only money slots are bucketed ("$5,000", "187.10 usd", "300 dollars");
+# years, counts and other numbers stay exact
+_MONEY = re.compile(rf"(\$\s?)({_NUMBER})|({_NUMBER})(\s?(?:usd|dollars?)\b)")
+
+
+def bucket_number(value: float, relative_step: float = LLM_CACHE_BUCKET) -> str:
+    """Index of the log-scale bucket holding `value`; each bucket is `relative_step` wide."""
+    if value <= 0 or relative_step <= 0:
+        return f"{value:g}"
+    return f"~{round(math.log(value) / math.log1p(relative_step))}"
+
+
+def normalize_prompt(prompt: str, relative_step: float = LLM_CACHE_BUCKET) -> str:
+    """Case/whitespace-insensitive prompt with prices and amounts bucketed."""
+    text = " ".join(prompt.lower().split())
+
+    def bucket(match):
+        dollar, leading, trailing, unit = match.groups()
+        number = leading or trailing
+        bucketed = bucket_number(float(number.replace(",", "")), relative_step)
+        return f"{dollar}{bucketed}" if leading else f"{bucketed}{unit}"
+
+    return _MONEY.sub(bucket, text)
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class LLMResponseCache:
+    """
+    Persistent (SQLite) cache of LLM responses keyed on a normalized prompt.
+
+    Entries carry their own TTL; beyond `max_entries` the least recently hit
+    ones are evicted. `get_or_compute` runs one LLM call per key at a time -
+    concurrent identical requests wait for it instead of repeating it.
+    Values are stored as JSON, so strings and dicts both round-trip.
+    """
+
+    def __init__(
+        self,
+        path: str = LLM_CACHE_PATH,
+        max_entries: int = LLM_CACHE_MAX_ENTRIES,
+        relative_step: float = LLM_CACHE_BUCKET,
+        enabled: bool = LLM_CACHE_ENABLED,
+    ):
+        self.path = path
+        self.max_entries = max_entries
+        self.relative_step = relative_step
+        self.enabled = enabled
+        self._write_lock = threading.Lock()
+        self._flights = {}
+        self._flights_lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0, "expired": 0}
+        self._namespace_stats = {}
+
+        if self.enabled:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            with self._connect() as conn:
+                conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+
+    def make_key(self, namespace: str, prompt: str) -> tuple[str, str]:
+        """(sha256 key, normalized prompt) for a namespace such as 'analysis:<model>'."""
+        normalized = normalize_prompt(prompt, self.relative_step)
+        digest = hashlib.sha256(f"{namespace}\n{normalized}".encode("utf-8")).hexdigest()
+        return digest, normalized
+
+    # --- Lookups ---
+
+    def get(self, namespace: str, prompt: str):
+        """Cached response or None."""
+        if not self.enabled:
+            return None
+        key, _ = self.make_key(namespace, prompt)
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT response, expires_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+        if row is not None and row[1] <= now:
+            self._delete(key)
+            self._count(namespace, "expired")
+            row = None
+        if row is None:
+            self._count(namespace, "misses")
+            return None
+
+        with self._write_lock, self._connect() as conn:
+            conn.execute(
+                "UPDATE responses SET hits = hits + 1, last_hit = ? WHERE key = ?", (now, key)
+            )
+        self._count(namespace, "hits")
+        return json.loads(row[0])
+
+    def set(self, namespace: str, prompt: str, response, ttl_seconds: float):
+        if not self.enabled:
+            return
+        key, normalized = self.make_key(namespace, prompt)
+        now = time.time()
+        with self._write_lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(key, namespace, prompt, response, created_at, expires_at, last_hit, hits) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, 0)",
+                (key, namespace, normalized, json.dumps(response), now, now + ttl_seconds, now),
+            )
+            self._evict_locked(conn, now)
+        self._count(namespace, "stores")
+
+    def get_or_compute(self, namespace: str, prompt: str, ttl_seconds: float, compute, cacheable=None):
+        """
+        Return the cached response, or run `compute()` (once per key across
+        threads) and store its result when `cacheable(result)` allows it.
+        Exceptions are never cached.
+        """
+        cached = self.get(namespace, prompt)
+        if cached is not None:
+            return cached
+        if not self.enabled:
+            return compute()
+
+        key, _ = self.make_key(namespace, prompt)
+        with self._flights_lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            value = compute()
+            if value is not None and (cacheable is None or cacheable(value)):
+                self.set(namespace, prompt, value, ttl_seconds)
+            flight.value = value
+            return value
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._flights_lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+    # --- Maintenance ---
+
+    def purge_expired(self) -> int:
+        if not self.enabled:
+            return 0
+        with self._write_lock, self._connect() as conn:
+            removed = conn.execute(
+                "DELETE FROM responses WHERE expires_at <= ?", (time.time(),)
+            ).rowcount
+        self._stats["expired"] += removed
+        return removed
+
+    def stats(self) -> dict:
+        entries = 0
+        if self.enabled:
+            with self._connect() as conn:
+                entries = conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        lookups = self._stats["hits"] + self._stats["misses"]
+        return {
+            "enabled": self.enabled,
+            "entries": entries,
+            "max_entries": self.max_entries,
+            **self._stats,
+            "hit_rate": round(self._stats["hits"] / lookups, 3) if lookups else 0.0,
+            "namespaces": {k: dict(v) for k, v in self._namespace_stats.items()},
+        }
+
+    # --- Internals ---
+
+    def _evict_locked(self, conn, now: float):
+        expired = conn.execute("DELETE FROM responses WHERE expires_at <= ?", (now,)).rowcount
+        self._stats["expired"] += expired
+        overflow = conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0] - self.max_entries
+        if overflow > 0:
+            conn.execute(
+                "DELETE FROM responses WHERE key IN "
+                "(SELECT key FROM responses ORDER BY last_hit LIMIT ?)",
+                (overflow,),
+            )
+            self._stats["evictions"] += overflow
+
+    def _delete(self, key: str):
+        with self._write_lock, self._connect() as conn:
+            conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+
+    def _count(self, namespace: str, field: str):
+        # Plain counters (GIL-atomic enough for metrics)
+        self._stats[field] += 1
+        if field in ("hits", "misses"):
+            base = namespace.split(":", 1)[0]
+            per_namespace = self._namespace_stats.setdefault(base, {"hits": 0, "misses": 0})
+            per_namespace[field] += 1
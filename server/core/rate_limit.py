@@ -0,0 +1,64 @@
+import asyncio
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket shared by sync and async callers.
+
+    Tokens refill at `rate` per second up to `capacity` (the allowed burst).
+    `acquire()` blocks the calling thread and `acquire_async()` awaits until
+    a token is free, so every caller together stays under one quota.
+    """
+
+    def __init__(self, rate: float, capacity: float, name: str = "bucket"):
+        self.rate = rate
+        self.capacity = capacity
+        self.name = name
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+        # Metrics
+        self.granted = 0
+        self.waited = 0
+        self.total_wait_seconds = 0.0
+
+    def _reserve(self) -> float:
+        """Take a token (possibly going negative) and return how long to wait for it."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            self.granted += 1
+            wait = max(0.0, -self._tokens / self.rate)
+            if wait > 0:
+                self.waited += 1
+                self.total_wait_seconds += wait
+            return wait
+
+    def acquire(self):
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "rate_per_second": self.rate,
+                "capacity": self.capacity,
+                "granted": self.granted,
+                "waited": self.waited,
+                "avg_wait_ms": (
+                    round(self.total_wait_seconds / self.granted * 1000, 2)
+                    if self.granted
+                    else 0.0
+                ),
+            }
@@ -0,0 +1,207 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+_MISSING = object()
+
+
+class _Flight:
+    """A single in-progress load that concurrent callers wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class TTLCache:
+    """
+    Thread-safe in-process cache with per-entry TTL and bounded LRU eviction.
+
+    `get_or_load` adds single-flight deduplication: when several threads miss on
+    the same key at once, only one of them runs the loader and the others wait
+    for (and share) its result.
+
+    With `sliding=True` every hit pushes the expiry forward, so the TTL becomes
+    an idle timeout (entries in active use never expire). `on_evict(key, value)`
+    is called (outside the lock) for entries dropped by expiry or LRU pressure.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float,
+        max_size: int = 256,
+        name: str = "cache",
+        sliding: bool = False,
+        on_evict=None,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self.name = name
+        self.sliding = sliding
+        self.on_evict = on_evict
+
+        self._data = OrderedDict()  # key -> (expires_at, ttl, value)
+        self._inflight = {}  # key -> _Flight
+        self._evicted = []  # (key, value) waiting for on_evict
+        self._lock = threading.Lock()
+
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+        self.evictions = 0
+
+    # --- Basic operations ---
+
+    def get(self, key, default=None):
+        with self._lock:
+            value = self._get_locked(key)
+        self._notify_evicted()
+        return default if value is _MISSING else value
+
+    def set(self, key, value, ttl_seconds: float = None):
+        with self._lock:
+            self._set_locked(key, value, ttl_seconds)
+        self._notify_evicted()
+
+    def invalidate(self, key=None):
+        """Drop a single key, or the whole cache when no key is given."""
+        with self._lock:
+            if key is None:
+                self._data.clear()
+            else:
+                self._data.pop(key, None)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+    def purge_expired(self) -> int:
+        """Drop every expired entry now (expiry is otherwise lazy)."""
+        now = time.monotonic()
+        with self._lock:
+            expired = [key for key, entry in self._data.items() if entry[0] <= now]
+            for key in expired:
+                self._evict_locked(key)
+        self._notify_evicted()
+        return len(expired)
+
+    def values(self) -> list:
+        """Snapshot of the live values (e.g. to flush them on shutdown)."""
+        now = time.monotonic()
+        with self._lock:
+            return [entry[2] for entry in self._data.values() if entry[0] > now]
+
+    # --- Single-flight loading ---
+
+    def get_or_load(self, key, loader, cache_if=lambda value: value is not None):
+        """
+        Return the cached value for `key`, or call `loader()` exactly once across
+        all concurrent callers and share its result.
+
+        Results are only stored when `cache_if(result)` is true, so failed
+        lookups (None by default) are retried on the next call.
+        """
+        with self._lock:
+            value = self._get_locked(key)
+            if value is _MISSING:
+                flight = self._inflight.get(key)
+                is_leader = flight is None
+                if is_leader:
+                    flight = _Flight()
+                    self._inflight[key] = flight
+        self._notify_evicted()
+
+        if value is not _MISSING:
+            return value
+
+        if not is_leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = loader()
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self.loads += 1
+                if flight.error is None and cache_if(flight.value):
+                    self._set_locked(key, flight.value)
+                self._inflight.pop(key, None)
+            flight.done.set()
+            self._notify_evicted()
+
+        return flight.value
+
+    def stats(self) -> dict:
+        with self._lock:
+            size = len(self._data)
+            inflight = len(self._inflight)
+        lookups = self.hits + self.misses
+        return {
+            "name": self.name,
+            "size": size,
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "sliding": self.sliding,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "loads": self.loads,
+            "evictions": self.evictions,
+            "inflight": inflight,
+        }
+
+    # --- Internal helpers (caller must hold the lock) ---
+
+    def _get_locked(self, key):
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return _MISSING
+
+        expires_at, ttl, value = entry
+        now = time.monotonic()
+        if expires_at <= now:
+            self._evict_locked(key)
+            self.misses += 1
+            return _MISSING
+
+        if self.sliding:
+            self._data[key] = (now + ttl, ttl, value)
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def _set_locked(self, key, value, ttl_seconds: float = None):
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        self._data[key] = (time.monotonic() + ttl, ttl, value)
+        self._data.move_to_end(key)
+
+        while len(self._data) > self.max_size:
+            self._evict_locked(next(iter(self._data)))
+            self.evictions += 1
+
+    def _evict_locked(self, key):
+        _, _, value = self._data.pop(key)
+        if self.on_evict is not None:
+            self._evicted.append((key, value))
+
+    # --- Eviction callbacks (called without the lock) ---
+
+    def _notify_evicted(self):
+        if not self._evicted:
+            return
+        with self._lock:
+            evicted, self._evicted = self._evicted, []
+        for key, value in evicted:
+            try:
+                self.on_evict(key, value)
+            except Exception as e:
+                print(f"⚠️ {self.name}: on_evict failed for {key}: {e}")
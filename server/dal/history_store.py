@@ -0,0 +1,152 @@
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
+HISTORY_DB_PATH = os.getenv(
+    "HISTORY_DB_PATH", os.path.join(DEFAULT_DATA_DIR, "history.db")
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS bars (
+    symbol   TEXT NOT NULL,
+    interval TEXT NOT NULL,
+    date     TEXT NOT NULL,
+    open     REAL,
+    high     REAL,
+    low      REAL,
+    close    REAL,
+    volume   REAL,
+    PRIMARY KEY (symbol, interval, date)
+);
+CREATE TABLE IF NOT EXISTS coverage (
+    symbol       TEXT NOT NULL,
+    interval     TEXT NOT NULL,
+    covered_from TEXT,
+    full_history INTEGER NOT NULL DEFAULT 0,
+    checked_at   REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (symbol, interval)
+);
+"""
+
+
+class HistoryStore:
+    """
+    Local SQLite store of OHLCV bars per (symbol, interval).
+
+    `coverage` remembers how far back we have backfilled a symbol and when we
+    last topped it up from upstream, so repeat requests are a local read.
+    """
+
+    def __init__(self, path: str = HISTORY_DB_PATH):
+        self.path = path
+        self._write_lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+
+    # --- Bars ---
+
+    def upsert_bars(self, symbol: str, interval: str, rows: list[tuple]):
+        """rows: (date 'YYYY-MM-DD', open, high, low, close, volume)."""
+        if not rows:
+            return
+        with self._write_lock, self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO bars "
+                "(symbol, interval, date, open, high, low, close, volume) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(symbol, interval, *row) for row in rows],
+            )
+
+    def read_bars(
+        self, symbol: str, interval: str, start: str = None, end: str = None
+    ) -> list[tuple]:
+        """(date, open, high, low, close, volume) rows in date order, inclusive."""
+        query = (
+            "SELECT date, open, high, low, close, volume FROM bars "
+            "WHERE symbol = ? AND interval = ?"
+        )
+        params = [symbol, interval]
+        if start:
+            query += " AND date >= ?"
+            params.append(start)
+        if end:
+            query += " AND date <= ?"
+            params.append(end)
+        query += " ORDER BY date"
+
+        with self._connect() as conn:
+            return conn.execute(query, params).fetchall()
+
+    def bounds(self, symbol: str, interval: str):
+        """(first_date, last_date) stored for a symbol, or (None, None)."""
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT MIN(date), MAX(date) FROM bars WHERE symbol = ? AND interval = ?",
+                (symbol, interval),
+            ).fetchone()
+
+    # --- Coverage bookkeeping ---
+
+    def get_coverage(self, symbol: str, interval: str):
+        """{"covered_from", "full_history", "checked_at"} or None."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT covered_from, full_history, checked_at FROM coverage "
+                "WHERE symbol = ? AND interval = ?",
+                (symbol, interval),
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "covered_from": row[0],
+            "full_history": bool(row[1]),
+            "checked_at": row[2],
+        }
+
+    def set_coverage(
+        self,
+        symbol: str,
+        interval: str,
+        covered_from: str = None,
+        full_history: bool = None,
+        checked_at: float = None,
+    ):
+        current = self.get_coverage(symbol, interval) or {
+            "covered_from": None,
+            "full_history": False,
+            "checked_at": 0,
+        }
+        if covered_from is not None:
+            current["covered_from"] = covered_from
+        if full_history is not None:
+            current["full_history"] = full_history
+        current["checked_at"] = checked_at if checked_at is not None else time.time()
+
+        with self._write_lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO coverage "
+                "(symbol, interval, covered_from, full_history, checked_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (
+                    symbol,
+                    interval,
+                    current["covered_from"],
+                    int(current["full_history"]),
+                    current["checked_at"],
+                ),
+            )
@@ -0,0 +1,170 @@
+import threading
+
+from postgrest.exceptions import APIError
+
+
+class _Response:
+    def __init__(self, data):
+        self.data = data
+
+
+class _RpcCall:
+    def __init__(self, fn, params: dict):
+        self._fn = fn
+        self._params = params
+
+    def execute(self) -> _Response:
+        return _Response(self._fn(**self._params))
+
+
+class LocalTradeDAL:
+    """
+    In-memory stand-in for the Supabase trade procedures, for tests and offline runs.
+
+    Implements the same `rpc(name, params).execute()` surface and the same
+    logic as the procedures in migrations/: one lock plays the row lock,
+    so concurrent trades serialize exactly as they do in Postgres, and errors
+    surface as postgrest APIError like the real RPC.
+
+        repo = StockRepository(dal=LocalTradeDAL())
+    """
+
+    def __init__(self):
+        self.positions = {}  # (user_id, symbol) -> {"symbol", "price", "amount", "sector"}
+        self.events = []
+        self.calls = 0
+        self._lock = threading.Lock()
+        self._procedures = {
+            "trade_buy": self._trade_buy,
+            "trade_buy_batch": self._trade_buy_batch,
+            "trade_sell": self._trade_sell,
+        }
+
+    def rpc(self, name: str, params: dict = None) -> _RpcCall:
+        if name not in self._procedures:
+            raise APIError({"message": f"function {name} does not exist", "code": "42883"})
+        return _RpcCall(self._procedures[name], params or {})
+
+    # --- Procedures ---
+
+    def _trade_buy(
+        self, p_user_id, p_symbol, p_price, p_amount, p_sector="Unknown", p_payment_info="N/A"
+    ) -> dict:
+        with self._lock:
+            self.calls += 1
+            _check_amount(p_amount)
+            position = self._add_lot(p_user_id, p_symbol, p_price, p_amount, p_sector)
+            self._append_event(
+                p_user_id,
+                p_symbol,
+                "STOCK_PURCHASED",
+                {
+                    "amount": p_amount,
+                    "price": p_price,
+                    "total": p_price * p_amount,
+                    "payment_info": p_payment_info,
+                },
+            )
+            return dict(position)
+
+    def _trade_buy_batch(self, p_user_id, p_orders, p_payment_info="N/A") -> list:
+        with self._lock:
+            self.calls += 1
+            for order in p_orders:
+                if order.get("symbol") is None or order.get("price") is None:
+                    raise APIError(
+                        {
+                            "message": "Every order needs a symbol, a price and a positive amount",
+                            "code": "P0001",
+                        }
+                    )
+                _check_amount(order.get("amount"))
+
+            touched = {}
+            for order in p_orders:
+                sector = order.get("sector") or "Unknown"
+                current = self.positions.get((p_user_id, order["symbol"]))
+                if sector == "Unknown" and current is not None and current.get("sector"):
+                    # Like the SQL upsert: an unresolved sector keeps the current one
+                    sector = current["sector"]
+                touched[order["symbol"]] = self._add_lot(
+                    p_user_id, order["symbol"], order["price"], order["amount"], sector
+                )
+                self._append_event(
+                    p_user_id,
+                    order["symbol"],
+                    "STOCK_PURCHASED",
+                    {
+                        "amount": order["amount"],
+                        "price": order["price"],
+                        "total": order["price"] * order["amount"],
+                        "payment_info": p_payment_info,
+                        "source": "basket",
+                    },
+                )
+            return [dict(position) for position in touched.values()]
+
+    def _trade_sell(self, p_user_id, p_symbol, p_price, p_amount) -> dict:
+        with self._lock:
+            self.calls += 1
+            _check_amount(p_amount)
+            key = (p_user_id, p_symbol)
+            current = self.positions.get(key)
+            if current is None:
+                raise APIError({"message": f"No shares found for {p_symbol}", "code": "P0001"})
+            held = current.get("amount") or 0
+            if p_amount > held:
+                raise APIError(
+                    {"message": f"Insufficient shares. Available: {held}", "code": "P0001"}
+                )
+
+            remaining = held - p_amount
+            if remaining <= 0:
+                del self.positions[key]
+            else:
+                current["amount"] = remaining
+
+            self._append_event(
+                p_user_id,
+                p_symbol,
+                "STOCK_SOLD",
+                {"amount": p_amount, "price": p_price, "total": p_amount * p_price},
+            )
+            return {
+                "symbol": p_symbol,
+                "amount": remaining,
+                "price": current.get("price"),
+                "sector": current.get("sector"),
+            }
+
+    def _add_lot(self, user_id, symbol: str, price: float, amount: int, sector: str) -> dict:
+        key = (user_id, symbol)
+        current = self.positions.get(key)
+        if current is None:
+            position = {"symbol": symbol, "price": price, "amount": amount}
+        else:
+            held = current.get("amount") or 0
+            total = held + amount
+            position = {
+                "symbol": symbol,
+                "price": (held * (current.get("price") or 0) + amount * price) / total,
+                "amount": total,
+            }
+        position["sector"] = sector
+        self.positions[key] = position
+        return position
+
+    def _append_event(self, user_id, symbol: str, event_type: str, payload: dict):
+        self.events.append(
+            {
+                "user_id": user_id,
+                "symbol": symbol.upper(),
+                "event_type": event_type,
+                "payload": payload,
+            }
+        )
+
+
+def _check_amount(amount):
+    if amount is None or amount <= 0:
+        raise APIError({"message": "Amount must be positive", "code": "P0001"})
@@ -0,0 +1,116 @@
+-- Atomic trade procedures, called from StockRepository via supabase .rpc().
+-- Run once in the Supabase SQL editor (or `psql -f`).
+--
+-- Each call locks the user's position row, applies the quantity / weighted
+-- average logic, appends the stock_events row and returns the new position,
+-- all in one transaction and one round trip. Concurrent trades on the same
+-- position queue on the row lock instead of overwriting each other.
+-- Requires the (user_id, symbol) unique constraint already used by upserts.
+-- server/dal/local_trades.py mirrors this logic for offline tests.
+
+create or replace function trade_buy(
+    p_user_id      stocks_watchlist.user_id%type,
+    p_symbol       text,
+    p_price        double precision,
+    p_amount       integer,
+    p_sector       text default 'Unknown',
+    p_payment_info text default 'N/A'
+) returns jsonb
+language plpgsql
+as $$
+declare
+    v_position stocks_watchlist%rowtype;
+begin
+    if p_amount is null or p_amount <= 0 then
+        raise exception 'Amount must be positive';
+    end if;
+
+    insert into stocks_watchlist as w (user_id, symbol, price, amount, sector)
+    values (p_user_id, p_symbol, p_price, p_amount, p_sector)
+    on conflict (user_id, symbol) do update set
+        -- Weighted average of the held shares and the new lot
+        price = case
+            when coalesce(w.amount, 0) + excluded.amount > 0 then
+                (coalesce(w.amount, 0) * coalesce(w.price, 0) + excluded.amount * excluded.price)
+                / (coalesce(w.amount, 0) + excluded.amount)
+            else excluded.price
+        end,
+        amount = coalesce(w.amount, 0) + excluded.amount,
+        sector = excluded.sector
+    returning * into v_position;
+
+    insert into stock_events (user_id, symbol, event_type, payload)
+    values (
+        p_user_id,
+        upper(p_symbol),
+        'STOCK_PURCHASED',
+        jsonb_build_object(
+            'amount', p_amount,
+            'price', p_price,
+            'total', p_price * p_amount,
+            'payment_info', p_payment_info
+        )
+    );
+
+    return jsonb_build_object(
+        'symbol', v_position.symbol,
+        'amount', v_position.amount,
+        'price', v_position.price,
+        'sector', v_position.sector
+    );
+end;
+$$;
+
+
+create or replace function trade_sell(
+    p_user_id stocks_watchlist.user_id%type,
+    p_symbol  text,
+    p_price   double precision,
+    p_amount  integer
+) returns jsonb
+language plpgsql
+as $$
+declare
+    v_position stocks_watchlist%rowtype;
+    v_remaining integer;
+begin
+    if p_amount is null or p_amount <= 0 then
+        raise exception 'Amount must be positive';
+    end if;
+
+    select * into v_position
+    from stocks_watchlist
+    where user_id = p_user_id and symbol = p_symbol
+    for update;
+
+    if not found then
+        raise exception 'No shares found for %', p_symbol;
+    end if;
+    if p_amount > coalesce(v_position.amount, 0) then
+        raise exception 'Insufficient shares. Available: %', coalesce(v_position.amount, 0);
+    end if;
+
+    v_remaining := v_position.amount - p_amount;
+    if v_remaining <= 0 then
+        delete from stocks_watchlist where user_id = p_user_id and symbol = p_symbol;
+    else
+        update stocks_watchlist set amount = v_remaining
+        where user_id = p_user_id and symbol = p_symbol;
+    end if;
+
+    insert into stock_events (user_id, symbol, event_type, payload)
+    values (
+        p_user_id,
+        upper(p_symbol),
+        'STOCK_SOLD',
+        jsonb_build_object('amount', p_amount, 'price', p_price, 'total', p_amount * p_price)
+    );
+
+    return jsonb_build_object(
+        'symbol', p_symbol,
+        'amount', v_remaining,
+        'price', v_position.price,
+        'sector', v_position.sector
+    );
+end;
+$$;
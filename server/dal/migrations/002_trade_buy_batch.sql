@@ -0,0 +1,77 @@
+-- Basket purchase in one call (POST /trade/batch).
+-- Run once after 001_trade_procedures.sql.
+--
+-- p_orders is a JSON array of {"symbol", "price", "amount", "sector"}.
+-- All positions are updated by one upsert and all events appended by one
+-- insert, in a single transaction: the whole basket is bought or nothing is.
+-- Lots of the same symbol are merged first (an upsert may touch a row only
+-- once), and rows are locked in symbol order so two concurrent baskets
+-- cannot deadlock. An 'Unknown' sector keeps the position's current one.
+-- Returns the new positions as a JSON array, one per symbol.
+
+create or replace function trade_buy_batch(
+    p_user_id      stocks_watchlist.user_id%type,
+    p_orders       jsonb,
+    p_payment_info text default 'N/A'
+) returns jsonb
+language plpgsql
+as $$
+declare
+    v_positions jsonb;
+begin
+    if exists (
+        select 1
+        from jsonb_to_recordset(p_orders) as o(symbol text, price double precision, amount integer)
+        where o.symbol is null or o.price is null or o.amount is null or o.amount <= 0
+    ) then
+        raise exception 'Every order needs a symbol, a price and a positive amount';
+    end if;
+
+    with lots as (
+        select
+            o.symbol,
+            sum(o.amount) as amount,
+            sum(o.amount * o.price) / sum(o.amount) as price,
+            coalesce(max(nullif(o.sector, 'Unknown')), 'Unknown') as sector
+        from jsonb_to_recordset(p_orders) as o(symbol text, price double precision, amount integer, sector text)
+        group by o.symbol
+    ),
+    upserted as (
+        insert into stocks_watchlist as w (user_id, symbol, price, amount, sector)
+        select p_user_id, l.symbol, l.price, l.amount, l.sector
+        from lots l
+        order by l.symbol
+        on conflict (user_id, symbol) do update set
+            price = (coalesce(w.amount, 0) * coalesce(w.price, 0) + excluded.amount * excluded.price)
+                    / (coalesce(w.amount, 0) + excluded.amount),
+            amount = coalesce(w.amount, 0) + excluded.amount,
+            sector = case
+                when excluded.sector = 'Unknown' then coalesce(w.sector, excluded.sector)
+                else excluded.sector
+            end
+        returning w.symbol, w.amount, w.price, w.sector
+    )
+    select coalesce(
+        jsonb_agg(jsonb_build_object('symbol', u.symbol, 'amount', u.amount, 'price', u.price, 'sector', u.sector)),
+        '[]'::jsonb
+    )
+    into v_positions
+    from upserted u;
+
+    insert into stock_events (user_id, symbol, event_type, payload)
+    select
+        p_user_id,
+        upper(o.symbol),
+        'STOCK_PURCHASED',
+        jsonb_build_object(
+            'amount', o.amount,
+            'price', o.price,
+            'total', o.price * o.amount,
+            'payment_info', p_payment_info,
+            'source', 'basket'
+        )
+    from jsonb_to_recordset(p_orders) as o(symbol text, price double precision, amount integer);
+
+    return v_positions;
+end;
+$$;
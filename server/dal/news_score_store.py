@@ -0,0 +1,99 @@
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
+NEWS_SCORE_DB_PATH = os.getenv(
+    "NEWS_SCORE_DB_PATH", os.path.join(DEFAULT_DATA_DIR, "news_scores.db")
+)
+# Headlines don't change; scores are only dropped to bound the file
+NEWS_SCORE_TTL = float(os.getenv("NEWS_SCORE_TTL", str(30 * 24 * 3600)))
+NEWS_SCORE_MAX_ENTRIES = int(os.getenv("NEWS_SCORE_MAX_ENTRIES", "50000"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS scores (
+    key        TEXT PRIMARY KEY,
+    score      REAL NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS scores_created_at ON scores (created_at);
+"""
+
+# SQLite's default limit on bound parameters per statement is 999
+_CHUNK = 500
+
+
+class NewsScoreStore:
+    """
+    Local SQLite store of news importance scores keyed by content hash.
+
+    Lookups and writes are batched (one statement per few hundred keys), so
+    a whole feed costs a couple of queries.
+    """
+
+    def __init__(
+        self,
+        path: str = NEWS_SCORE_DB_PATH,
+        ttl_seconds: float = NEWS_SCORE_TTL,
+        max_entries: int = NEWS_SCORE_MAX_ENTRIES,
+    ):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._write_lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+
+    def get_many(self, keys: list[str]) -> dict[str, float]:
+        """{key: score} for the keys that are stored and not expired."""
+        found = {}
+        if not keys:
+            return found
+        oldest = time.time() - self.ttl_seconds
+        with self._connect() as conn:
+            for start in range(0, len(keys), _CHUNK):
+                chunk = keys[start : start + _CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                rows = conn.execute(
+                    f"SELECT key, score FROM scores WHERE key IN ({placeholders}) "
+                    "AND created_at >= ?",
+                    [*chunk, oldest],
+                ).fetchall()
+                found.update(rows)
+        return found
+
+    def set_many(self, scores: dict[str, float]):
+        if not scores:
+            return
+        now = time.time()
+        with self._write_lock, self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO scores (key, score, created_at) VALUES (?, ?, ?)",
+                [(key, score, now) for key, score in scores.items()],
+            )
+            conn.execute("DELETE FROM scores WHERE created_at < ?", (now - self.ttl_seconds,))
+            overflow = conn.execute("SELECT COUNT(*) FROM scores").fetchone()[0] - self.max_entries
+            if overflow > 0:
+                conn.execute(
+                    "DELETE FROM scores WHERE key IN "
+                    "(SELECT key FROM scores ORDER BY created_at LIMIT ?)",
+                    (overflow,),
+                )
+
+    def count(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM scores").fetchone()[0]
@@ -0,0 +1,133 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
+NEWS_DB_PATH = os.getenv("NEWS_DB_PATH", os.path.join(DEFAULT_DATA_DIR, "news.db"))
+# Articles older than this are pruned
+NEWS_RETENTION_DAYS = int(os.getenv("NEWS_RETENTION_DAYS", "30"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS articles (
+    symbol       TEXT NOT NULL,
+    key          TEXT NOT NULL,
+    title        TEXT,
+    summary      TEXT,
+    url          TEXT,
+    published_at INTEGER NOT NULL,
+    PRIMARY KEY (symbol, key)
+);
+CREATE INDEX IF NOT EXISTS articles_by_time ON articles (symbol, published_at);
+CREATE TABLE IF NOT EXISTS sync_state (
+    symbol       TEXT PRIMARY KEY,
+    covered_from TEXT,
+    newest_at    INTEGER NOT NULL DEFAULT 0,
+    checked_at   REAL NOT NULL DEFAULT 0
+);
+"""
+
+
+def article_key(url: str, title: str) -> str:
+    """Dedup key: the article URL, or a hash of the headline when there is none."""
+    if url:
+        return url
+    normalized = " ".join((title or "").lower().split())
+    return "h:" + hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
+
+class NewsStore:
+    """
+    Local SQLite store of company news per symbol.
+
+    `sync_state` remembers how far back a symbol has been fetched, the newest
+    article seen and when Finnhub was last asked, so NewsService only
+    downloads what is new.
+    """
+
+    def __init__(self, path: str = NEWS_DB_PATH):
+        self.path = path
+        self._write_lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+
+    # --- Articles ---
+
+    def add_articles(self, symbol: str, articles: list[dict]) -> int:
+        """Insert normalized articles, skipping duplicates; returns how many were new."""
+        rows = [
+            (
+                symbol,
+                article_key(a.get("url"), a.get("title")),
+                a.get("title"),
+                a.get("summary"),
+                a.get("url"),
+                int(a.get("published_at") or 0),
+            )
+            for a in articles
+        ]
+        if not rows:
+            return 0
+        with self._write_lock, self._connect() as conn:
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO articles "
+                "(symbol, key, title, summary, url, published_at) VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            return conn.total_changes - before
+
+    def read_articles(self, symbol: str, since: int) -> list[dict]:
+        """Articles published at or after `since` (epoch seconds), newest first."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT title, summary, url, published_at FROM articles "
+                "WHERE symbol = ? AND published_at >= ? ORDER BY published_at DESC",
+                (symbol, since),
+            ).fetchall()
+        return [
+            {"title": title, "summary": summary, "url": url, "published_at": published_at}
+            for title, summary, url, published_at in rows
+        ]
+
+    def prune(self, retention_days: int = NEWS_RETENTION_DAYS) -> int:
+        cutoff = int(time.time()) - retention_days * 86400
+        with self._write_lock, self._connect() as conn:
+            return conn.execute(
+                "DELETE FROM articles WHERE published_at < ?", (cutoff,)
+            ).rowcount
+
+    # --- Sync bookkeeping ---
+
+    def get_sync_state(self, symbol: str):
+        """{"covered_from", "newest_at", "checked_at"} or None."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT covered_from, newest_at, checked_at FROM sync_state WHERE symbol = ?",
+                (symbol,),
+            ).fetchone()
+        if row is None:
+            return None
+        return {"covered_from": row[0], "newest_at": row[1], "checked_at": row[2]}
+
+    def set_sync_state(self, symbol: str, covered_from: str, newest_at: int, checked_at: float):
+        with self._write_lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO sync_state (symbol, covered_from, newest_at, checked_at) "
+                "VALUES (?, ?, ?, ?)",
+                (symbol, covered_from, newest_at, checked_at),
+            )
@@ -1,17 +1,52 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.middleware.gzip import GZipMiddleware
 import uvicorn
 from server.api import (
     auth_routes,
     stock_routes,
+    stream_routes,
     trade_routes,
 )  # Import the routers we created
+from server.core.event_writer import event_writer
+from server.core.executors import executor_metrics, run_blocking, shutdown_executors
+from server.core.inference import inference_scheduler
+from server.services.symbol_index import get_symbol_index, refresh_listing_if_stale
 
-app = FastAPI(title="Stock Quotes Enterprise API")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # --- Startup: background jobs ---
+    stock_routes.popular_service.start()
+    # Event log flusher (replays events spooled before a crash)
+    await run_blocking("db", event_writer.start)
+    # Symbol index (search / name resolution) built now, not on the first request
+    await run_blocking("search", get_symbol_index)
+    # Full exchange listing for the symbol index (bundled list until then)
+    listing_refresh = asyncio.create_task(run_blocking("news", refresh_listing_if_stale))
+    yield
+    # --- Shutdown ---
+    listing_refresh.cancel()
+    await stock_routes.popular_service.stop()
+    await stream_routes.quote_hub.stop()
+    stock_routes.agent_service.memory_store.flush()
+    stock_routes.news_service.close()
+    await stock_routes.news_service.aclose()
+    await run_blocking("db", event_writer.stop)
+    shutdown_executors()
+
+
+app = FastAPI(title="Stock Quotes Enterprise API", lifespan=lifespan)
+
+# Compress larger JSON payloads (history, news, popular) for the desktop client
+app.add_middleware(GZipMiddleware, minimum_size=1000)
 
 # Attach routers to the main application
 app.include_router(auth_routes.router)
 app.include_router(stock_routes.router)
 app.include_router(trade_routes.router)
+app.include_router(stream_routes.router)
 
 
 @app.get("/")
@@ -23,6 +58,55 @@ async def root():
     }
 
 
+@app.get("/metrics/executors")
+async def get_executor_metrics():
+    """Queue depth / utilization of the blocking-I/O pools (quotes, db, llm, news, search)."""
+    return executor_metrics()
+
+
+@app.get("/metrics/inference")
+async def get_inference_metrics():
+    """Per-model LLM slots: in-flight count, queue depth, waits by priority, drops."""
+    return inference_scheduler.metrics()
+
+
+@app.get("/metrics/caches")
+async def get_cache_metrics():
+    """Hit rates of the in-process caches (quotes, indicators, agent state)."""
+    return {
+        "quotes": stock_routes.stock_service.quote_cache_stats(),
+        "sectors": stock_routes.stock_service.sector_cache_stats(),
+        "indicators": stock_routes.indicator_service.cache_stats(),
+        "agent_executors": stock_routes.agent_service.executor_cache_stats(),
+        "agent_memory": stock_routes.agent_service.memory_store.stats(),
+        "news": stock_routes.news_service.cache_stats(),
+    }
+
+
+@app.get("/metrics/events")
+async def get_event_log_metrics():
+    """Buffered stock_events writer: queue depth, batches, retries, drops, spool replay."""
+    return event_writer.stats()
+
+
+@app.get("/metrics/news-ranking")
+async def get_news_ranking_metrics():
+    """News scoring engine: cache hits, scored items, HF requests, failures."""
+    return await run_blocking("db", stock_routes.ai_service.news_ranking_stats)
+
+
+@app.get("/metrics/llm-cache")
+async def get_llm_cache_metrics():
+    """Persistent LLM response cache (analysis / investment plans)."""
+    return await run_blocking("db", stock_routes.ai_service.llm_cache_stats)
+
+
+@app.get("/metrics/quote-stream")
+async def get_quote_stream_metrics():
+    """Active per-symbol pollers and WebSocket subscriptions."""
+    return stream_routes.quote_hub.stats()
+
+
 # --- Run server ---
 if __name__ == "__main__":
     print("🚀 Starting Server on http://127.0.0.1:8000")
@@ -1,23 +1,27 @@
+from postgrest.exceptions import APIError
+from server.core.event_writer import event_writer, new_event_row
 from server.dal.supabase_client import SupabaseDAL
 
 
 class StockRepository:
-    def __init__(self):
-        # Use only self.dal!
-        self.dal = SupabaseDAL.get_instance()
-
-    def record_event(self, symbol: str, event_type: str, payload: dict, user_id: str):
+    def __init__(self, dal=None, events=None):
+        # Use only self.dal! (tests pass a stand-in such as dal.local_trades.LocalTradeDAL)
+        self.dal = dal or SupabaseDAL.get_instance()
+        # stock_events inserts go through the shared buffered writer
+        self.events = events or event_writer
+
+    def record_event(
+        self, symbol: str, event_type: str, payload: dict, user_id: str, sync: bool = False
+    ):
         """
-        Save an event into the history table (logic centralized in the Repo).
+        Queue an event for the history table (logic centralized in the Repo).
+        Events are bulk-inserted in the background by the EventWriter; with
+        `sync=True` this returns only once the row is in the DB.
+        Returns (row, persisted): persisted is False for a queued event.
         """
-        event_data = {
-            "user_id": user_id,
-            "symbol": symbol.upper(),
-            "event_type": event_type,
-            "payload": payload,
-            # `created_at` is set automatically in the DB (or could be set here)
-        }
-        return self.dal.table("stock_events").insert(event_data).execute()
+        row = new_event_row(symbol, event_type, payload, user_id)
+        persisted = self.events.submit(row, wait=sync)
+        return row, persisted and sync
 
     def get_watchlist(self, user_id: str = None):
         query = self.dal.table("stocks_watchlist").select("*")
@@ -67,70 +71,44 @@ class StockRepository:
         user_id: str = None,
     ):
         """
-        Smart buy execution: weighted average calculation + event logging.
+        Atomic buy (trade_buy procedure): weighted average + event logging
+        in one round trip. Returns the new position.
         """
-        print(f"🔄 Starting SMART buy_stock for {symbol}...")
-
-        # 1. Log the event
-        self.record_event(
-            symbol,
-            "STOCK_PURCHASED",
+        print(f"🔄 Starting atomic buy_stock for {symbol}...")
+        position = self._call_trade(
+            "trade_buy",
             {
-                "amount": amount_to_buy,
-                "price": price,
-                "total": price * amount_to_buy,
-                "payment_info": (
+                "p_user_id": user_id,
+                "p_symbol": symbol,
+                "p_price": price,
+                "p_amount": amount_to_buy,
+                "p_sector": sector,
+                "p_payment_info": (
                     card_details.get("card_number")[-4:] if card_details else "N/A"
                 ),
             },
-            user_id=user_id,
         )
+        print(f"💾 Position after buy: {position}")
+        return position
 
-        # 2. Compute the weighted average
-        try:
-            existing_row = (
-                self.dal.table("stocks_watchlist")
-                .select("*")
-                .eq("symbol", symbol)
-                .eq("user_id", user_id)
-                .execute()
-            )
-
-            new_total_amount = amount_to_buy
-            new_avg_price = price
-
-            if existing_row.data and len(existing_row.data) > 0:
-                current_data = existing_row.data[0]
-                current_amount = current_data.get("amount", 0)
-                current_avg_price = current_data.get("price", 0)
-
-                # Weighted calculation
-                if current_amount + amount_to_buy > 0:
-                    total_cost = (current_amount * current_avg_price) + (
-                        amount_to_buy * price
-                    )
-                    new_total_amount = current_amount + amount_to_buy
-                    new_avg_price = total_cost / new_total_amount
-
-            # 3. Persist
-            view_data = {
-                "user_id": user_id,
-                "symbol": symbol,
-                "price": new_avg_price,
-                "amount": new_total_amount,
-                "sector": sector,
-            }
-
-            print(f"💾 Saving SMART data: {view_data}")
-            return (
-                self.dal.table("stocks_watchlist")
-                .upsert(view_data, on_conflict="user_id, symbol")
-                .execute()
-            )
-
-        except Exception as e:
-            print(f"❌ Error in buy_stock: {e}")
-            raise e
+    def buy_batch(self, orders: list[dict], card_details: dict = None, user_id: str = None):
+        """
+        Buy a whole basket atomically (trade_buy_batch procedure): one bulk
+        position upsert + one bulk event insert in a single round trip.
+        `orders` are {"symbol", "price", "amount", "sector"}; returns the new
+        positions, one per symbol.
+        """
+        print(f"🧺 Repository: Executing basket of {len(orders)} orders...")
+        return self._call_trade(
+            "trade_buy_batch",
+            {
+                "p_user_id": user_id,
+                "p_orders": orders,
+                "p_payment_info": (
+                    card_details.get("card_number")[-4:] if card_details else "N/A"
+                ),
+            },
+        )
 
     def sell_stock(
         self,
@@ -140,55 +118,26 @@ class StockRepository:
         user_id: str = None,
     ):
         """
-        Centralized sell logic: update quantity or delete if everything was sold.
+        Atomic sell (trade_sell procedure): update quantity or delete if
+        everything was sold, and log the event, in one round trip.
         """
         print(f"📉 Repository: Processing sale for {symbol}...")
+        position = self._call_trade(
+            "trade_sell",
+            {
+                "p_user_id": user_id,
+                "p_symbol": symbol,
+                "p_price": current_price,
+                "p_amount": amount_to_sell,
+            },
+        )
+        return {"status": "success", "remaining_qty": position["amount"], "position": position}
 
+    def _call_trade(self, procedure: str, params: dict) -> dict:
+        """Run a trade procedure (see dal/migrations/)."""
         try:
-            # 1. Check current state in the watchlist
-            watchlist_res = (
-                self.dal.table("stocks_watchlist")
-                .select("*")
-                .eq("symbol", symbol)
-                .eq("user_id", user_id)
-                .execute()
-            )
-
-            if not watchlist_res.data:
-                raise ValueError(f"No shares found for {symbol}")
-
-            current_data = watchlist_res.data[0]
-            current_qty = current_data.get("amount", 0)
-
-            if amount_to_sell > current_qty:
-                raise ValueError(f"Insufficient shares. Available: {current_qty}")
-
-            new_qty = current_qty - amount_to_sell
-
-            # 2. Apply the action: update or delete
-            if new_qty <= 0:
-                self.dal.table("stocks_watchlist").delete().eq("symbol", symbol).eq(
-                    "user_id", user_id
-                ).execute()
-            else:
-                self.dal.table("stocks_watchlist").update({"amount": new_qty}).eq(
-                    "symbol", symbol
-                ).eq("user_id", user_id).execute()
-
-            # 3. Log the event in history
-            self.record_event(
-                symbol,
-                "STOCK_SOLD",
-                {
-                    "amount": amount_to_sell,
-                    "price": current_price,
-                    "total": amount_to_sell * current_price,
-                },
-                user_id=user_id,
-            )
-
-            return {"status": "success", "remaining_qty": new_qty}
-
-        except Exception as e:
-            print(f"❌ Error in sell_stock logic: {e}")
-            raise e
+            return self.dal.rpc(procedure, params).execute().data
+        except APIError as e:
+            # `raise exception` in the procedure (no shares, insufficient shares...)
+            print(f"❌ Error in {procedure}: {e.message}")
+            raise ValueError(e.message) from e
@@ -0,0 +1,235 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Optional
+
+from langchain.memory import ConversationBufferMemory
+from langchain_core.messages import (
+    SystemMessage,
+    messages_from_dict,
+    messages_to_dict,
+)
+from server.core.ttl_cache import TTLCache
+
+# Rough prompt budget for the remembered conversation (per user)
+AGENT_MEMORY_TOKEN_BUDGET = int(os.getenv("AGENT_MEMORY_TOKEN_BUDGET", "1500"))
+# When over budget, prune down to this fraction so we don't summarize every turn
+AGENT_MEMORY_PRUNE_TO = float(os.getenv("AGENT_MEMORY_PRUNE_TO", "0.6"))
+AGENT_MEMORY_SUMMARY_CHARS = int(os.getenv("AGENT_MEMORY_SUMMARY_CHARS", "1200"))
+
+AGENT_MEMORY_MAX_USERS = int(os.getenv("AGENT_MEMORY_MAX_USERS", "500"))
+AGENT_MEMORY_IDLE_TTL = float(os.getenv("AGENT_MEMORY_IDLE_TTL", "1800"))
+AGENT_MEMORY_SPILL = os.getenv("AGENT_MEMORY_SPILL", "1") == "1"
+AGENT_MEMORY_DIR = os.getenv(
+    "AGENT_MEMORY_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "agent_memory"),
+)
+# How often idle users are swept out (expiry is otherwise lazy)
+AGENT_MEMORY_SWEEP_SECONDS = 60
+
+
+def estimate_tokens(text: str) -> int:
+    """~4 characters per token; close enough for budgeting English chat."""
+    return len(text) // 4 + 1
+
+
+def extractive_summary(previous: str, messages: list) -> str:
+    """Cheap fallback summary: the start of every pruned user message."""
+    lines = [previous] if previous else []
+    for message in messages:
+        if message.type == "human":
+            lines.append(f"- User asked: {message.content[:120]}")
+    return "\n".join(lines)
+
+
+class BudgetedConversationMemory(ConversationBufferMemory):
+    """
+    Conversation buffer with a token budget.
+
+    Recent turns are kept verbatim; once the buffer exceeds the budget the
+    oldest turns are folded into a running summary (via `summarizer`, or an
+    extractive fallback), so the prompt size stays roughly constant however
+    long the session runs.
+    """
+
+    user_id: str = ""
+    max_token_limit: int = AGENT_MEMORY_TOKEN_BUDGET
+    summary: str = ""
+    summarizer: Optional[Callable[[str, list], str]] = None
+    last_used: float = 0.0
+
+    @property
+    def buffer_as_messages(self) -> list:
+        messages = list(self.chat_memory.messages)
+        if self.summary:
+            messages.insert(
+                0, SystemMessage(content=f"Summary of earlier conversation:\n{self.summary}")
+            )
+        return messages
+
+    @property
+    def buffer_as_str(self) -> str:
+        return self._buffer_as_str(self.buffer_as_messages)
+
+    def save_context(self, inputs: dict[str, Any], outputs: dict[str, str]) -> None:
+        super().save_context(inputs, outputs)
+        self.last_used = time.time()
+        self.prune()
+
+    def save_context_cheap(self, inputs: dict[str, Any], outputs: dict[str, str]) -> None:
+        """save_context for latency-critical paths: never calls the LLM summarizer."""
+        super().save_context(inputs, outputs)
+        self.last_used = time.time()
+        self.prune(use_summarizer=False)
+
+    def token_count(self) -> int:
+        return sum(estimate_tokens(m.content) for m in self.chat_memory.messages)
+
+    def prune(self, use_summarizer: bool = True):
+        """Fold the oldest turns into the summary while over budget."""
+        if self.token_count() <= self.max_token_limit:
+            return
+
+        messages = list(self.chat_memory.messages)
+        target = int(self.max_token_limit * AGENT_MEMORY_PRUNE_TO)
+        total = self.token_count()
+        pruned = []
+        # Keep at least the latest exchange verbatim
+        while len(messages) > 2 and total > target:
+            message = messages.pop(0)
+            total -= estimate_tokens(message.content)
+            pruned.append(message)
+
+        if not pruned:
+            return
+
+        summary = None
+        if use_summarizer and self.summarizer is not None:
+            try:
+                summary = self.summarizer(self.summary, pruned)
+            except Exception as e:
+                print(f"⚠️ Memory summarizer failed, using extractive summary: {e}")
+        if not summary:
+            summary = extractive_summary(self.summary, pruned)
+
+        self.summary = summary.strip()[-AGENT_MEMORY_SUMMARY_CHARS:]
+        self.chat_memory.clear()
+        self.chat_memory.add_messages(messages)
+
+    def clear(self) -> None:
+        super().clear()
+        self.summary = ""
+
+    # --- Serialization (spill to disk) ---
+
+    def to_dict(self) -> dict:
+        return {
+            "summary": self.summary,
+            "messages": messages_to_dict(self.chat_memory.messages),
+            "last_used": self.last_used,
+        }
+
+    def load_dict(self, data: dict):
+        self.summary = data.get("summary", "")
+        self.last_used = data.get("last_used", 0.0)
+        self.chat_memory.clear()
+        self.chat_memory.add_messages(messages_from_dict(data.get("messages", [])))
+
+
+class AgentMemoryStore:
+    """
+    Per-user conversation memories with a global bound.
+
+    Idle users are evicted after AGENT_MEMORY_IDLE_TTL (and the least recently
+    used ones once AGENT_MEMORY_MAX_USERS is reached). With spilling enabled an
+    evicted memory is written to disk and restored on the user's next message.
+    """
+
+    def __init__(
+        self,
+        memory_factory: Callable[[], BudgetedConversationMemory],
+        spill: bool = AGENT_MEMORY_SPILL,
+        spill_dir: str = AGENT_MEMORY_DIR,
+    ):
+        self.memory_factory = memory_factory
+        self.spill = spill
+        self.spill_dir = spill_dir
+        self._memories = TTLCache(
+            ttl_seconds=AGENT_MEMORY_IDLE_TTL,
+            max_size=AGENT_MEMORY_MAX_USERS,
+            name="agent_memory",
+            sliding=True,
+            on_evict=self._on_evict,
+        )
+        self._last_sweep = time.monotonic()
+        self._sweep_lock = threading.Lock()
+        self.spilled = 0
+        self.restored = 0
+
+        if self.spill:
+            os.makedirs(self.spill_dir, exist_ok=True)
+
+    def get(self, user_id: str) -> BudgetedConversationMemory:
+        self._maybe_sweep()
+        return self._memories.get_or_load(user_id, lambda: self._load(user_id))
+
+    def flush(self):
+        """Spill every live memory (called on shutdown)."""
+        if not self.spill:
+            return
+        for memory in self._memories.values():
+            self._write(memory)
+
+    def stats(self) -> dict:
+        return {
+            **self._memories.stats(),
+            "spill": self.spill,
+            "spilled": self.spilled,
+            "restored": self.restored,
+        }
+
+    # --- Internals ---
+
+    def _path(self, user_id: str) -> str:
+        digest = hashlib.sha1(user_id.encode("utf-8")).hexdigest()
+        return os.path.join(self.spill_dir, f"{digest}.json")
+
+    def _load(self, user_id: str) -> BudgetedConversationMemory:
+        memory = self.memory_factory()
+        memory.user_id = user_id
+        path = self._path(user_id)
+        if self.spill and os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    memory.load_dict(json.load(f))
+                os.remove(path)
+                self.restored += 1
+            except Exception as e:
+                print(f"⚠️ Could not restore memory for {user_id}: {e}")
+        return memory
+
+    def _on_evict(self, user_id: str, memory: BudgetedConversationMemory):
+        if self.spill and (memory.chat_memory.messages or memory.summary):
+            self._write(memory)
+
+    def _write(self, memory: BudgetedConversationMemory):
+        path = self._path(memory.user_id)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(memory.to_dict(), f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        self.spilled += 1
+
+    def _maybe_sweep(self):
+        now = time.monotonic()
+        if now - self._last_sweep < AGENT_MEMORY_SWEEP_SECONDS:
+            return
+        if not self._sweep_lock.acquire(blocking=False):
+            return
+        try:
+            self._last_sweep = now
+            self._memories.purge_expired()
+        finally:
+            self._sweep_lock.release()
@@ -2,15 +2,29 @@ import os
 from urllib import response
 from langchain_ollama import OllamaLLM
 from langchain.agents import initialize_agent, AgentType
-from langchain.memory import ConversationBufferMemory
 from langchain.prompts import PromptTemplate
-from server.services.agent_tools import get_stock_price, identify_intent
+from server.services.agent_tools import get_stock_price, identify_intent, stock_service
+from server.services.intent_parser import TradeIntentParser
+from server.services.symbol_index import get_symbol_index
 from server.models.agent_dto import AgentResponse
 from langchain_groq import ChatGroq
+from server.core.ttl_cache import TTLCache
+from server.core.executors import StreamCancelled
+from server.core.inference import (
+    PRIORITY_INTERACTIVE,
+    InferenceUnavailableError,
+    inference_scheduler,
+)
+from server.services.agent_stream import AgentStreamHandler
+from server.services.agent_memory import AgentMemoryStore, BudgetedConversationMemory
 
 USE_CLOUD = True
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 
+# Built agent executors are kept per user and dropped after being idle
+AGENT_EXECUTOR_CACHE_SIZE = int(os.getenv("AGENT_EXECUTOR_CACHE_SIZE", "200"))
+AGENT_EXECUTOR_IDLE_TTL = float(os.getenv("AGENT_EXECUTOR_IDLE_TTL", "1800"))
+
 
 class AgentService:
     def __init__(self):
@@ -18,17 +32,34 @@ class AgentService:
 
         # model="llama3.2:1b" - make sure this matches the exact name in your Ollama
         self.tools = [get_stock_price, identify_intent]
-        self.user_memories = {}
+        # Token-budgeted per-user memories; idle users are spilled to disk
+        self.memory_store = AgentMemoryStore(self._new_memory)
+        # Plain "buy 5 AAPL" commands skip the LLM entirely
+        self.intent_parser = TradeIntentParser(
+            symbol_resolver=lambda text: get_symbol_index().resolve(text, fuzzy=False)
+        )
+        self._executors = TTLCache(
+            ttl_seconds=AGENT_EXECUTOR_IDLE_TTL,
+            max_size=AGENT_EXECUTOR_CACHE_SIZE,
+            name="agent_executors",
+            sliding=True,
+        )
         # Model selection logic
         if USE_CLOUD and ChatGroq:
             print("🚀 Initializing Agent with CLOUD model (Groq Llama 3-8b)")
+            # streaming=True so callback handlers receive tokens as they arrive
+            self.inference_model = "groq"
             self.llm = ChatGroq(
-                temperature=0, model_name="llama-3.1-8b-instant", api_key=GROQ_API_KEY
+                temperature=0,
+                model_name="llama-3.1-8b-instant",
+                api_key=GROQ_API_KEY,
+                streaming=True,
             )
         else:
             print("🐌 Initializing Agent with LOCAL model (Ollama Llama 3)")
             # We use the generic name 'llama3' to match other environments.
             # This may fail if you don't have llama3 locally, but it's fine when USE_CLOUD=True.
+            self.inference_model = "ollama"
             self.llm = OllamaLLM(model="llama3", temperature=0)
 
         # --- 1. PREFIX: personality definition (before the tools) ---
@@ -57,15 +88,53 @@ class AgentService:
         User Request: {input}
         {agent_scratchpad}"""
 
+    def _new_memory(self) -> BudgetedConversationMemory:
+        return BudgetedConversationMemory(
+            memory_key="chat_history",
+            return_messages=True,
+            # Remember the user's own words, not the instruction-wrapped prompt
+            input_key="user_message",
+            output_key="output",
+            summarizer=self._summarize_turns,
+        )
+
     def _get_memory_for_user(self, user_id: str):
-        if user_id not in self.user_memories:
-            self.user_memories[user_id] = ConversationBufferMemory(
-                memory_key="chat_history", return_messages=True
-            )
-        return self.user_memories[user_id]
+        return self.memory_store.get(user_id)
+
+    def _summarize_turns(self, previous_summary: str, messages: list) -> str:
+        """Fold pruned chat turns into the running summary with the LLM."""
+        transcript = "\n".join(f"{m.type}: {m.content}" for m in messages)
+        prompt = (
+            "Update the summary of a conversation between a user and a financial "
+            "assistant. Keep stock symbols, amounts and the user's goals. "
+            "Answer with the summary only, under 120 words.\n\n"
+            f"Current summary:\n{previous_summary or '(none)'}\n\n"
+            f"New lines:\n{transcript}"
+        )
+        result = self.llm.invoke(prompt)
+        return getattr(result, "content", result)
 
     def _get_executor_for_user(self, user_id: str):
+        """
+        The executor (prompt, tool wrappers, output parser) is built once per
+        user and reused across chat turns until it sits idle.
+        """
+        executor = self._executors.get_or_load(
+            user_id, lambda: self._build_executor(user_id)
+        )
+        # The memory was evicted (and maybe restored from disk) since the
+        # executor was built: rebuild around the current memory object
+        if executor.memory is not self._get_memory_for_user(user_id):
+            executor = self._build_executor(user_id)
+            self._executors.set(user_id, executor)
+        return executor
+
+    def executor_cache_stats(self) -> dict:
+        return self._executors.stats()
+
+    def _build_executor(self, user_id: str):
         memory = self._get_memory_for_user(user_id)
+        print(f"🧱 Building agent executor for user {user_id}")
 
         # Use initialize_agent (most stable for this version)
         return initialize_agent(
@@ -101,7 +170,10 @@ class AgentService:
             raise ValueError("###STOP_CHAIN_FORM###")
 
         if "Final Answer:" in response:
-            clean_text = response.split("Final Answer:")[-1].strip().strip("`")
+            answer = response.split("Final Answer:")[-1]
+            # Drop LangChain's "For troubleshooting, visit: ..." footer
+            answer = answer.split("\nFor troubleshooting")[0]
+            clean_text = answer.strip().strip("`")
             # Raise a deliberate error to escape LangChain's loop
             raise ValueError(f"###STOP_CHAIN_CHAT###{clean_text}")
 
@@ -111,7 +183,58 @@ class AgentService:
 
         return f"Observation: Invalid Format. You provided: {str(error)[:50]}... Remember to use 'Action:' and 'Action Input:' on separate lines."
 
-    def process_request(self, user_input: str, user_id: str) -> AgentResponse:
+    def _fast_trade_response(self, user_input: str, user_id: str):
+        """
+        Deterministic path for simple trade commands: parse, one (cached)
+        quote lookup, and the same confirmation the agent would produce.
+        Returns None when the message isn't a plain command.
+        """
+        intent = self.intent_parser.parse(user_input)
+        if intent is None:
+            return None
+
+        quote = stock_service.get_live_quote(intent["symbol"])
+        if not quote:
+            return None
+
+        symbol = quote["symbol"]
+        price = float(quote["price"])
+        response = AgentResponse(
+            response_type="trade_confirmation",
+            message=f"I found {symbol} at ${price}. Confirm {intent['side']}?",
+            trade_payload={
+                "symbol": symbol,
+                "amount": intent["amount"],
+                "price": price,
+                "side": intent["side"],
+            },
+        )
+        print(f"⚡ Fast-path trade intent: {intent['side']} {intent['amount']} {symbol}")
+
+        # Keep the conversation history consistent with the agent path (no LLM summary here)
+        self._get_memory_for_user(user_id).save_context_cheap(
+            {"user_message": user_input}, {"output": response.message}
+        )
+        return response
+
+    def process_request_stream(self, emit, user_input: str, user_id: str) -> AgentResponse:
+        """
+        Same as process_request, but reports progress through `emit`: tool
+        calls, final-answer tokens, and finally {"type": "final", "response"}.
+        """
+        response = self.process_request(
+            user_input, user_id, callbacks=[AgentStreamHandler(emit)]
+        )
+        emit({"type": "final", "response": response.model_dump()})
+        return response
+
+    def process_request(
+        self, user_input: str, user_id: str, callbacks: list = None
+    ) -> AgentResponse:
+        fast_response = self._fast_trade_response(user_input, user_id)
+        if fast_response is not None:
+            return fast_response
+
         executor = self._get_executor_for_user(user_id)
 
         enhanced_input = (
@@ -138,8 +261,12 @@ class AgentService:
         )
 
         try:
-            # Attempt to run the agent
-            result = executor.invoke({"input": enhanced_input})
+            # Attempt to run the agent (chat outranks background LLM work)
+            with inference_scheduler.slot(self.inference_model, PRIORITY_INTERACTIVE):
+                result = executor.invoke(
+                    {"input": enhanced_input, "user_message": user_input},
+                    config={"callbacks": callbacks} if callbacks else None,
+                )
             raw_output = result["output"]
 
         except ValueError as e:
@@ -163,6 +290,8 @@ class AgentService:
                     response_type="chat",
                     message="I found the price but got stuck. Please try again.",
                 )
+        except (StreamCancelled, InferenceUnavailableError):
+            raise
         except Exception as e:
             print(f"Critical Error: {e}")
             return AgentResponse(
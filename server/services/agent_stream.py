@@ -0,0 +1,78 @@
+from langchain_core.callbacks import BaseCallbackHandler
+
+# The agent's answer starts after this marker (see AgentService.format_instructions)
+FINAL_ANSWER_MARKER = "Final Answer:"
+# Tool outputs are echoed to the client only as a short preview
+TOOL_OUTPUT_PREVIEW_CHARS = 300
+
+
+class AgentStreamHandler(BaseCallbackHandler):
+    """
+    LangChain callback handler that turns an agent run into stream events.
+
+    - {"type": "tool_start", "tool", "input"} / {"type": "tool_end", "tool", "output"}
+    - {"type": "token", "text"} for the final answer only: the ReAct
+      "Thought/Action" text before "Final Answer:" is never shown, and neither
+      are control tags such as <<CONFIRM_BUY:...>> (the final AgentResponse
+      carries those as structured data).
+
+    `emit` raising (e.g. StreamCancelled) aborts the run.
+    """
+
+    raise_error = True
+
+    def __init__(self, emit):
+        self.emit = emit
+        self._buffer = ""
+        self._answer_start = None
+        self._sent = 0
+        self._tool = None
+
+    # --- LLM tokens ---
+
+    def on_llm_start(self, serialized, prompts, **kwargs):
+        self._reset()
+
+    def on_chat_model_start(self, serialized, messages, **kwargs):
+        self._reset()
+
+    def on_llm_new_token(self, token: str, **kwargs):
+        self._buffer += token
+        if self._answer_start is None:
+            index = self._buffer.find(FINAL_ANSWER_MARKER)
+            if index < 0:
+                return
+            self._answer_start = index + len(FINAL_ANSWER_MARKER)
+            self._sent = self._answer_start
+
+        answer = self._buffer[self._answer_start :].lstrip()
+        # Tags are turned into structured responses, not shown as text
+        if answer.startswith("<") or answer.startswith("`<"):
+            return
+
+        text = self._buffer[self._sent :]
+        if self._sent == self._answer_start:
+            text = text.lstrip()
+        if text:
+            self._sent = len(self._buffer)
+            self.emit({"type": "token", "text": text})
+
+    # --- Tools ---
+
+    def on_tool_start(self, serialized, input_str, **kwargs):
+        self._tool = (serialized or {}).get("name", "tool")
+        self.emit({"type": "tool_start", "tool": self._tool, "input": str(input_str)})
+
+    def on_tool_end(self, output, **kwargs):
+        self.emit(
+            {
+                "type": "tool_end",
+                "tool": self._tool,
+                "output": str(getattr(output, "content", output))[:TOOL_OUTPUT_PREVIEW_CHARS],
+            }
+        )
+
+    def _reset(self):
+        self._buffer = ""
+        self._answer_start = None
+        self._sent = 0
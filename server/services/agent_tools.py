@@ -1,16 +1,45 @@
+import re
+
 import requests
 from langchain.tools import tool
 from server.repositories.stock_repository import StockRepository
 from server.services.stock_service import StockService
+from server.services.intent_parser import TRADE_KEYWORDS, ADVICE_KEYWORDS
+from server.services.symbol_index import get_symbol_index
+from server.core.ttl_cache import TTLCache
 
 stock_repo = StockRepository()
 stock_service = StockService()
 
+# Yahoo search results (including "not found", stored as "") for names the
+# local index can't resolve
+_ticker_search_cache = TTLCache(ttl_seconds=24 * 3600, max_size=1024, name="ticker_search")
+# Plain tickers (AAPL, BRKB, RY-TO); anything else is treated as a company name
+_TICKER_LIKE = re.compile(r"^[A-Z]{1,5}(-[A-Z]{1,2})?$")
+
 
 def search_ticker_symbol(company_name: str) -> str:
     """
     Helper function (not an AI tool) that searches for a ticker symbol by company name.
+    Resolves from the local symbol index; only unknown names go to Yahoo's
+    search endpoint, and those answers are cached.
+    """
+    symbol = get_symbol_index().resolve(company_name)
+    if symbol:
+        return symbol
+
+    key = company_name.strip().lower()
+    # Network errors (None) are not cached, "not found" ("") is
+    found = _ticker_search_cache.get_or_load(
+        key, lambda: _yahoo_ticker_search(company_name)
+    )
+    return found or None
+
+
+def _yahoo_ticker_search(company_name: str) -> str:
+    """
     Uses Yahoo Finance's autocomplete/search endpoint.
+    Returns "" when Yahoo has no match and None when the lookup failed.
     """
     try:
         url = f"https://query2.finance.yahoo.com/v1/finance/search?q={company_name}"
@@ -22,6 +51,7 @@ def search_ticker_symbol(company_name: str) -> str:
             if "quotes" in data and len(data["quotes"]) > 0:
                 # Return the first result (typically an Equity)
                 return data["quotes"][0]["symbol"]
+            return ""
     except Exception as e:
         print(f"Ticker search failed: {e}")
 
@@ -35,19 +65,24 @@ def get_stock_price(symbol: str) -> str:
     # Basic normalization
     clean_input = symbol.strip().upper().replace(".", "")
 
-    # 1. Direct lookup attempt (maybe it's already a valid ticker)
-    quote = stock_service.get_live_quote(clean_input)
+    # 1. Resolve locally first: known tickers and company names need no network
+    found_symbol = get_symbol_index().resolve(symbol)
+    quote = stock_service.get_live_quote(found_symbol) if found_symbol else None
+
+    # 2. Not in the index: try it as a ticker only if it looks like one
+    if not quote and not found_symbol and _TICKER_LIKE.match(clean_input):
+        quote = stock_service.get_live_quote(clean_input)
 
-    # 2. If not found, try searching the ticker online (the magic happens here)
-    if not quote:
-        print(f"🕵️‍♂️ Direct lookup failed for '{clean_input}', searching Yahoo...")
-        found_symbol = search_ticker_symbol(clean_input)
+    # 3. Still nothing: search the ticker online (cached)
+    if not quote and not found_symbol:
+        print(f"🕵️‍♂️ '{clean_input}' is not in the symbol index, searching online...")
+        found_symbol = search_ticker_symbol(symbol)
 
         if found_symbol:
             print(f"✅ Found symbol '{found_symbol}' for '{clean_input}'")
             quote = stock_service.get_live_quote(found_symbol)
 
-    # 3. Return a response
+    # 4. Return a response
     if quote:
         return f"The current price of {quote['symbol']} is ${quote['price']}."
 
@@ -76,11 +111,8 @@ def check_my_portfolio(user_id: str) -> str:
 def identify_intent(user_input: str) -> str:
     """This is a helper tool to identify user intent. Not meant to be called directly by the agent."""
     text = user_input.lower()
-    if any(word in text for word in ["buy", "sell", "trade"]):
+    if any(word in text for word in TRADE_KEYWORDS):
         return "TRADING"
-    if any(
-        word in text
-        for word in ["plan", "offer", "advise", "suggestion", "recommend", "advice"]
-    ):
+    if any(word in text for word in ADVICE_KEYWORDS):
         return "INVESTMENT_ADVICE"
     return "CHAT"
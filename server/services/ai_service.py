@@ -1,15 +1,35 @@
 import os
-import requests
 import json
 import re
 
 from langchain_community.llms import Ollama
+from server.core.executors import StreamCancelled
+from server.core.inference import (
+    PRIORITY_BACKGROUND,
+    PRIORITY_NORMAL,
+    InferenceUnavailableError,
+    inference_scheduler,
+)
+from server.core.llm_cache import LLMResponseCache
+from server.services.news_ranker import HFNewsRanker, LocalNewsRanker, news_text
+from server.services.symbol_index import get_symbol_index, normalize_name
 
 try:
     from huggingface_hub import InferenceClient
 except ImportError:  # huggingface-hub is optional
     InferenceClient = None
 
+GENERATOR_MODEL = "llama3.2:1b"
+PARSER_MODEL = "llama-3.3-70b-versatile"
+
+# How long cached LLM answers stay valid (the prompt key already buckets prices/amounts)
+LLM_CACHE_ANALYSIS_TTL = float(os.getenv("LLM_CACHE_ANALYSIS_TTL", str(6 * 3600)))
+LLM_CACHE_PLAN_TTL = float(os.getenv("LLM_CACHE_PLAN_TTL", str(7 * 24 * 3600)))
+
+# News ranking engine: "hf" (Hugging Face zero-shot), "local" (offline
+# lexicon model) or "auto" (HF when a token is configured, else local)
+NEWS_RANKER = os.getenv("NEWS_RANKER", "auto").lower()
+
 # --- Our addition: JSON parser model (Groq) ---
 try:
     from langchain_groq import ChatGroq
@@ -26,6 +46,9 @@ class AIService:
         # New: dedicated JSON parser LLM
         self.parser_llm = None
 
+        # Persistent cache of LLM answers for repeated prompts
+        self.response_cache = LLMResponseCache()
+
         self.hf_client = None
         self.hf_active = False
         self.hf_token = os.getenv("HF_TOKEN") or os.getenv("HUGGINGFACEHUB_API_TOKEN")
@@ -37,7 +60,7 @@ class AIService:
         try:
             from langchain_ollama import OllamaLLM
 
-            self.llm = OllamaLLM(model="llama3.2:1b")
+            self.llm = OllamaLLM(model=GENERATOR_MODEL)
             self.is_active = True
             print("✅ AI Service initialized (Local Ollama is ready)")
         except ImportError:
@@ -51,7 +74,7 @@ class AIService:
             try:
                 self.parser_llm = ChatGroq(
                     temperature=0.0,  # Temperature 0: no creativity, only extraction
-                    model_name="llama-3.3-70b-versatile",
+                    model_name=PARSER_MODEL,
                     api_key=groq_key,
                 )
                 print("✅ Cloud Parser (Groq 70B) initialized for JSON extraction")
@@ -75,11 +98,24 @@ class AIService:
                         "✅ HF Client initialized (token detected) for news AI features"
                     )
                 else:
-                    print("⚠️ HF token not set – news AI in MOCK mode")
+                    print("⚠️ HF token not set – news ranking uses the local engine")
             else:
-                print("⚠️ huggingface-hub not installed. News ranking in MOCK mode.")
+                print("⚠️ huggingface-hub not installed. News ranking uses the local engine.")
         except Exception as e:
-            print(f"⚠️ HF Client init failed: {e}. News ranking in MOCK mode.")
+            print(f"⚠️ HF Client init failed: {e}. News ranking uses the local engine.")
+
+        # News ranking engines: the local one is always loaded (also fills HF gaps)
+        self.local_news_ranker = LocalNewsRanker()
+        self.news_ranker = None
+        self.news_engine = "local"
+        if NEWS_RANKER in ("hf", "auto"):
+            if self.hf_active:
+                # Batched zero-shot ranking with a persistent score cache
+                self.news_ranker = HFNewsRanker(self.hf_token)
+                self.news_engine = "hf"
+            elif NEWS_RANKER == "hf":
+                print("⚠️ NEWS_RANKER=hf but no HF token - using the local news ranker")
+        print(f"📰 News ranking engine: {self.news_engine}")
 
     def analyze_stock(self, symbol: str, price: float) -> str:
         # Unchanged: uses the local model
@@ -92,7 +128,14 @@ class AIService:
 
         try:
             prompt = f"Analyze the stock {symbol} at {price} USD. Is it risky? Answer in 2 short sentences."
-            return self.llm.invoke(prompt)
+            return self.response_cache.get_or_compute(
+                f"analysis:{GENERATOR_MODEL}",
+                prompt,
+                LLM_CACHE_ANALYSIS_TTL,
+                lambda: self._invoke_local(prompt, PRIORITY_BACKGROUND),
+            )
+        except InferenceUnavailableError:
+            raise
         except Exception as e:
             print(f"❌ Connection to Ollama failed: {e}")
             return "AI Service is offline. Please check your Docker container."
@@ -105,190 +148,202 @@ class AIService:
         if not self.is_active or not self.llm:
             return {"plan_text": "⚠️ AI Service is unavailable.", "basket": []}
 
+        # Only complete plans are cached (a failed extraction leaves the basket empty)
+        return self.response_cache.get_or_compute(
+            self._plan_cache_namespace(),
+            prompt,
+            LLM_CACHE_PLAN_TTL,
+            lambda: self._generate_plan(prompt),
+            cacheable=lambda plan: bool(plan.get("basket")),
+        )
+
+    def _generate_plan(self, prompt: str) -> dict:
         try:
             print(
                 f"🤖 AI Service: Step 1 - Local AI (Llama 3.2) generating plan text..."
             )
-
-            # --- Step 1: local model writes the plan text (do NOT ask it for JSON) ---
-            generator_prompt = (
-                "You are an expert financial advisor. "
-                "Write a beautifully formatted, personalized investment plan using Markdown, emojis, and clear headings. "
-                "CRITICAL RULES FOR STOCKS:\n"
-                "1. Recommend ONLY real, well-known, actively traded US market stock ticker symbols (e.g., AAPL, MSFT, TSLA).\n"
-                "2. DO NOT invent or hallucinate ticker symbols!\n"
-                "3. If the user asks for Israeli market focus, ONLY use US-listed Israeli companies (like TEVA, CHKP, CYBR, NICE, MNDY).\n"
-                "4. Specify their exact percentage allocation. The percentages MUST sum to exactly 100%.\n\n"
-                f"User Request:\n{prompt}"
-            )
-
-            response = self.llm.invoke(generator_prompt)
+            response = self._invoke_local(self._plan_generator_prompt(prompt), PRIORITY_NORMAL)
             plan_text = (
                 response.content.strip()
                 if hasattr(response, "content")
                 else str(response).strip()
             )
+            return {"plan_text": plan_text, "basket": self.extract_basket(plan_text)}
 
-            basket_data = []
-
-            # --- Step 2: parser (Groq) reads the text and extracts only JSON ---
-            if self.parser_llm:
-                print(f"🧠 AI Service: Step 2 - Cloud Parser (Groq) extracting JSON...")
-                parser_prompt = (
-                    "You are a strict data extraction bot. "
-                    "Read the following investment plan and extract ALL recommended stock symbols and their percentages. "
-                    "CRITICAL: You MUST extract EVERY SINGLE stock mentioned in the text. Do not leave any out! "
-                    "Return ONLY a valid JSON array of objects. Do NOT return any markdown, text, or explanations. "
-                    "Use this exact schema for your output:\n"
-                    "[\n"
-                    '  {"symbol": "AAPL", "percentage": 40},\n'
-                    '  {"symbol": "MSFT", "percentage": 30},\n'
-                    '  {"symbol": "NVDA", "percentage": 30}\n'
-                    "]\n\n"
-                    f"PLAN TEXT TO PARSE:\n{plan_text}"
-                )
-
-                parser_response = self.parser_llm.invoke(parser_prompt)
-                clean_json = (
-                    parser_response.content.strip()
-                    if hasattr(parser_response, "content")
-                    else str(parser_response).strip()
-                )
+        except InferenceUnavailableError:
+            raise
+        except Exception as e:
+            print(f"❌ AI Error: {e}")
+            return {"plan_text": f"Error generating plan: {e}", "basket": []}
 
-                # Quick Markdown cleanup in case Groq added fences
-                clean_json = (
-                    clean_json.replace("```json", "").replace("```", "").strip()
-                )
-                clean_json = re.sub(r",\s*([\]}])", r"\1", clean_json)
+    def generate_investment_plan_stream(self, emit, prompt: str) -> None:
+        """
+        Streaming variant of generate_investment_plan (run via stream_blocking).
 
-                try:
-                    basket_data = json.loads(clean_json)
-                    print(
-                        f"✅ Extracted basket successfully with {len(basket_data)} items."
-                    )
-                except json.JSONDecodeError as e:
-                    print(
-                        f"❌ Parser failed to output valid JSON: {e}\nRaw output: {clean_json}"
-                    )
-            else:
-                print("⚠️ No Groq parser available. Basket will be empty.")
+        Emits {"type": "plan_chunk", "text"} while the local model writes,
+        {"type": "extracting"} once the text is complete, and finally
+        {"type": "final", "recommendation": {"plan_text", "basket"}}.
+        """
+        if not self.is_active or not self.llm:
+            emit(
+                {
+                    "type": "final",
+                    "recommendation": {"plan_text": "⚠️ AI Service is unavailable.", "basket": []},
+                }
+            )
+            return
 
-            return {"plan_text": plan_text, "basket": basket_data}
+        cached = self.response_cache.get(self._plan_cache_namespace(), prompt)
+        if cached is not None:
+            print(f"⚡ AI Service: investment plan served from cache")
+            emit({"type": "plan_chunk", "text": cached.get("plan_text", "")})
+            emit({"type": "final", "recommendation": cached, "cached": True})
+            return
 
+        print(f"🤖 AI Service: Step 1 - Local AI (Llama 3.2) streaming plan text...")
+        chunks = []
+        try:
+            with inference_scheduler.slot("ollama", PRIORITY_NORMAL):
+                for chunk in self.llm.stream(self._plan_generator_prompt(prompt)):
+                    text = chunk.content if hasattr(chunk, "content") else str(chunk)
+                    if text:
+                        chunks.append(text)
+                        emit({"type": "plan_chunk", "text": text})
+        except (StreamCancelled, InferenceUnavailableError):
+            raise
         except Exception as e:
             print(f"❌ AI Error: {e}")
-            return {"plan_text": f"Error generating plan: {e}", "basket": []}
+            emit(
+                {
+                    "type": "final",
+                    "recommendation": {"plan_text": f"Error generating plan: {e}", "basket": []},
+                }
+            )
+            return
+
+        # Basket extraction starts as soon as the text is complete
+        plan_text = "".join(chunks).strip()
+        emit({"type": "extracting"})
+        recommendation = {"plan_text": plan_text, "basket": self.extract_basket(plan_text)}
+        if recommendation["basket"]:
+            self.response_cache.set(
+                self._plan_cache_namespace(), prompt, recommendation, LLM_CACHE_PLAN_TTL
+            )
+        emit({"type": "final", "recommendation": recommendation})
 
-    def rank_news_for_stock(self, symbol: str, news_items: list[dict]) -> list[dict]:
-        # MOCK mode...
-        if not self.hf_active or not getattr(self, "hf_token", None):
-            ranked = []
-            for item in news_items:
-                text = f"{item.get('title', '')}. {item.get('summary', '')}"
-                score = min(len(text) / 400.0, 1.0)
-                enriched = dict(item)
-                enriched["importance_score"] = round(float(score), 3)
-                ranked.append(enriched)
-
-            ranked.sort(key=lambda x: x["importance_score"], reverse=True)
-            return ranked
+    def _invoke_local(self, prompt: str, priority: int):
+        # The local Ollama model is shared by every request: go through the scheduler
+        with inference_scheduler.slot("ollama", priority):
+            return self.llm.invoke(prompt)
 
-        ranked_items: list[dict] = []
-        api_url = (
-            "https://router.huggingface.co/hf-inference/models/facebook/bart-large-mnli"
+    def _plan_cache_namespace(self) -> str:
+        # The basket comes from the parser model, so it is part of the key
+        parser = PARSER_MODEL if self.parser_llm else "none"
+        return f"plan:{GENERATOR_MODEL}:{parser}"
+
+    def llm_cache_stats(self) -> dict:
+        return self.response_cache.stats()
+
+    @staticmethod
+    def _plan_generator_prompt(prompt: str) -> str:
+        # Step 1 prompt: the local model writes the plan text (do NOT ask it for JSON)
+        return (
+            "You are an expert financial advisor. "
+            "Write a beautifully formatted, personalized investment plan using Markdown, emojis, and clear headings. "
+            "CRITICAL RULES FOR STOCKS:\n"
+            "1. Recommend ONLY real, well-known, actively traded US market stock ticker symbols (e.g., AAPL, MSFT, TSLA).\n"
+            "2. DO NOT invent or hallucinate ticker symbols!\n"
+            "3. If the user asks for Israeli market focus, ONLY use US-listed Israeli companies (like TEVA, CHKP, CYBR, NICE, MNDY).\n"
+            "4. Specify their exact percentage allocation. The percentages MUST sum to exactly 100%.\n\n"
+            f"User Request:\n{prompt}"
         )
-        headers = {"Authorization": f"Bearer {self.hf_token}"}
-        labels = ["very important", "somewhat important", "not important"]
-
-        # --- Optimization: limit AI calls to the first 5 items ---
-        MAX_AI_REQUESTS = 5
-
-        for index, item in enumerate(news_items):
-            text = f"[Ticker: {symbol.upper()}] {item.get('title', '')}. {item.get('summary', '')}".strip()
-            if not text:
-                continue
-
-            # If we're in the first 5 items, request a smart ranking from Hugging Face
-            if index < MAX_AI_REQUESTS:
-                try:
-                    resp = requests.post(
-                        api_url,
-                        headers=headers,
-                        json={
-                            "inputs": text,
-                            "parameters": {
-                                "candidate_labels": labels,
-                                "multi_label": False,
-                            },
-                        },
-                        timeout=8,  # 8 seconds max; if they're busy, fall back immediately
-                    )
 
-                    if resp.status_code != 200:
-                        raise ValueError(f"status={resp.status_code}")
-
-                    data = resp.json()
-                    label_scores: dict[str, float] = {}
-
-                    # Case 1: list of dicts
-                    if (
-                        isinstance(data, list)
-                        and len(data) > 0
-                        and isinstance(data[0], dict)
-                        and "label" in data[0]
-                    ):
-                        for d_item in data:
-                            label_scores[d_item.get("label", "")] = float(
-                                d_item.get("score", 0.0)
-                            )
-
-                    # Case 2: list wrapping an older format
-                    elif (
-                        isinstance(data, list)
-                        and len(data) > 0
-                        and isinstance(data[0], dict)
-                        and "labels" in data[0]
-                    ):
-                        inner = data[0]
-                        for lbl, sc in zip(
-                            inner.get("labels", []), inner.get("scores", [])
-                        ):
-                            label_scores[lbl] = float(sc)
-
-                    # Case 3: classic dict format
-                    elif (
-                        isinstance(data, dict) and "labels" in data and "scores" in data
-                    ):
-                        for lbl, sc in zip(data["labels"], data["scores"]):
-                            label_scores[lbl] = float(sc)
-
-                    # Case 4: single-label fallback
-                    elif isinstance(data, dict) and "label" in data and "score" in data:
-                        label_scores[data["label"]] = float(data["score"])
-
-                    else:
-                        raise ValueError(f"Unexpected format. Raw: {data}")
-
-                    score = (
-                        1.0 * label_scores.get("very important", 0.0)
-                        + 0.6 * label_scores.get("somewhat important", 0.0)
-                        + 0.1 * label_scores.get("not important", 0.0)
-                    )
+    def extract_basket(self, plan_text: str) -> list:
+        """Step 2: the parser (Groq) reads the plan text and extracts only JSON."""
+        if not self.parser_llm:
+            print("⚠️ No Groq parser available. Basket will be empty.")
+            return []
+
+        print(f"🧠 AI Service: Step 2 - Cloud Parser (Groq) extracting JSON...")
+        parser_prompt = (
+            "You are a strict data extraction bot. "
+            "Read the following investment plan and extract ALL recommended stock symbols and their percentages. "
+            "CRITICAL: You MUST extract EVERY SINGLE stock mentioned in the text. Do not leave any out! "
+            "Return ONLY a valid JSON array of objects. Do NOT return any markdown, text, or explanations. "
+            "Use this exact schema for your output:\n"
+            "[\n"
+            '  {"symbol": "AAPL", "percentage": 40},\n'
+            '  {"symbol": "MSFT", "percentage": 30},\n'
+            '  {"symbol": "NVDA", "percentage": 30}\n'
+            "]\n\n"
+            f"PLAN TEXT TO PARSE:\n{plan_text}"
+        )
 
-                except Exception as e:
-                    print(
-                        f"⚠️ HF ranking failed for item {index+1} (using fallback): {e}"
-                    )
-                    # If it fails, use the fallback formula
-                    score = min(len(text) / 400.0, 1.0)
+        try:
+            with inference_scheduler.slot("groq", PRIORITY_NORMAL):
+                parser_response = self.parser_llm.invoke(parser_prompt)
+        except InferenceUnavailableError:
+            raise
+        except Exception as e:
+            print(f"❌ Parser request failed: {e}")
+            return []
 
-            else:
-                # --- After the first 5: save time by using fallback only ---
-                score = min(len(text) / 400.0, 1.0)
+        clean_json = (
+            parser_response.content.strip()
+            if hasattr(parser_response, "content")
+            else str(parser_response).strip()
+        )
+
+        # Quick Markdown cleanup in case Groq added fences
+        clean_json = clean_json.replace("```json", "").replace("```", "").strip()
+        clean_json = re.sub(r",\s*([\]}])", r"\1", clean_json)
+
+        try:
+            basket_data = json.loads(clean_json)
+            print(f"✅ Extracted basket successfully with {len(basket_data)} items.")
+            return basket_data
+        except json.JSONDecodeError as e:
+            print(f"❌ Parser failed to output valid JSON: {e}\nRaw output: {clean_json}")
+            return []
 
+    def rank_news_for_stock(self, symbol: str, news_items: list[dict]) -> list[dict]:
+        if not news_items:
+            return []
+
+        if self.news_engine == "hf":
+            # Batched HF requests + persistent score cache; gaps get local scores
+            scores = self.news_ranker.score([news_text(symbol, item) for item in news_items])
+            missing = [i for i, score in enumerate(scores) if score is None]
+            if missing:
+                local = self.local_news_ranker.score(
+                    symbol, [news_items[i] for i in missing], self._company_word(symbol)
+                )
+                for i, score in zip(missing, local):
+                    scores[i] = score
+        else:
+            scores = self.local_news_ranker.score(
+                symbol, news_items, self._company_word(symbol)
+            )
+
+        ranked_items: list[dict] = []
+        for item, score in zip(news_items, scores):
             enriched = dict(item)
             enriched["importance_score"] = round(float(score), 3)
             ranked_items.append(enriched)
 
         ranked_items.sort(key=lambda x: x["importance_score"], reverse=True)
         return ranked_items
+
+    @staticmethod
+    def _company_word(symbol: str) -> str:
+        """'AAPL' -> 'apple' (headlines usually name the company, not the ticker)."""
+        matches = get_symbol_index().search(symbol, limit=1)
+        if matches and matches[0]["symbol"] == symbol.upper():
+            return normalize_name(matches[0]["name"]).split(" ")[0]
+        return ""
+
+    def news_ranking_stats(self) -> dict:
+        stats = {"engine": self.news_engine, "local": self.local_news_ranker.stats()}
+        if self.news_ranker is not None:
+            stats["hf"] = self.news_ranker.stats()
+        return stats
@@ -0,0 +1,104 @@
+import numpy as np
+
+
+def lttb_indices(y, max_points: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets: indices of the points to keep.
+
+    x is the sample index (evenly spaced bars). The first and last points are
+    always kept; each bucket in between contributes the point that forms the
+    largest triangle with the previously selected point and the next bucket's
+    average. Area computation is vectorized per bucket.
+    """
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if max_points >= n or max_points < 3:
+        return np.arange(n)
+
+    x = np.arange(n, dtype=float)
+    # Bucket edges for the n-2 interior points
+    edges = np.linspace(1, n - 1, max_points - 1).astype(int)
+
+    selected = np.empty(max_points, dtype=int)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    prev = 0
+    for i in range(max_points - 2):
+        start, stop = edges[i], edges[i + 1]
+
+        # Average of the next bucket (or the last point for the final bucket)
+        if i + 2 < len(edges):
+            next_start, next_stop = edges[i + 1], edges[i + 2]
+        else:
+            next_start, next_stop = n - 1, n
+        avg_x = x[next_start:next_stop].mean()
+        avg_y = y[next_start:next_stop].mean()
+
+        bucket_x = x[start:stop]
+        bucket_y = y[start:stop]
+        areas = np.abs(
+            (x[prev] - avg_x) * (bucket_y - y[prev])
+            - (x[prev] - bucket_x) * (avg_y - y[prev])
+        )
+        prev = start + int(np.argmax(areas))
+        selected[i + 1] = prev
+
+    return selected
+
+
+def minmax_indices(y, max_points: int) -> np.ndarray:
+    """
+    Min/max per bucket: keeps each bucket's extremes (in time order).
+    Fully vectorized; good for spiky series where peaks must survive.
+    The first and last points are kept and count toward `max_points`.
+    """
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if max_points >= n:
+        return np.arange(n)
+    # Two slots go to the endpoints, two per bucket for the interior
+    buckets = (max_points - 2) // 2
+    if buckets < 1:
+        return lttb_indices(y, max_points)
+
+    # Pad the interior to a whole number of buckets by repeating its last value
+    interior = y[1 : n - 1]
+    m = len(interior)
+    size = int(np.ceil(m / buckets))
+    padded = np.concatenate([interior, np.full(size * buckets - m, interior[-1])])
+    grid = padded.reshape(buckets, size)
+
+    offsets = np.arange(buckets) * size
+    mins = 1 + np.minimum(offsets + np.argmin(grid, axis=1), m - 1)
+    maxs = 1 + np.minimum(offsets + np.argmax(grid, axis=1), m - 1)
+
+    return np.unique(np.concatenate([[0], mins, maxs, [n - 1]]))
+
+
+DOWNSAMPLERS = {"lttb": lttb_indices, "minmax": minmax_indices}
+
+
+def downsample_history(history: dict, max_points: int, method: str = "lttb") -> dict:
+    """
+    Reduce a {"dates", "prices"} history payload to about `max_points` points.
+    Adds the kept original `indices` and the `original_points` count.
+    """
+    if method not in DOWNSAMPLERS:
+        raise ValueError(f"Unsupported downsampling method: {method}")
+
+    prices = history.get("prices", [])
+    total = len(prices)
+    if not max_points or max_points >= total:
+        return {**history, "indices": list(range(total)), "original_points": total}
+
+    indices = DOWNSAMPLERS[method](prices, max_points)
+    dates = history.get("dates", [])
+    return {
+        **history,
+        "dates": [dates[i] for i in indices],
+        "prices": [prices[i] for i in indices],
+        "indices": indices.tolist(),
+        "original_points": total,
+        "downsampling": method,
+    }
@@ -0,0 +1,239 @@
+import os
+
+import numpy as np
+import pandas as pd
+from server.core.ttl_cache import TTLCache
+from server.services.stock_service import StockService
+
+INDICATOR_CACHE_TTL = float(os.getenv("INDICATOR_CACHE_TTL", "900"))
+INDICATOR_CACHE_SIZE = int(os.getenv("INDICATOR_CACHE_SIZE", "256"))
+
+DEFAULT_INDICATORS = "sma:20,ema:50,rsi:14,macd:12-26-9,bbands:20-2,atr:14,volatility:20"
+# Protects against accidental "sma:100000" requests
+MAX_WINDOW = 1000
+MAX_INDICATORS = 20
+
+# name -> (default parameters, number of parameters)
+INDICATOR_DEFAULTS = {
+    "sma": (20,),
+    "ema": (20,),
+    "rsi": (14,),
+    "macd": (12, 26, 9),
+    "bbands": (20, 2),
+    "atr": (14,),
+    "volatility": (20,),
+}
+
+# Trading days per year, used to annualize rolling volatility
+TRADING_DAYS = 252
+
+_indicator_cache = TTLCache(
+    ttl_seconds=INDICATOR_CACHE_TTL, max_size=INDICATOR_CACHE_SIZE, name="indicators"
+)
+
+
+def parse_indicator_spec(spec: str) -> list[tuple]:
+    """
+    "sma:20,ema:50,macd:12-26-9,bbands:20-2" -> [("sma", (20,)), ...]
+
+    Missing parameters fall back to the defaults; duplicates are dropped.
+    Raises ValueError for unknown indicators or invalid parameters.
+    """
+    parsed = []
+    for token in (spec or DEFAULT_INDICATORS).split(","):
+        token = token.strip().lower()
+        if not token:
+            continue
+
+        name, _, raw_params = token.partition(":")
+        if name not in INDICATOR_DEFAULTS:
+            raise ValueError(f"Unsupported indicator: {name}")
+
+        defaults = INDICATOR_DEFAULTS[name]
+        values = [p for p in raw_params.split("-") if p] if raw_params else []
+        if len(values) > len(defaults):
+            raise ValueError(f"Too many parameters for {name}: {raw_params}")
+        try:
+            params = tuple(
+                float(v) if name == "bbands" and i == 1 else int(v)
+                for i, v in enumerate(values)
+            )
+        except ValueError:
+            raise ValueError(f"Invalid parameters for {name}: {raw_params}")
+        params = params + defaults[len(params) :]
+
+        # bbands is (window, width): only the first one is a window
+        windows = params[:1] if name == "bbands" else params
+        if any(w < 1 or w > MAX_WINDOW for w in windows):
+            raise ValueError(f"Window out of range for {name} (1-{MAX_WINDOW})")
+        if name == "bbands" and params[1] <= 0:
+            raise ValueError("Bollinger band width must be positive")
+        if name == "macd" and params[0] >= params[1]:
+            raise ValueError("MACD fast period must be shorter than the slow period")
+
+        if (name, params) not in parsed:
+            parsed.append((name, params))
+
+    if not parsed:
+        raise ValueError("No indicators requested")
+    if len(parsed) > MAX_INDICATORS:
+        raise ValueError(f"At most {MAX_INDICATORS} indicators per request")
+    return parsed
+
+
+def _key(name: str, params: tuple) -> str:
+    """("macd", (12, 26, 9)) -> "macd_12_26_9" (2.0 -> "2")."""
+    return "_".join([name] + [f"{p:g}" for p in params])
+
+
+def _clean(series) -> list:
+    """Rounded floats with NaN/inf as None (JSON safe)."""
+    values = np.round(np.asarray(series, dtype=float), 4)
+    return [float(v) if np.isfinite(v) else None for v in values]
+
+
+# --- Indicator math (vectorized over the whole series) ---
+
+
+def sma(close: pd.Series, window: int) -> pd.Series:
+    return close.rolling(window, min_periods=window).mean()
+
+
+def ema(close: pd.Series, window: int) -> pd.Series:
+    return close.ewm(span=window, adjust=False, min_periods=window).mean()
+
+
+def rsi(close: pd.Series, window: int) -> pd.Series:
+    """Wilder's RSI (exponential smoothing with alpha = 1 / window)."""
+    delta = close.diff()
+    gain = delta.clip(lower=0)
+    loss = -delta.clip(upper=0)
+    avg_gain = gain.ewm(alpha=1 / window, adjust=False, min_periods=window).mean()
+    avg_loss = loss.ewm(alpha=1 / window, adjust=False, min_periods=window).mean()
+
+    rs = avg_gain / avg_loss
+    result = 100 - 100 / (1 + rs)
+    # No losses in the window -> RSI 100 (instead of inf / NaN)
+    return result.where(avg_loss != 0, 100.0).where(avg_gain.notna())
+
+
+def macd(close: pd.Series, fast: int, slow: int, signal: int) -> dict:
+    line = ema(close, fast) - ema(close, slow)
+    signal_line = line.ewm(span=signal, adjust=False, min_periods=signal).mean()
+    return {"macd": line, "signal": signal_line, "histogram": line - signal_line}
+
+
+def bollinger_bands(close: pd.Series, window: int, width: float) -> dict:
+    middle = sma(close, window)
+    std = close.rolling(window, min_periods=window).std(ddof=0)
+    return {
+        "middle": middle,
+        "upper": middle + width * std,
+        "lower": middle - width * std,
+    }
+
+
+def atr(frame: pd.DataFrame, window: int) -> pd.Series:
+    """Average True Range (Wilder smoothing)."""
+    prev_close = frame["close"].shift()
+    true_range = pd.concat(
+        [
+            frame["high"] - frame["low"],
+            (frame["high"] - prev_close).abs(),
+            (frame["low"] - prev_close).abs(),
+        ],
+        axis=1,
+    ).max(axis=1, skipna=False)
+    return true_range.ewm(alpha=1 / window, adjust=False, min_periods=window).mean()
+
+
+def rolling_volatility(close: pd.Series, window: int) -> pd.Series:
+    """Annualized rolling standard deviation of daily log returns (percent)."""
+    returns = np.log(close / close.shift())
+    return returns.rolling(window, min_periods=window).std() * np.sqrt(TRADING_DAYS) * 100
+
+
+class IndicatorService:
+    """
+    Technical indicators over the (locally stored) OHLCV history.
+
+    Every indicator is computed on whole pandas Series at once; results are
+    memoized per symbol, last bar and indicator spec, so repeated requests for
+    the same chart are served from memory until a new bar arrives.
+    """
+
+    def __init__(self, stock_service: StockService = None):
+        self.stock_service = stock_service or StockService()
+
+    def get_indicators(
+        self,
+        symbol: str,
+        spec: str = None,
+        period: str = "1y",
+        start: str = None,
+        end: str = None,
+        interval: str = "1d",
+    ):
+        """
+        Returns {"symbol", "interval", "dates", "close", "indicators", "latest"}
+        or None when there is no history. Raises ValueError for bad input.
+        """
+        indicators = parse_indicator_spec(spec)
+        symbol = symbol.strip().upper()
+
+        frame = self.stock_service.get_history_frame(symbol, period, start, end, interval)
+        if frame is None or frame.empty:
+            return None
+
+        # The last bar (and its close, which moves intraday) identifies the data
+        last_bar = (frame.index[-1], float(frame["close"].iloc[-1]), len(frame))
+        canonical = ",".join(_key(name, params) for name, params in indicators)
+        key = (symbol, interval, period, start, end, last_bar, canonical)
+
+        return _indicator_cache.get_or_load(
+            key, lambda: self._compute(symbol, interval, frame, indicators)
+        )
+
+    @staticmethod
+    def cache_stats() -> dict:
+        return _indicator_cache.stats()
+
+    @staticmethod
+    def _compute(symbol: str, interval: str, frame: pd.DataFrame, indicators) -> dict:
+        frame = frame.astype(float)
+        close = frame["close"]
+
+        results = {}
+        latest = {}
+        for name, params in indicators:
+            if name == "sma":
+                values = sma(close, *params)
+            elif name == "ema":
+                values = ema(close, *params)
+            elif name == "rsi":
+                values = rsi(close, *params)
+            elif name == "macd":
+                values = macd(close, *params)
+            elif name == "bbands":
+                values = bollinger_bands(close, *params)
+            elif name == "atr":
+                values = atr(frame, *params)
+            else:
+                values = rolling_volatility(close, *params)
+
+            key = _key(name, params)
+            if isinstance(values, dict):
+                results[key] = {part: _clean(s) for part, s in values.items()}
+                latest[key] = {part: series[-1] for part, series in results[key].items()}
+            else:
+                results[key] = _clean(values)
+                latest[key] = results[key][-1]
+
+        return {
+            "symbol": symbol,
+            "interval": interval,
+            "dates": frame.index.tolist(),
+            "close": _clean(close),
+            "indicators": results,
+            "latest": latest,
+        }
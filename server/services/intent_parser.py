@@ -0,0 +1,153 @@
+import re
+
+from server.services.popular_service import POPULAR_STOCKS
+from server.services.symbol_index import normalize_name
+
+# Shared with agent_tools.identify_intent
+TRADE_KEYWORDS = ["buy", "sell", "trade"]
+ADVICE_KEYWORDS = ["plan", "offer", "advise", "suggestion", "recommend", "advice"]
+
+BUY_VERBS = {"buy", "purchase", "acquire"}
+SELL_VERBS = {"sell"}
+
+NUMBER_WORDS = {
+    "a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5,
+    "six": 6, "seven": 7, "eight": 8, "nine": 9, "ten": 10, "eleven": 11,
+    "twelve": 12, "fifteen": 15, "twenty": 20, "fifty": 50, "hundred": 100,
+}
+
+# Names people type instead of tickers (on top of the popular list)
+COMPANY_ALIASES = {
+    "google": "GOOGL",
+    "alphabet": "GOOGL",
+    "facebook": "META",
+    "meta": "META",
+    "coca cola": "KO",
+    "coca-cola": "KO",
+    "coke": "KO",
+    "pepsi": "PEP",
+    "jp morgan": "JPM",
+    "jpmorgan": "JPM",
+    "teva": "TEVA",
+}
+# Pronouns, determiners and fillers: the stock comes from the conversation
+# ("sell 3 it", "buy 2 more"), so leave these to the agent. Several of them
+# are also real tickers (IT, NOW, A, ALL...).
+CONTEXT_WORDS = {
+    "it", "its", "that", "this", "these", "those", "them", "they", "one", "ones",
+    "more", "now", "a", "an", "the", "some", "all", "any", "same", "again",
+    "another", "other", "others", "each", "every", "few", "both", "rest", "half",
+    "me", "my", "mine", "everything", "stock", "stocks", "share", "shares",
+}
+
+for _stock in POPULAR_STOCKS:
+    # First word of the normalized name ("The Coca-Cola Company" -> "coca")
+    _words = normalize_name(_stock["name"]).split()
+    if _words and len(_words[0]) >= 3 and _words[0] not in CONTEXT_WORDS:
+        COMPANY_ALIASES.setdefault(_words[0], _stock["symbol"])
+
+MAX_FAST_PATH_QUANTITY = 100000
+
+_QUANTITY = r"(?P<qty>\d{1,6}|" + "|".join(sorted(NUMBER_WORDS, key=len, reverse=True)) + r")"
+_TARGET = r"(?P<target>\$?[a-z][a-z.\- ]{0,30}?)"
+_UNITS = r"(?:shares?|stocks?|units?)"
+_POLITE = r"(?:please\s+)?(?:(?:i\s+)?(?:want|would\s+like|wanna|'d\s+like)\s+to\s+|let'?s\s+|go\s+)?"
+# "would" is hypothetical ("would it be wise to buy"), except in "would like to"
+_WOULD_LIKE = re.compile(r"\bwould\s+like\s+to\b")
+
+# "buy 5 AAPL", "sell two shares of tesla", "please buy 3 apple stocks"
+_QTY_FIRST = re.compile(
+    rf"^{_POLITE}(?P<verb>\w+)\s+{_QUANTITY}\s+(?:{_UNITS}\s+(?:of\s+|in\s+)?)?{_TARGET}"
+    rf"(?:\s+{_UNITS})?(?:\s+(?:now|please))*[.!]*$"
+)
+# "buy AAPL x5", "sell tsla 2 shares"
+_TARGET_FIRST = re.compile(
+    rf"^{_POLITE}(?P<verb>\w+)\s+(?:{_UNITS}\s+(?:of\s+|in\s+)?)?{_TARGET}\s+x?{_QUANTITY}"
+    rf"(?:\s+{_UNITS})?(?:\s+(?:now|please))*[.!]*$"
+)
+
+# Anything conditional, hypothetical or price-limited goes to the agent
+_REJECT_WORDS = {
+    "if", "when", "unless", "should", "would", "could", "maybe", "not", "don't",
+    "dont", "never", "what", "how", "why", "which", "limit", "stop", "below",
+    "above", "under", "over", "at", "worth", "dollars", "usd", "tomorrow",
+}
+
+
+class TradeIntentParser:
+    """
+    Deterministic parser for simple trade commands ("buy 5 AAPL").
+
+    Returns {"side", "symbol", "amount"} only when the whole message matches
+    a plain "<verb> <quantity> <stock>" command; anything else returns None
+    and is left to the LLM agent.
+    """
+
+    def __init__(self, symbol_resolver=None):
+        # symbol_resolver(text) -> ticker or None, for names not in the aliases
+        self.symbol_resolver = symbol_resolver
+
+    def parse(self, message: str):
+        original = " ".join(message.strip().split())
+        text = original.lower()
+        if not text or "?" in text or len(text) > 80:
+            return None
+        if len(original) != len(text):
+            original = text  # Case mapping changed the length: no case info
+
+        words = set(re.findall(r"[a-z']+", _WOULD_LIKE.sub(" ", text)))
+        if words & _REJECT_WORDS:
+            return None
+
+        match = _QTY_FIRST.match(text) or _TARGET_FIRST.match(text)
+        if not match:
+            return None
+
+        verb = match.group("verb")
+        if verb in BUY_VERBS:
+            side = "buy"
+        elif verb in SELL_VERBS:
+            side = "sell"
+        else:
+            return None
+
+        amount = self._quantity(match.group("qty"))
+        if not amount or amount > MAX_FAST_PATH_QUANTITY:
+            return None
+
+        start, end = match.span("target")
+        symbol = self._symbol(match.group("target"), original[start:end])
+        if not symbol:
+            return None
+
+        return {"side": side, "symbol": symbol, "amount": amount}
+
+    @staticmethod
+    def _quantity(raw: str):
+        if raw.isdigit():
+            return int(raw)
+        return NUMBER_WORDS.get(raw)
+
+    def _symbol(self, target: str, raw: str):
+        raw = raw.strip()
+        # "$now" / "NOW": the user clearly means a ticker
+        written_as_ticker = raw.startswith("$") or (raw.isupper() and " " not in raw)
+        target = target.strip().lstrip("$").strip(" .-")
+        for suffix in (" inc", " corp", " corporation", " company"):
+            if target.endswith(suffix):
+                target = target[: -len(suffix)]
+        if not target or (target in CONTEXT_WORDS and not written_as_ticker):
+            return None
+        if target in COMPANY_ALIASES:
+            return COMPANY_ALIASES[target]
+
+        if self.symbol_resolver is not None:
+            resolved = self.symbol_resolver(target)
+            if resolved:
+                return resolved.upper()
+
+        # Unknown to the index: only trust it as a ticker if written like one
+        # (validated by the caller's quote lookup)
+        if written_as_ticker and re.fullmatch(r"[a-z]{1,5}(?:[.\-][a-z]{1,2})?", target):
+            return target.upper()
+        return None
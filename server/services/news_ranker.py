@@ -0,0 +1,312 @@
+import contextvars
+import csv
+import hashlib
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import requests
+from server.core.inference import PRIORITY_BACKGROUND, inference_scheduler
+from server.dal.news_score_store import NewsScoreStore
+
+HF_NEWS_MODEL = os.getenv("HF_NEWS_MODEL", "facebook/bart-large-mnli")
+HF_NEWS_URL = f"https://router.huggingface.co/hf-inference/models/{HF_NEWS_MODEL}"
+# Items per inference request, and how many requests run at once
+HF_NEWS_BATCH_SIZE = int(os.getenv("HF_NEWS_BATCH_SIZE", "8"))
+HF_NEWS_CONCURRENCY = int(os.getenv("HF_NEWS_CONCURRENCY", "4"))
+HF_NEWS_TIMEOUT = float(os.getenv("HF_NEWS_TIMEOUT", "20"))
+
+NEWS_LEXICON_PATH = os.getenv(
+    "NEWS_LEXICON_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), "resources", "news_lexicon.csv"),
+)
+
+NEWS_LABELS = ["very important", "somewhat important", "not important"]
+LABEL_WEIGHTS = {"very important": 1.0, "somewhat important": 0.6, "not important": 0.1}
+
+
+def news_text(symbol: str, item: dict) -> str:
+    return f"[Ticker: {symbol.upper()}] {item.get('title', '')}. {item.get('summary', '')}".strip()
+
+
+def parse_label_scores(data) -> dict[str, float]:
+    """Zero-shot result for one text, in any of the formats HF has returned."""
+    label_scores: dict[str, float] = {}
+
+    # Case 1: list of dicts
+    if isinstance(data, list) and data and isinstance(data[0], dict) and "label" in data[0]:
+        for d_item in data:
+            label_scores[d_item.get("label", "")] = float(d_item.get("score", 0.0))
+
+    # Case 2: list wrapping an older format
+    elif isinstance(data, list) and data and isinstance(data[0], dict) and "labels" in data[0]:
+        inner = data[0]
+        for lbl, sc in zip(inner.get("labels", []), inner.get("scores", [])):
+            label_scores[lbl] = float(sc)
+
+    # Case 3: classic dict format
+    elif isinstance(data, dict) and "labels" in data and "scores" in data:
+        for lbl, sc in zip(data["labels"], data["scores"]):
+            label_scores[lbl] = float(sc)
+
+    # Case 4: single-label fallback
+    elif isinstance(data, dict) and "label" in data and "score" in data:
+        label_scores[data["label"]] = float(data["score"])
+
+    else:
+        raise ValueError(f"Unexpected format. Raw: {data}")
+
+    return label_scores
+
+
+def weighted_score(label_scores: dict[str, float]) -> float:
+    return sum(weight * label_scores.get(label, 0.0) for label, weight in LABEL_WEIGHTS.items())
+
+
+class HFRequestError(ValueError):
+    def __init__(self, status, detail: str):
+        super().__init__(f"status={status} {detail}".strip())
+        self.status = status
+
+    @property
+    def rejected_input(self) -> bool:
+        # Shape mismatch (no status) or a 4xx about the payload itself
+        return self.status in (None, 400, 413, 422)
+
+
+class HFNewsRanker:
+    """
+    Zero-shot news importance scores from the Hugging Face inference API.
+
+    Texts are sent in batches of HF_NEWS_BATCH_SIZE, with at most
+    HF_NEWS_CONCURRENCY requests in flight (shared by all requests). Scores
+    are cached by content hash in a NewsScoreStore, so a headline already
+    ranked for one user is never sent again.
+    """
+
+    def __init__(self, token: str, store: NewsScoreStore = None):
+        self.token = token
+        self.store = store or NewsScoreStore()
+        self.session = requests.Session()
+        self.session.headers.update({"Authorization": f"Bearer {token}"})
+        self._pool = ThreadPoolExecutor(
+            max_workers=HF_NEWS_CONCURRENCY, thread_name_prefix="hf-news"
+        )
+        # Turned off if the endpoint rejects list inputs
+        self._batching = True
+        self._stats_lock = threading.Lock()
+        self._stats = {"cache_hits": 0, "scored": 0, "requests": 0, "failed": 0}
+
+    @staticmethod
+    def cache_key(text: str) -> str:
+        # The text already holds the ticker, title and summary
+        payload = "\n".join([HF_NEWS_MODEL, "|".join(NEWS_LABELS), text])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def score(self, texts: list[str]) -> list:
+        """One score per text; None where the API could not score it."""
+        keys = [self.cache_key(text) for text in texts]
+        cached = self.store.get_many(list(set(keys)))
+
+        # Unique uncached texts, in feed order
+        pending = {}
+        for key, text in zip(keys, texts):
+            if key not in cached and key not in pending:
+                pending[key] = text
+        self._count("cache_hits", len(texts) - sum(1 for k in keys if k not in cached))
+
+        if pending:
+            items = list(pending.items())
+            batches = [
+                items[start : start + HF_NEWS_BATCH_SIZE]
+                for start in range(0, len(items), HF_NEWS_BATCH_SIZE)
+            ]
+            # Carry the caller's deadline (CallTicket) into the pool threads
+            futures = [
+                self._pool.submit(contextvars.copy_context().run, self._score_batch, batch)
+                for batch in batches
+            ]
+            fresh = {}
+            for future in futures:
+                fresh.update(future.result())
+            self.store.set_many(fresh)
+            cached.update(fresh)
+
+        return [cached.get(key) for key in keys]
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        return {**stats, "stored_scores": self.store.count()}
+
+    # --- Internals ---
+
+    def _score_batch(self, batch: list[tuple[str, str]]) -> dict[str, float]:
+        results = None
+        if len(batch) > 1 and self._batching:
+            try:
+                results = self._request([text for _, text in batch])
+                if not self._is_batch_result(results, len(batch)):
+                    raise HFRequestError(None, "endpoint did not return one result per input")
+            except HFRequestError as e:
+                if not e.rejected_input:
+                    self._count("failed", len(batch))
+                    print(f"⚠️ HF ranking failed for a batch of {len(batch)} (using fallback): {e}")
+                    return {}
+                # List inputs unsupported: score one by one from now on
+                print(f"⚠️ HF endpoint does not batch ({e}); scoring items one by one")
+                self._batching = False
+                results = None
+            except Exception as e:
+                self._count("failed", len(batch))
+                print(f"⚠️ HF ranking failed for a batch of {len(batch)} (using fallback): {e}")
+                return {}
+
+        scores = {}
+        for index, (key, text) in enumerate(batch):
+            try:
+                result = results[index] if results is not None else self._request(text)
+                scores[key] = round(weighted_score(parse_label_scores(result)), 3)
+            except Exception as e:
+                self._count("failed", 1)
+                print(f"⚠️ HF ranking failed for an item (using fallback): {e}")
+        self._count("scored", len(scores))
+        return scores
+
+    @staticmethod
+    def _is_batch_result(results, size: int) -> bool:
+        # One {"labels", "scores"} (or [{"label", "score"}...]) entry per input;
+        # a flat [{"label", "score"}...] list is a single-text answer
+        if not isinstance(results, list) or len(results) != size:
+            return False
+        first = results[0]
+        return not (isinstance(first, dict) and "label" in first)
+
+    def _request(self, inputs):
+        with inference_scheduler.slot("hf", PRIORITY_BACKGROUND):
+            self._count("requests", 1)
+            resp = self.session.post(
+                HF_NEWS_URL,
+                json={
+                    "inputs": inputs,
+                    "parameters": {"candidate_labels": NEWS_LABELS, "multi_label": False},
+                },
+                timeout=HF_NEWS_TIMEOUT,
+            )
+        if resp.status_code != 200:
+            raise HFRequestError(resp.status_code, resp.text[:200])
+        return resp.json()
+
+    def _count(self, field: str, amount: int):
+        with self._stats_lock:
+            self._stats[field] += amount
+
+
+# --- Local (offline) engine ---
+
+_TOKEN = re.compile(r"[a-z0-9]+(?:['-][a-z0-9]+)*")
+_PERCENT = re.compile(r"\d+(?:\.\d+)?\s?%")
+_MONEY = re.compile(r"\$\s?\d")
+
+# A headline hit counts this much more than one in the summary
+TITLE_WEIGHT = 2.0
+# Keeps several strong terms from saturating the logistic at 1.0
+LEXICON_SCALE = 0.5
+MENTION_WEIGHT = 0.8  # The ticker / company is named in the headline
+PERCENT_WEIGHT = 0.4
+MONEY_WEIGHT = 0.3
+# Logistic offset: a headline with no signal scores ~0.27
+BIAS = -1.0
+
+
+def _tokens(text: str) -> list[str]:
+    return _TOKEN.findall(text.lower().replace("\u2019", "'"))
+
+
+class LocalNewsRanker:
+    """
+    Offline, CPU-only news importance model (no network, no token).
+
+    A weighted lexicon (server/resources/news_lexicon.csv: market-moving
+    terms such as "guidance", "merger", "downgrade" score up, listicle and
+    clickbait phrases score down) is matched as 1-5 word n-grams. A whole
+    feed is vectorized into one term-count matrix, weighted TF-IDF style
+    (log term frequency, headline hits counted double, terms common to the
+    whole feed damped) and scored in a single numpy pass through a logistic.
+    Deterministic: the same feed always gets the same scores.
+    """
+
+    def __init__(self, lexicon_path: str = NEWS_LEXICON_PATH):
+        terms, weights = [], []
+        with open(lexicon_path, "r", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                term = " ".join(_tokens(row["term"]))
+                if term:
+                    terms.append(term)
+                    weights.append(float(row["weight"]))
+        self._vocab = {term: index for index, term in enumerate(terms)}
+        self._weights = np.asarray(weights, dtype=float)
+        self._max_n = max(len(term.split()) for term in terms)
+        self._stats_lock = threading.Lock()
+        self._stats = {"calls": 0, "items": 0, "total_ms": 0.0}
+        print(f"✅ Local news ranker loaded ({len(terms)} lexicon terms)")
+
+    def score(self, symbol: str, items: list[dict], company: str = "") -> list[float]:
+        """One score in (0, 1) per item."""
+        started = time.perf_counter()
+        n = len(items)
+        if n == 0:
+            return []
+
+        titles = np.zeros((n, len(self._vocab)))
+        bodies = np.zeros((n, len(self._vocab)))
+        extras = np.zeros(n)
+        mentions = {symbol.lower(), company.lower()} - {""}
+        for row, item in enumerate(items):
+            title = item.get("title") or ""
+            self._count_terms(title, titles[row])
+            self._count_terms(item.get("summary") or "", bodies[row])
+
+            title_tokens = set(_tokens(title))
+            if mentions & title_tokens:
+                extras[row] += MENTION_WEIGHT
+            if _PERCENT.search(title):
+                extras[row] += PERCENT_WEIGHT
+            if _MONEY.search(title):
+                extras[row] += MONEY_WEIGHT
+
+        tf = TITLE_WEIGHT * np.log1p(titles) + np.log1p(bodies)
+        # Smooth IDF over the feed (a term in every item says little about any
+        # one of them), scaled to (0, 1] so scores don't grow with feed size
+        df = np.count_nonzero(tf, axis=0)
+        idf = (1.0 + np.log((1.0 + n) / (1.0 + df))) / (1.0 + np.log((1.0 + n) / 2.0))
+        raw = LEXICON_SCALE * ((tf * idf) @ self._weights) + extras + BIAS
+        scores = 1.0 / (1.0 + np.exp(-raw))
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with self._stats_lock:
+            self._stats["calls"] += 1
+            self._stats["items"] += n
+            self._stats["total_ms"] += elapsed_ms
+        return [round(float(score), 3) for score in scores]
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        total_ms = stats.pop("total_ms")
+        return {
+            **stats,
+            "avg_ms": round(total_ms / stats["calls"], 3) if stats["calls"] else 0.0,
+        }
+
+    def _count_terms(self, text: str, out: np.ndarray):
+        tokens = _tokens(text)
+        vocab = self._vocab
+        for size in range(1, self._max_n + 1):
+            for start in range(len(tokens) - size + 1):
+                index = vocab.get(" ".join(tokens[start : start + size]))
+                if index is not None:
+                    out[index] += 1
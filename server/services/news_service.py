@@ -1,8 +1,35 @@
+import asyncio
 import os
-from datetime import date, timedelta
+import threading
+import time
+from datetime import date, datetime, timedelta
 from typing import List, Dict
 
 import httpx
+from server.core.executors import run_blocking
+from server.core.rate_limit import TokenBucket
+from server.dal.news_store import NewsStore, article_key
+
+# A symbol fetched more recently than this is served from the local store only
+NEWS_REFRESH_SECONDS = float(os.getenv("NEWS_REFRESH_SECONDS", "300"))
+NEWS_PRUNE_SECONDS = 3600
+# Finnhub free tier: 60 calls/minute. Shared by the sync and async paths.
+FINNHUB_CALLS_PER_MINUTE = float(os.getenv("FINNHUB_CALLS_PER_MINUTE", "55"))
+FINNHUB_BURST = float(os.getenv("FINNHUB_BURST", "10"))
+
+
+# How often an async caller re-checks a symbol lock held by another sync
+NEWS_LOCK_POLL_SECONDS = 0.05
+
+
+def _build_client(client_class=httpx.Client):
+    """One pooled keep-alive client (HTTP/2 when `h2` is installed) for Finnhub."""
+    limits = httpx.Limits(max_connections=20, max_keepalive_connections=10)
+    try:
+        return client_class(http2=True, timeout=10, limits=limits)
+    except ImportError:
+        print("⚠️ h2 not installed – Finnhub client falls back to HTTP/1.1")
+        return client_class(timeout=10, limits=limits)
 
 
 class NewsService:
@@ -10,16 +37,35 @@ class NewsService:
 
     Relies on FINNHUB_API_KEY being set in the .env file.
     Returns news in a normalized format compatible with AIService.rank_news_for_stock.
+
+    Articles are kept per symbol in a local NewsStore: after the first fetch
+    only the delta since the newest stored article is downloaded, and a
+    symbol checked in the last NEWS_REFRESH_SECONDS is a pure cache read.
+    The async API (get_company_news_async / get_news_feed) shares the store,
+    the per-symbol lock and the Finnhub rate limiter with the blocking one.
     """
 
     BASE_URL = "https://finnhub.io/api/v1"
+    NEWS_URL = f"{BASE_URL}/company-news"
 
-    def __init__(self) -> None:
+    def __init__(self, store: NewsStore = None) -> None:
         self.api_key = os.getenv("FINNHUB_API_KEY")
         if not self.api_key:
             print(
                 "⚠️ FINNHUB_API_KEY not set – NewsService will operate in empty/mock mode"
             )
+        self.store = store or NewsStore()
+        self.client = _build_client()
+        self._async_client = None
+        self.rate_limiter = TokenBucket(
+            rate=FINNHUB_CALLS_PER_MINUTE / 60, capacity=FINNHUB_BURST, name="finnhub"
+        )
+
+        # One sync per symbol at a time (concurrent requests share its result)
+        self._symbol_locks = {}
+        self._locks_lock = threading.Lock()
+        self._last_prune = 0.0
+        self.stats = {"store_reads": 0, "fetches": 0, "fetched": 0, "new": 0, "errors": 0}
 
     def get_company_news(self, symbol: str, days_back: int = 10) -> List[Dict]:
         """Fetch company news for the last X days (default: 10).
@@ -33,32 +79,165 @@ class NewsService:
         if not self.api_key:
             return []
 
-        to_date = date.today()
-        from_date = to_date - timedelta(days=days_back)
+        symbol = symbol.upper()
+        window_start = date.today() - timedelta(days=days_back)
+        with self._lock_for(symbol):
+            plan = self._plan_sync(symbol, window_start)
+            if plan is not None:
+                self._apply_sync(symbol, plan, self._fetch(symbol, plan["from_date"]))
+        return self._read_window(symbol, window_start)
+
+    async def get_company_news_async(self, symbol: str, days_back: int = 10) -> List[Dict]:
+        """Async get_company_news: the Finnhub call runs on the shared AsyncClient."""
+        if not self.api_key:
+            return []
+
+        symbol = symbol.upper()
+        window_start = date.today() - timedelta(days=days_back)
+        lock = self._lock_for(symbol)
+        # Same lock as get_company_news, taken without blocking the event loop
+        while not lock.acquire(blocking=False):
+            await asyncio.sleep(NEWS_LOCK_POLL_SECONDS)
+        try:
+            plan = await run_blocking("db", self._plan_sync, symbol, window_start)
+            if plan is not None:
+                articles = await self._fetch_async(symbol, plan["from_date"])
+                await run_blocking("db", self._apply_sync, symbol, plan, articles)
+        finally:
+            lock.release()
+        return await run_blocking("db", self._read_window, symbol, window_start)
+
+    async def get_news_feed(self, symbols: List[str], days_back: int = 10) -> List[Dict]:
+        """
+        Merged news for several symbols, fetched concurrently (under the
+        Finnhub rate limit). Articles listed under several symbols appear
+        once, tagged with the first symbol that returned them.
+        """
+        symbols = list(dict.fromkeys(s.upper() for s in symbols if s))
+        results = await asyncio.gather(
+            *(self.get_company_news_async(symbol, days_back) for symbol in symbols),
+            return_exceptions=True,
+        )
+
+        feed: List[Dict] = []
+        seen = set()
+        for symbol, articles in zip(symbols, results):
+            if isinstance(articles, BaseException):
+                print(f"❌ News feed: {symbol} failed: {articles}")
+                continue
+            for article in articles:
+                key = article_key(article.get("url"), article.get("title"))
+                if key in seen:
+                    continue
+                seen.add(key)
+                feed.append({**article, "symbol": symbol})
+
+        feed.sort(key=lambda a: int(a["published_at"]), reverse=True)
+        return feed
+
+    def cache_stats(self) -> dict:
+        return {**self.stats, "rate_limit": self.rate_limiter.stats()}
+
+    def close(self):
+        self.client.close()
+
+    async def aclose(self):
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+
+    # --- Sync with Finnhub ---
 
-        params = {
-            "symbol": symbol.upper(),
+    def _plan_sync(self, symbol: str, window_start: date):
+        """What to fetch to bring the window up to date, or None if it is fresh."""
+        state = self.store.get_sync_state(symbol)
+        now = time.time()
+        covered = bool(
+            state
+            and state["covered_from"]
+            and state["covered_from"] <= window_start.isoformat()
+        )
+
+        if covered and now - state["checked_at"] < NEWS_REFRESH_SECONDS:
+            self.stats["store_reads"] += 1
+            return None
+
+        if covered and state["newest_at"]:
+            # Delta: Finnhub filters by day, so re-ask from the newest article's day
+            from_date = date.fromtimestamp(state["newest_at"])
+            covered_from = state["covered_from"]
+        else:
+            from_date = window_start
+            covered_from = window_start.isoformat()
+        return {
+            "from_date": from_date,
+            "covered_from": covered_from,
+            "newest_at": state["newest_at"] if state else 0,
+            "checked_at": now,
+        }
+
+    def _apply_sync(self, symbol: str, plan: dict, articles):
+        if articles is None:
+            # Finnhub failed: serve whatever is stored
+            return
+
+        added = self.store.add_articles(symbol, articles)
+        self.stats["new"] += added
+        newest_at = max([a["published_at"] for a in articles] + [plan["newest_at"]])
+        self.store.set_sync_state(symbol, plan["covered_from"], newest_at, plan["checked_at"])
+        self._maybe_prune(plan["checked_at"])
+
+    def _read_window(self, symbol: str, window_start: date) -> List[Dict]:
+        since = int(datetime.combine(window_start, datetime.min.time()).timestamp())
+        return [
+            {**article, "published_at": str(article["published_at"])}
+            for article in self.store.read_articles(symbol, since)
+        ]
+
+    def _params(self, symbol: str, from_date: date) -> dict:
+        return {
+            "symbol": symbol,
             "from": from_date.isoformat(),
-            "to": to_date.isoformat(),
+            "to": date.today().isoformat(),
             "token": self.api_key,
         }
 
-        url = f"{self.BASE_URL}/company-news"
+    def _fetch(self, symbol: str, from_date: date):
+        """Normalized articles from Finnhub, or None on failure."""
+        self.stats["fetches"] += 1
         try:
-            resp = httpx.get(url, params=params, timeout=10)
-            if resp.status_code != 200:
-                # Detailed log to help debugging
-                print(
-                    f"❌ Finnhub company-news error for {symbol}: "
-                    f"status={resp.status_code}, body={resp.text[:200]}"
-                )
-                return []
-
-            data = resp.json() or []
+            self.rate_limiter.acquire()
+            resp = self.client.get(self.NEWS_URL, params=self._params(symbol, from_date))
+            return self._parse_response(symbol, resp)
         except Exception as e:
             print(f"❌ Error fetching Finnhub news for {symbol}: {e}")
-            return []
+            self.stats["errors"] += 1
+            return None
 
+    async def _fetch_async(self, symbol: str, from_date: date):
+        self.stats["fetches"] += 1
+        try:
+            await self.rate_limiter.acquire_async()
+            resp = await self._get_async_client().get(
+                self.NEWS_URL, params=self._params(symbol, from_date)
+            )
+            return self._parse_response(symbol, resp)
+        except Exception as e:
+            print(f"❌ Error fetching Finnhub news for {symbol}: {e}")
+            self.stats["errors"] += 1
+            return None
+
+    def _parse_response(self, symbol: str, resp):
+        if resp.status_code != 200:
+            # Detailed log to help debugging
+            print(
+                f"❌ Finnhub company-news error for {symbol}: "
+                f"status={resp.status_code}, body={resp.text[:200]}"
+            )
+            self.stats["errors"] += 1
+            return None
+
+        data = resp.json() or []
         normalized: List[Dict] = []
         for item in data:
             normalized.append(
@@ -66,8 +245,28 @@ class NewsService:
                     "title": item.get("headline", ""),
                     "summary": item.get("summary", ""),
                     "url": item.get("url"),
-                    "published_at": str(item.get("datetime")),
+                    "published_at": int(item.get("datetime") or 0),
                 }
             )
 
+        self.stats["fetched"] += len(normalized)
         return normalized
+
+    def _get_async_client(self) -> httpx.AsyncClient:
+        # Created on first use so it binds to the server's running event loop
+        if self._async_client is None:
+            self._async_client = _build_client(httpx.AsyncClient)
+        return self._async_client
+
+    def _lock_for(self, symbol: str) -> threading.Lock:
+        with self._locks_lock:
+            return self._symbol_locks.setdefault(symbol, threading.Lock())
+
+    def _maybe_prune(self, now: float):
+        if now - self._last_prune < NEWS_PRUNE_SECONDS:
+            return
+        self._last_prune = now
+        try:
+            self.store.prune()
+        except Exception as e:
+            print(f"⚠️ News store prune failed: {e}")
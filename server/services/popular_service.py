@@ -0,0 +1,137 @@
+import asyncio
+import os
+import time
+from datetime import datetime, timezone
+
+from server.core.executors import run_blocking
+
+POPULAR_STOCKS = [
+    {"symbol": "AAPL", "name": "Apple Inc."},
+    {"symbol": "MSFT", "name": "Microsoft Corporation"},
+    {"symbol": "NVDA", "name": "NVIDIA Corporation"},
+    {"symbol": "AMZN", "name": "Amazon.com, Inc."},
+    {"symbol": "GOOGL", "name": "Alphabet Inc. Class A"},
+    {"symbol": "META", "name": "Meta Platforms, Inc."},
+    {"symbol": "TSLA", "name": "Tesla, Inc."},
+    {"symbol": "AVGO", "name": "Broadcom Inc."},
+    {"symbol": "NFLX", "name": "Netflix, Inc."},
+    {"symbol": "AMD", "name": "Advanced Micro Devices, Inc."},
+    {"symbol": "CRM", "name": "Salesforce, Inc."},
+    {"symbol": "ORCL", "name": "Oracle Corporation"},
+    {"symbol": "ADBE", "name": "Adobe Inc."},
+    {"symbol": "INTC", "name": "Intel Corporation"},
+    {"symbol": "QCOM", "name": "Qualcomm Incorporated"},
+    {"symbol": "CSCO", "name": "Cisco Systems, Inc."},
+    {"symbol": "PEP", "name": "PepsiCo, Inc."},
+    {"symbol": "COST", "name": "Costco Wholesale Corporation"},
+    {"symbol": "JPM", "name": "JPMorgan Chase & Co."},
+    {"symbol": "KO", "name": "The Coca-Cola Company"},
+]
+
+POPULAR_REFRESH_SECONDS = float(os.getenv("POPULAR_REFRESH_SECONDS", "60"))
+# Symbols per batched download; chunks are fetched concurrently
+POPULAR_CHUNK_SIZE = int(os.getenv("POPULAR_CHUNK_SIZE", "5"))
+
+
+class PopularStocksService:
+    """
+    Serves the "popular stocks" list from a precomputed snapshot.
+
+    A background task refreshes the snapshot on a schedule, fanning the quote
+    fetches out concurrently, so the endpoint itself never waits on Yahoo.
+    """
+
+    def __init__(self, stock_service, stocks: list[dict] = None):
+        self.stock_service = stock_service
+        self.stocks = stocks or POPULAR_STOCKS
+
+        self._snapshot = None  # {"stocks": [...], "updated_at": datetime}
+        self._updated_monotonic = None
+        self._refresh_lock = None
+        self._task = None
+
+    # --- Snapshot ---
+
+    async def get_snapshot(self) -> dict:
+        """Latest snapshot stamped with its age (built inline on a cold start)."""
+        if self._snapshot is None:
+            await self.refresh()
+
+        age = time.monotonic() - self._updated_monotonic
+        return {
+            "stocks": self._snapshot["stocks"],
+            "updated_at": self._snapshot["updated_at"].isoformat(),
+            "age_seconds": round(age, 1),
+        }
+
+    async def refresh(self):
+        """Rebuild the snapshot; concurrent callers share a single refresh."""
+        if self._refresh_lock is None:
+            self._refresh_lock = asyncio.Lock()
+
+        started = time.monotonic()
+        async with self._refresh_lock:
+            # Someone else refreshed while we were waiting for the lock
+            if self._updated_monotonic is not None and self._updated_monotonic >= started:
+                return
+
+            symbols = [stock["symbol"] for stock in self.stocks]
+            chunks = [
+                symbols[i : i + POPULAR_CHUNK_SIZE]
+                for i in range(0, len(symbols), POPULAR_CHUNK_SIZE)
+            ]
+            results = await asyncio.gather(
+                *(
+                    run_blocking("quotes", self.stock_service.get_live_quotes, chunk)
+                    for chunk in chunks
+                ),
+                return_exceptions=True,
+            )
+
+            quotes = {}
+            for result in results:
+                if isinstance(result, Exception):
+                    print(f"⚠️ Popular refresh chunk failed: {result}")
+                    continue
+                quotes.update(result.get("quotes", {}))
+
+            enriched = []
+            for stock in self.stocks:
+                quote = quotes.get(stock["symbol"])
+                enriched.append(
+                    {
+                        "symbol": stock["symbol"],
+                        "name": stock["name"],
+                        "price": quote.get("price") if quote else None,
+                    }
+                )
+
+            self._snapshot = {
+                "stocks": enriched,
+                "updated_at": datetime.now(timezone.utc),
+            }
+            self._updated_monotonic = time.monotonic()
+            print(f"✅ Popular snapshot refreshed ({len(quotes)}/{len(symbols)} priced)")
+
+    # --- Background refresher ---
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                print(f"❌ Popular snapshot refresh failed: {e}")
+            await asyncio.sleep(POPULAR_REFRESH_SECONDS)
@@ -0,0 +1,91 @@
+class PortfolioService:
+    """Values a user's positions (stocks_watchlist rows) against live quotes."""
+
+    @staticmethod
+    def build_valuation(rows: list[dict], quotes: dict) -> dict:
+        """
+        Join watchlist rows with a {SYMBOL: quote} map.
+
+        Returns per-position market value, P&L and percent change, plus
+        portfolio totals and a sector breakdown. When a live quote is missing
+        the average buy price is used and the position is flagged `stale`.
+        """
+        positions = []
+        total_value = 0.0
+        total_cost = 0.0
+        sectors = {}
+
+        for row in rows:
+            symbol = row.get("symbol") or ""
+            amount = float(row.get("amount") or 0)
+            buy_price = float(row.get("price") or 0)
+            sector = row.get("sector") or "Unknown"
+
+            quote = quotes.get(symbol.upper())
+            price = float(quote["price"]) if quote and quote.get("price") else 0.0
+            stale = price <= 0
+            if stale:
+                price = buy_price
+
+            market_value = price * amount
+            cost_basis = buy_price * amount
+            pnl = market_value - cost_basis
+            change_percent = (
+                (price - buy_price) / buy_price * 100 if buy_price > 0 else 0.0
+            )
+
+            positions.append(
+                {
+                    "event_id": row.get("id"),
+                    "symbol": symbol,
+                    "sector": sector,
+                    "amount": amount,
+                    "buy_price": round(buy_price, 4),
+                    "price": round(price, 4),
+                    "market_value": round(market_value, 2),
+                    "cost_basis": round(cost_basis, 2),
+                    "pnl": round(pnl, 2),
+                    "change_percent": round(change_percent, 2),
+                    "stale": stale,
+                }
+            )
+
+            total_value += market_value
+            total_cost += cost_basis
+            bucket = sectors.setdefault(
+                sector, {"sector": sector, "market_value": 0.0, "positions": 0}
+            )
+            bucket["market_value"] += market_value
+            bucket["positions"] += 1
+
+        # Weights once the totals are known
+        for position in positions:
+            position["weight_percent"] = (
+                round(position["market_value"] / total_value * 100, 2)
+                if total_value > 0
+                else 0.0
+            )
+
+        sector_breakdown = sorted(sectors.values(), key=lambda s: -s["market_value"])
+        for bucket in sector_breakdown:
+            bucket["weight_percent"] = (
+                round(bucket["market_value"] / total_value * 100, 2)
+                if total_value > 0
+                else 0.0
+            )
+            bucket["market_value"] = round(bucket["market_value"], 2)
+
+        total_pnl = total_value - total_cost
+        return {
+            "positions": positions,
+            "totals": {
+                "market_value": round(total_value, 2),
+                "cost_basis": round(total_cost, 2),
+                "pnl": round(total_pnl, 2),
+                "change_percent": (
+                    round(total_pnl / total_cost * 100, 2) if total_cost > 0 else 0.0
+                ),
+                "positions": len(positions),
+            },
+            "sectors": sector_breakdown,
+        }
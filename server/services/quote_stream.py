@@ -0,0 +1,146 @@
+import asyncio
+import os
+import time
+
+from server.core.executors import run_blocking
+
+QUOTE_STREAM_INTERVAL = float(os.getenv("QUOTE_STREAM_INTERVAL", "10"))
+# Pending updates per client; a slow client only ever misses stale prices
+QUOTE_STREAM_QUEUE_SIZE = int(os.getenv("QUOTE_STREAM_QUEUE_SIZE", "100"))
+MAX_STREAM_SYMBOLS = int(os.getenv("MAX_STREAM_SYMBOLS", "50"))
+
+
+class QuoteSubscriber:
+    """One connected client: its symbols and a bounded outgoing queue."""
+
+    def __init__(self, max_queue: int = QUOTE_STREAM_QUEUE_SIZE):
+        self.symbols = set()
+        self.queue = asyncio.Queue(maxsize=max_queue)
+        self.dropped = 0
+
+    def push(self, message: dict):
+        """Never blocks the poller: drop the oldest update when full."""
+        if self.queue.full():
+            try:
+                self.queue.get_nowait()
+                self.dropped += 1
+            except asyncio.QueueEmpty:
+                pass
+        self.queue.put_nowait(message)
+
+
+class QuoteStreamHub:
+    """
+    Fan-out of live prices to WebSocket subscribers.
+
+    Exactly one poller task runs per subscribed symbol, no matter how many
+    clients watch it; each new price is pushed to every subscriber's queue.
+    A poller stops as soon as its last subscriber leaves.
+    """
+
+    def __init__(self, stock_service, interval: float = QUOTE_STREAM_INTERVAL):
+        self.stock_service = stock_service
+        self.interval = interval
+
+        self._subscribers = {}  # symbol -> set[QuoteSubscriber]
+        self._pollers = {}  # symbol -> asyncio.Task
+        self._last = {}  # symbol -> last pushed message
+
+    # --- Subscriptions ---
+
+    def subscribe(self, subscriber: QuoteSubscriber, symbols: list[str]) -> list[str]:
+        """Returns the symbols actually added (bounded per client)."""
+        added = []
+        for symbol in symbols:
+            symbol = symbol.strip().upper()
+            if not symbol or symbol in subscriber.symbols:
+                continue
+            if len(subscriber.symbols) >= MAX_STREAM_SYMBOLS:
+                break
+
+            subscriber.symbols.add(symbol)
+            self._subscribers.setdefault(symbol, set()).add(subscriber)
+            added.append(symbol)
+
+            # Late joiners get the last known price right away
+            if symbol in self._last:
+                subscriber.push(self._last[symbol])
+            if symbol not in self._pollers:
+                self._pollers[symbol] = asyncio.create_task(self._poll(symbol))
+        return added
+
+    def unsubscribe(self, subscriber: QuoteSubscriber, symbols: list[str]) -> list[str]:
+        removed = []
+        for symbol in symbols:
+            symbol = symbol.strip().upper()
+            if symbol not in subscriber.symbols:
+                continue
+            subscriber.symbols.discard(symbol)
+            removed.append(symbol)
+
+            watchers = self._subscribers.get(symbol)
+            if watchers is not None:
+                watchers.discard(subscriber)
+                if not watchers:
+                    self._stop_poller(symbol)
+        return removed
+
+    def disconnect(self, subscriber: QuoteSubscriber):
+        self.unsubscribe(subscriber, list(subscriber.symbols))
+
+    def stats(self) -> dict:
+        return {
+            "symbols": len(self._pollers),
+            "subscriptions": sum(len(s) for s in self._subscribers.values()),
+            "interval_seconds": self.interval,
+        }
+
+    # --- Pollers ---
+
+    def _stop_poller(self, symbol: str):
+        self._subscribers.pop(symbol, None)
+        self._last.pop(symbol, None)
+        task = self._pollers.pop(symbol, None)
+        if task is not None:
+            task.cancel()
+
+    async def _poll(self, symbol: str):
+        while True:
+            try:
+                quote = await run_blocking(
+                    "quotes", self.stock_service.refresh_live_quote, symbol
+                )
+                if quote is not None:
+                    self._publish(symbol, quote)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️ Quote stream poll failed for {symbol}: {e}")
+            await asyncio.sleep(self.interval)
+
+    def _publish(self, symbol: str, quote: dict):
+        previous = self._last.get(symbol)
+        if previous is not None and previous["price"] == quote["price"]:
+            return  # Only push changes
+
+        message = {
+            "type": "quote",
+            "symbol": symbol,
+            "price": quote["price"],
+            "previous_price": previous["price"] if previous else None,
+            "currency": quote.get("currency", "USD"),
+            "timestamp": time.time(),
+        }
+        self._last[symbol] = message
+        for subscriber in list(self._subscribers.get(symbol, ())):
+            subscriber.push(message)
+
+    async def stop(self):
+        tasks = list(self._pollers.values())
+        for symbol in list(self._pollers):
+            self._stop_poller(symbol)
+        for task in tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
@@ -1,10 +1,122 @@
+import os
+import threading
+import time
+from datetime import date, timedelta
+
+import pandas as pd
 import yfinance as yf
+from server.core.ttl_cache import TTLCache
+from server.dal.history_store import HistoryStore
+
+# Shared by every StockService instance (routes, agent tools, ...) so that the
+# dashboard, the basket dialog and the agent all hit the same cache.
+QUOTE_CACHE_TTL = float(os.getenv("QUOTE_CACHE_TTL", "15"))
+QUOTE_CACHE_SIZE = int(os.getenv("QUOTE_CACHE_SIZE", "512"))
+
+_quote_cache = TTLCache(
+    ttl_seconds=QUOTE_CACHE_TTL, max_size=QUOTE_CACHE_SIZE, name="quotes"
+)
+
+# Sectors hardly ever change: one Yahoo lookup per symbol per day
+SECTOR_CACHE_TTL = float(os.getenv("SECTOR_CACHE_TTL", "86400"))
+_sector_cache = TTLCache(ttl_seconds=SECTOR_CACHE_TTL, max_size=2048, name="sectors")
+
+# --- Local OHLCV history ---
+# Daily bars are persisted locally and topped up incrementally; other
+# intervals (intraday, weekly...) are passed straight through to Yahoo.
+STORED_INTERVALS = {"1d"}
+HISTORY_TOPUP_SECONDS = float(os.getenv("HISTORY_TOPUP_SECONDS", "300"))
+
+PERIOD_DAYS = {
+    "5d": 5,
+    "1mo": 31,
+    "3mo": 92,
+    "6mo": 183,
+    "1y": 366,
+    "2y": 731,
+    "5y": 1827,
+    "10y": 3653,
+}
+VALID_PERIODS = set(PERIOD_DAYS) | {"ytd", "max"}
+VALID_INTERVALS = {
+    "1m", "2m", "5m", "15m", "30m", "60m", "90m", "1h",
+    "1d", "5d", "1wk", "1mo", "3mo",
+}
+
+_history_store = None
+_history_locks = {}
+_history_guard = threading.Lock()
+
+
+def _get_history_store() -> HistoryStore:
+    global _history_store
+    with _history_guard:
+        if _history_store is None:
+            _history_store = HistoryStore()
+        return _history_store
+
+
+def _symbol_lock(symbol: str) -> threading.Lock:
+    """One lock per symbol so concurrent requests don't top up twice."""
+    with _history_guard:
+        return _history_locks.setdefault(symbol, threading.Lock())
+
+
+def _resolve_start(period: str, start: str = None, end: str = None):
+    """Requested first date (None means the full available history)."""
+    if start:
+        return date.fromisoformat(start)
+    if period not in VALID_PERIODS:
+        raise ValueError(f"Unsupported period: {period}")
+    if period == "max":
+        return None
+
+    anchor = date.fromisoformat(end) if end else date.today()
+    if period == "ytd":
+        return date(anchor.year, 1, 1)
+    return anchor - timedelta(days=PERIOD_DAYS[period])
+
+
+def _to_frame(hist, date_format: str) -> pd.DataFrame:
+    """Normalize a yfinance frame to lowercase OHLCV columns indexed by date string."""
+    frame = hist[["Open", "High", "Low", "Close", "Volume"]].copy()
+    frame.columns = ["open", "high", "low", "close", "volume"]
+    frame.index = hist.index.strftime(date_format)
+    frame.index.name = "date"
+    return frame.dropna(subset=["close"])
 
 
 # Fix: rename from StockGateway to StockService
 class StockService:
     @staticmethod
     def get_live_quote(symbol: str):
+        """
+        Latest quote for a symbol, served from the shared TTL cache.
+        Concurrent misses for the same symbol share a single upstream fetch.
+        """
+        key = symbol.strip().upper()
+        return _quote_cache.get_or_load(
+            key, lambda: StockService._fetch_live_quote(key)
+        )
+
+    @staticmethod
+    def refresh_live_quote(symbol: str):
+        """
+        Fetch a fresh quote (bypassing the cache) and store it in the cache,
+        so the streaming pollers keep the REST endpoints warm as well.
+        """
+        key = symbol.strip().upper()
+        quote = StockService._fetch_live_quote(key)
+        if quote is not None:
+            _quote_cache.set(key, quote)
+        return quote
+
+    @staticmethod
+    def quote_cache_stats() -> dict:
+        return _quote_cache.stats()
+
+    @staticmethod
+    def _fetch_live_quote(symbol: str):
         try:
             print(f"🔄 Service: Fetching live quote for {symbol}...")
             stock = yf.Ticker(symbol)
@@ -15,35 +127,256 @@ class StockService:
                 return None
 
             price = data["Close"].iloc[-1]
-
-            return {
-                "symbol": symbol.upper(),
-                "price": round(float(price), 2),
-                "currency": "USD",
-                "source": "Yahoo Finance (Service Layer)",
-            }
+            return StockService._build_quote(symbol, price)
         except Exception as e:
             print(f"❌ Error in StockService: {e}")
             return None
 
     @staticmethod
-    def get_history(symbol: str):
+    def _build_quote(symbol: str, price) -> dict:
+        return {
+            "symbol": symbol.upper(),
+            "price": round(float(price), 2),
+            "currency": "USD",
+            "source": "Yahoo Finance (Service Layer)",
+        }
+
+    @staticmethod
+    def get_live_quotes(symbols: list[str]) -> dict:
+        """
+        Quotes for many symbols at once.
+        Cached symbols are served from the quote cache; all the misses are
+        fetched together in a single batched `yf.download` call.
+
+        Returns {"quotes": {SYMBOL: quote}, "missing": [SYMBOL, ...]}.
+        """
+        # Normalize + dedupe while keeping the caller's order
+        wanted = list(dict.fromkeys(s.strip().upper() for s in symbols if s.strip()))
+
+        quotes = {}
+        to_fetch = []
+        for symbol in wanted:
+            cached = _quote_cache.get(symbol)
+            if cached is not None:
+                quotes[symbol] = cached
+            else:
+                to_fetch.append(symbol)
+
+        if to_fetch:
+            fetched = StockService._fetch_live_quotes(to_fetch)
+            for symbol, quote in fetched.items():
+                _quote_cache.set(symbol, quote)
+            quotes.update(fetched)
+
+        missing = [symbol for symbol in wanted if symbol not in quotes]
+        return {"quotes": quotes, "missing": missing}
+
+    @staticmethod
+    def _fetch_live_quotes(symbols: list[str]) -> dict:
+        """One upstream round trip for all symbols (last close per ticker)."""
         try:
-            stock = yf.Ticker(symbol)
-            hist = stock.history(period="1mo")  # Last month
-            if hist.empty:
-                return None
+            print(f"🔄 Service: Fetching batched quotes for {len(symbols)} symbols...")
+            data = yf.download(
+                tickers=symbols,
+                period="5d",  # A few days so every ticker has a last valid close
+                group_by="column",
+                auto_adjust=False,
+                threads=True,
+                progress=False,
+            )
+            if data is None or data.empty:
+                return {}
 
-            # Convert to a chart-friendly format
-            return {
-                "symbol": symbol,
-                "dates": hist.index.strftime("%Y-%m-%d").tolist(),
-                "prices": hist["Close"].tolist(),
-            }
+            closes = data["Close"]
+            # A single ticker may come back as a Series / flat frame
+            if getattr(closes, "ndim", 1) == 1:
+                closes = closes.to_frame(name=symbols[0])
+
+            quotes = {}
+            for symbol in symbols:
+                if symbol not in closes.columns:
+                    continue
+                series = closes[symbol].dropna()
+                if series.empty:
+                    continue
+                quotes[symbol] = StockService._build_quote(symbol, series.iloc[-1])
+            return quotes
+        except Exception as e:
+            print(f"❌ Error in StockService (batch): {e}")
+            return {}
+
+    @staticmethod
+    def get_history(
+        symbol: str,
+        period: str = "1mo",
+        start: str = None,
+        end: str = None,
+        interval: str = "1d",
+    ):
+        """
+        Close prices for a chart. Raises ValueError for invalid parameters.
+        """
+        frame = StockService.get_history_frame(symbol, period, start, end, interval)
+        if frame is None or frame.empty:
+            return None
+
+        # Convert to a chart-friendly format
+        return {
+            "symbol": symbol,
+            "interval": interval,
+            "dates": frame.index.tolist(),
+            "prices": frame["close"].tolist(),
+        }
+
+    @staticmethod
+    def get_history_frame(
+        symbol: str,
+        period: str = "1mo",
+        start: str = None,
+        end: str = None,
+        interval: str = "1d",
+    ):
+        """
+        OHLCV DataFrame (open/high/low/close/volume, indexed by date string).
+
+        Daily bars come from the local store: only bars newer than the last
+        stored date (or older than what was backfilled so far) are fetched.
+        """
+        if interval not in VALID_INTERVALS:
+            raise ValueError(f"Unsupported interval: {interval}")
+        if end:
+            date.fromisoformat(end)  # Validate the format early
+        start_date = _resolve_start(period, start, end)
+        symbol = symbol.strip().upper()
+
+        try:
+            if interval not in STORED_INTERVALS:
+                # With an end date the period counts back from it, not from today
+                return StockService._download_frame(
+                    symbol,
+                    interval,
+                    start_date if start or end else None,
+                    end,
+                    period,
+                )
+
+            store = _get_history_store()
+            with _symbol_lock(symbol):
+                StockService._sync_history(store, symbol, interval, start_date)
+
+            rows = store.read_bars(
+                symbol,
+                interval,
+                start=start_date.isoformat() if start_date else None,
+                end=end,
+            )
+            if not rows:
+                return None
+            frame = pd.DataFrame(
+                rows, columns=["date", "open", "high", "low", "close", "volume"]
+            )
+            return frame.set_index("date")
         except Exception as e:
             print(f"❌ Error fetching history: {e}")
             return None
 
+    @staticmethod
+    def _sync_history(store: HistoryStore, symbol: str, interval: str, start_date):
+        """Bring the local store up to date for the requested range."""
+        coverage = store.get_coverage(symbol, interval)
+        first, last = store.bounds(symbol, interval)
+
+        # 1. Nothing stored yet: fetch the requested range once
+        if coverage is None or first is None:
+            print(f"📥 History: initial download for {symbol}")
+            frame = StockService._download_frame(symbol, interval, start_date)
+            StockService._store_frame(store, symbol, interval, frame)
+            if start_date is not None:
+                covered_from = start_date.isoformat()
+            elif frame is not None and not frame.empty:
+                covered_from = frame.index[0]
+            else:
+                covered_from = None
+            store.set_coverage(
+                symbol,
+                interval,
+                covered_from=covered_from,
+                full_history=start_date is None,
+            )
+            return
+
+        # 2. Older range requested than what we have: backfill the gap only
+        if not coverage["full_history"]:
+            covered_from = coverage["covered_from"] or first
+            if start_date is None or start_date.isoformat() < covered_from:
+                print(f"📥 History: backfilling {symbol} before {covered_from}")
+                frame = StockService._download_frame(
+                    symbol, interval, start_date, end=covered_from
+                )
+                StockService._store_frame(store, symbol, interval, frame)
+                store.set_coverage(
+                    symbol,
+                    interval,
+                    covered_from=start_date.isoformat() if start_date else covered_from,
+                    full_history=start_date is None,
+                    checked_at=coverage["checked_at"],
+                )
+
+        # 3. Incremental top-up (re-fetch the last stored bar, it may still be forming)
+        if time.time() - coverage["checked_at"] > HISTORY_TOPUP_SECONDS:
+            frame = StockService._download_frame(
+                symbol, interval, date.fromisoformat(last)
+            )
+            StockService._store_frame(store, symbol, interval, frame)
+            store.set_coverage(symbol, interval)
+
+    @staticmethod
+    def _download_frame(symbol, interval, start_date=None, end=None, period=None):
+        """Bars from Yahoo; `end` is exclusive, like yfinance's own."""
+        stock = yf.Ticker(symbol)
+        if start_date is not None:
+            hist = stock.history(start=start_date.isoformat(), end=end, interval=interval)
+        else:
+            hist = stock.history(period=period or "max", interval=interval)
+
+        if hist is None or hist.empty:
+            return None
+
+        daily_or_longer = interval in ("1d", "5d", "1wk", "1mo", "3mo")
+        frame = _to_frame(hist, "%Y-%m-%d" if daily_or_longer else "%Y-%m-%d %H:%M")
+        if start_date is None and end:
+            # yfinance ignores `end` for a period download: cut it here
+            frame = frame[frame.index < end]
+        return frame
+
+    @staticmethod
+    def _store_frame(store: HistoryStore, symbol: str, interval: str, frame):
+        if frame is None or frame.empty:
+            return
+        rows = [
+            (day, *(None if pd.isna(v) else float(v) for v in values))
+            for day, values in zip(frame.index, frame.itertuples(index=False))
+        ]
+        store.upsert_bars(symbol, interval, rows)
+
+    @staticmethod
+    def get_sector(symbol: str) -> str:
+        """Sector for a symbol from the shared sector cache ("Unknown" if Yahoo has none)."""
+        key = symbol.strip().upper()
+        return _sector_cache.get_or_load(key, lambda: StockService._fetch_sector(key)) or "Unknown"
+
+    @staticmethod
+    def sector_cache_stats() -> dict:
+        return _sector_cache.stats()
+
+    @staticmethod
+    def _fetch_sector(symbol: str):
+        try:
+            return yf.Ticker(symbol).info.get("sector") or None
+        except Exception as e:
+            print(f"Error fetching sector for {symbol}: {e}")
+            return None
+
     def get_company_info(self, symbol: str):
         """Fetch general company info (including sector)."""
         try:
@@ -0,0 +1,258 @@
+import csv
+import difflib
+import io
+import os
+import re
+import threading
+import time
+
+import requests
+
+RESOURCES_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "resources")
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
+
+# Curated list shipped with the repo (always loaded, ranked first)
+BUNDLED_LISTING = os.path.join(RESOURCES_DIR, "symbols.csv")
+# Full exchange listing downloaded from nasdaqtrader.com and cached locally
+LISTING_CACHE = os.getenv("SYMBOL_LISTING_CACHE", os.path.join(DATA_DIR, "symbols_listing.csv"))
+# 0 disables the download and keeps the bundled list only
+SYMBOL_LISTING_REFRESH_HOURS = float(os.getenv("SYMBOL_LISTING_REFRESH_HOURS", "24"))
+
+NASDAQ_LISTING_URLS = {
+    "NASDAQ": "https://www.nasdaqtrader.com/dynamic/SymDir/nasdaqlisted.txt",
+    "OTHER": "https://www.nasdaqtrader.com/dynamic/SymDir/otherlisted.txt",
+}
+OTHER_EXCHANGES = {"A": "NYSE American", "N": "NYSE", "P": "NYSE Arca", "Z": "Cboe BZX", "V": "IEX"}
+
+# Words that don't help identify a company ("NVIDIA Corp" == "NVIDIA")
+_NAME_STOPWORDS = {
+    "inc", "incorporated", "corp", "corporation", "co", "company", "companies",
+    "ltd", "limited", "plc", "group", "holdings", "holding", "the", "sa", "se",
+    "nv", "ag", "class", "common", "stock", "shares", "ordinary", "and", "&",
+}
+
+# Candidates collected per trie node (keeps prefix lookups O(prefix length))
+_NODE_CAPACITY = 50
+
+
+def normalize_name(text: str) -> str:
+    """'NVIDIA Corporation' -> 'nvidia', 'Coca-Cola Co.' -> 'coca cola'."""
+    words = re.findall(r"[a-z0-9]+", text.lower().replace("'s", ""))
+    kept = [w for w in words if w not in _NAME_STOPWORDS]
+    return " ".join(kept or words)
+
+
+class _TrieNode:
+    __slots__ = ("children", "ids")
+
+    def __init__(self):
+        self.children = {}
+        self.ids = []
+
+
+class SymbolIndex:
+    """
+    In-memory ticker / company-name index.
+
+    A prefix trie over symbols, full names and name words serves autocomplete;
+    `resolve` maps free text ("apple", "nvidia corp", "teva") to a ticker with
+    exact lookups first and difflib fuzzy matching as the last resort.
+    The index is immutable once built; a listing refresh builds a new one.
+    """
+
+    def __init__(self, listing_paths=None):
+        self.listing_paths = listing_paths or [BUNDLED_LISTING, LISTING_CACHE]
+        self._load()
+
+    # --- Building ---
+
+    def _load(self):
+        entries = []  # (symbol, name, exchange, priority)
+        seen = set()
+        for priority, path in enumerate(self.listing_paths):
+            if not os.path.exists(path):
+                continue
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    for row in csv.DictReader(f):
+                        symbol = (row.get("symbol") or "").strip().upper()
+                        if not symbol or symbol in seen:
+                            continue
+                        seen.add(symbol)
+                        entries.append(
+                            (symbol, row.get("name", "").strip(), row.get("exchange", ""), priority)
+                        )
+            except Exception as e:
+                print(f"⚠️ Could not read symbol listing {path}: {e}")
+
+        root = _TrieNode()
+        by_symbol = {}
+        by_name = {}
+        for entry_id, (symbol, name, _, _) in enumerate(entries):
+            by_symbol[symbol] = entry_id
+            normalized = normalize_name(name)
+            by_name.setdefault(normalized, entry_id)
+
+            keys = {symbol.lower(), normalized}
+            keys.update(normalized.split())
+            for key in keys:
+                self._insert(root, key, entry_id)
+
+        self._entries = entries
+        self._normalized = [normalize_name(e[1]) for e in entries]
+        self._root = root
+        self._by_symbol = by_symbol
+        self._by_name = by_name
+        print(f"✅ Symbol index loaded ({len(entries)} symbols)")
+
+    @staticmethod
+    def _insert(root: _TrieNode, key: str, entry_id: int):
+        node = root
+        for char in key:
+            node = node.children.setdefault(char, _TrieNode())
+            if len(node.ids) < _NODE_CAPACITY and entry_id not in node.ids:
+                node.ids.append(entry_id)
+
+    # --- Queries ---
+
+    def search(self, query: str, limit: int = 10) -> list[dict]:
+        """Autocomplete: symbols / company names starting with `query`."""
+        text = normalize_name(query) if query else ""
+        if not text:
+            return []
+
+        node = self._root
+        for char in text:
+            node = node.children.get(char)
+            if node is None:
+                break
+
+        candidates = set(node.ids) if node is not None else set()
+        if not candidates and len(text) >= 3:
+            # No prefix match: fall back to fuzzy name matches
+            candidates = {self._by_name[n] for n in self._fuzzy_names(text, limit)}
+
+        symbol_query = query.strip().upper()
+        ranked = sorted(
+            candidates,
+            key=lambda i: (
+                self._entries[i][0] != symbol_query,  # Exact ticker first
+                not self._entries[i][0].startswith(symbol_query),
+                not self._normalized[i].startswith(text),
+                self._entries[i][3],  # Curated list before the full listing
+                i,  # Then listing order (the curated file lists big names first)
+            ),
+        )
+        return [self._as_dict(i) for i in ranked[:limit]]
+
+    def resolve(self, text: str, fuzzy: bool = True):
+        """Best ticker for a symbol or company name, or None."""
+        if not text:
+            return None
+        symbol = text.strip().upper().replace(".", "-")
+        if symbol in self._by_symbol:
+            return symbol
+
+        normalized = normalize_name(text)
+        if not normalized:
+            return None
+        if normalized in self._by_name:
+            return self._entries[self._by_name[normalized]][0]
+
+        # "teva" -> "teva pharmaceutical industries": a name starting with the words
+        matches = self.search(normalized, limit=1)
+        if matches and self._normalized_of(matches[0]["symbol"]).startswith(normalized + " "):
+            return matches[0]["symbol"]
+
+        if fuzzy:
+            close = self._fuzzy_names(normalized, 1)
+            if close:
+                return self._entries[self._by_name[close[0]]][0]
+        return None
+
+    def __len__(self):
+        return len(self._entries)
+
+    # --- Helpers ---
+
+    def _fuzzy_names(self, text: str, limit: int) -> list[str]:
+        return difflib.get_close_matches(text, self._by_name.keys(), n=limit, cutoff=0.8)
+
+    def _normalized_of(self, symbol: str) -> str:
+        return self._normalized[self._by_symbol[symbol]]
+
+    def _as_dict(self, entry_id: int) -> dict:
+        symbol, name, exchange, _ = self._entries[entry_id]
+        return {"symbol": symbol, "name": name, "exchange": exchange}
+
+
+_symbol_index = None
+_symbol_index_lock = threading.Lock()
+
+
+def get_symbol_index() -> SymbolIndex:
+    """Process-wide index, built on first use."""
+    global _symbol_index
+    with _symbol_index_lock:
+        if _symbol_index is None:
+            _symbol_index = SymbolIndex()
+        return _symbol_index
+
+
+# --- Listing refresh ---
+
+
+def refresh_listing_if_stale(max_age_hours: float = SYMBOL_LISTING_REFRESH_HOURS) -> bool:
+    """
+    Download the full exchange listing when the cached copy is missing or
+    older than `max_age_hours`, then swap in a freshly built index.
+    """
+    global _symbol_index
+    if max_age_hours <= 0:
+        return False
+    if os.path.exists(LISTING_CACHE):
+        age_hours = (time.time() - os.path.getmtime(LISTING_CACHE)) / 3600
+        if age_hours < max_age_hours:
+            return False
+
+    try:
+        rows = _download_listing()
+    except Exception as e:
+        print(f"⚠️ Symbol listing refresh failed (keeping current index): {e}")
+        return False
+
+    os.makedirs(os.path.dirname(LISTING_CACHE), exist_ok=True)
+    tmp_path = f"{LISTING_CACHE}.tmp"
+    with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["symbol", "name", "exchange"])
+        writer.writerows(rows)
+    os.replace(tmp_path, LISTING_CACHE)
+
+    index = SymbolIndex()
+    with _symbol_index_lock:
+        _symbol_index = index
+    return True
+
+
+def _download_listing() -> list[tuple]:
+    rows = []
+    for source, url in NASDAQ_LISTING_URLS.items():
+        resp = requests.get(url, timeout=15)
+        resp.raise_for_status()
+        reader = csv.DictReader(io.StringIO(resp.text), delimiter="|")
+        for row in reader:
+            if row.get("Test Issue") == "Y":
+                continue
+            if source == "NASDAQ":
+                symbol, exchange = row.get("Symbol"), "NASDAQ"
+            else:
+                symbol = row.get("ACT Symbol")
+                exchange = OTHER_EXCHANGES.get(row.get("Exchange"), "OTHER")
+            if not symbol or symbol.startswith("File Creation Time"):
+                continue
+            # "Apple Inc. - Common Stock" -> "Apple Inc."
+            name = (row.get("Security Name") or "").split(" - ")[0].strip()
+            # Yahoo uses '-' for share classes (BRK.B -> BRK-B)
+            rows.append((symbol.replace(".", "-"), name, exchange))
+    return rows
@@ -0,0 +1,19 @@
+from server.services.indicator_service import parse_indicator_spec
+
+
+def check_bbands_spec():
+    print("🔍 1. Checking Bollinger band parameter validation...")
+    assert parse_indicator_spec("bbands:20-0.5") == [("bbands", (20, 0.5))]
+
+    for spec in ("bbands:0-2", "bbands:5000-2", "bbands:20-0"):
+        try:
+            parse_indicator_spec(spec)
+            raise AssertionError(f"{spec} should be rejected")
+        except ValueError as e:
+            print(f"   {spec}: {e}")
+    print("✅ Window and band width are validated separately.")
+
+
+if __name__ == "__main__":
+    print("=== Indicators: Spec Parsing Check ===\n")
+    check_bbands_spec()
@@ -0,0 +1,65 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from server.dal.local_trades import LocalTradeDAL
+from server.repositories.stock_repository import StockRepository
+
+
+def check_trade_logic():
+    print("🔍 1. Checking buy/sell logic (local trade procedures)...")
+    repo = StockRepository(dal=LocalTradeDAL())
+
+    repo.buy_stock("AAPL", 100.0, 10, user_id="u1")
+    position = repo.buy_stock("AAPL", 200.0, 10, user_id="u1")
+    assert position["amount"] == 20 and position["price"] == 150.0, position
+
+    result = repo.sell_stock("AAPL", 5, 180.0, user_id="u1")
+    assert result["remaining_qty"] == 15, result
+
+    try:
+        repo.sell_stock("AAPL", 99, 180.0, user_id="u1")
+        raise AssertionError("Overselling should fail")
+    except ValueError as e:
+        assert "Insufficient shares" in str(e)
+
+    assert repo.sell_stock("AAPL", 15, 180.0, user_id="u1")["remaining_qty"] == 0
+    assert len(repo.dal.events) == 4 and repo.dal.calls == 5
+    print("✅ Weighted average, partial/full sale and events are correct.")
+
+
+def check_concurrent_trades():
+    print("\n🧵 2. Checking concurrent buys on one position...")
+    repo = StockRepository(dal=LocalTradeDAL())
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        list(pool.map(lambda i: repo.buy_stock("MSFT", 10.0 + i % 2, 1, user_id="u1"), range(200)))
+
+    position = repo.dal.positions[("u1", "MSFT")]
+    assert position["amount"] == 200, position
+    assert abs(position["price"] - 10.5) < 1e-9, position
+    print("✅ No lost updates: 200 buys -> 200 shares at the right average.")
+
+
+def check_basket():
+    print("\n🧺 3. Checking basket (batch) purchase...")
+    repo = StockRepository(dal=LocalTradeDAL())
+    repo.buy_stock("AAPL", 100.0, 2, sector="Technology", user_id="u1")
+
+    positions = repo.buy_batch(
+        [
+            {"symbol": "AAPL", "price": 200.0, "amount": 2, "sector": "Unknown"},
+            {"symbol": "JPM", "price": 10.0, "amount": 3, "sector": "Financial"},
+        ],
+        user_id="u1",
+    )
+    by_symbol = {p["symbol"]: p for p in positions}
+    assert by_symbol["AAPL"]["amount"] == 4 and by_symbol["AAPL"]["price"] == 150.0
+    assert by_symbol["AAPL"]["sector"] == "Technology"  # Unresolved sector kept
+    assert repo.dal.calls == 2 and len(repo.dal.events) == 3
+    print("✅ Whole basket applied in one call.")
+
+
+if __name__ == "__main__":
+    print("=== Trading: Atomic Procedure Check ===\n")
+    check_trade_logic()
+    check_concurrent_trades()
+    check_basket()